@@ -32,6 +32,7 @@ class CircuitsBase(BaseModel):
     bind_policy: Optional[str] = Field(default=None)
 
     vc_id: Optional[int] = Field(default=None)
+    vc_pool: Optional[str] = Field(default="default")
     vc_type: Optional[str] = Field(default=None)
     vlan_tag:  Optional[str] = Field(default=None)
 
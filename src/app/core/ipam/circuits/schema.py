@@ -7,13 +7,35 @@ Module responsible for circuits schema
 from datetime import datetime
 from typing import Annotated, Optional, Literal
 
-from beanie import Document, Indexed, Link
+from beanie import Document, Indexed, Insert, Link, PydanticObjectId, Replace, Save, before_event
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
 from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
 from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
 from src.app.core.ipam.tunnel_traffic_policies.schema import TunnelTrafficPoliciesSchema
 from src.app.core.ipam.vlans.schema import VlanSchema
+from src.app.shared.references import link_id
 
+CIRCUIT_ELEMENT_FIELDS = ("interface_src", "interface_dst", "lag_src", "lag_dst", "device_src_id", "device_dst_id")
+
+
+def circuit_element_ids(values: dict) -> list:
+    """
+    Ids of every interface, lag and device a circuit rides, from its field values
+    """
+    elements = [link_id(values.get(field)) for field in CIRCUIT_ELEMENT_FIELDS]
+    return list(dict.fromkeys(element for element in elements if element is not None))
+
+
+def device_pair_key(device_src, device_dst) -> Optional[str]:
+    """
+    Unordered key of the two endpoint devices of a circuit, None when either end is unknown
+    """
+    devices = [link_id(device_src), link_id(device_dst)]
+    if None in devices:
+        return None
+
+    return ":".join(sorted(str(device) for device in devices))
 
 
 class CircuitsSchema(Document):
@@ -36,6 +58,11 @@ class CircuitsSchema(Document):
 
     bind_policy: Optional[Link[TunnelTrafficPoliciesSchema]] = Field(default=None)
 
+    device_src_id: Optional[PydanticObjectId] = Field(default=None)
+    device_dst_id: Optional[PydanticObjectId] = Field(default=None)
+    element_ids: list[PydanticObjectId] = Field(default_factory=list)
+    device_pair: Optional[str] = Field(default=None)
+
     vc_id: Annotated[Optional[int], Indexed(unique=True)]
     vc_type: Optional[str] = Field(default=None)
     vlan_tag: Optional[str] = Field(default=None)
@@ -55,5 +82,41 @@ class CircuitsSchema(Document):
     created_at: Optional[datetime] = Field(default_factory=datetime.now)
     updated_at: Optional[datetime] = Field(default_factory=datetime.now)
 
+    @before_event(Insert, Replace, Save)
+    def sync_elements(self):
+        """
+        Keep the ids of every interface, lag and device the circuit rides in element_ids, and the
+        endpoint device pair key
+        """
+        self.element_ids = circuit_element_ids(self.__dict__)
+        self.device_pair = device_pair_key(self.device_src_id, self.device_dst_id)
+
     class Settings:
         name = "circuits"
+        indexes = [
+            IndexModel([("project", ASCENDING), ("_id", ASCENDING)], name="project_id"),
+            IndexModel([("owner_group", ASCENDING), ("_id", ASCENDING)], name="owner_group_id"),
+            IndexModel([("type", ASCENDING), ("status", ASCENDING), ("_id", ASCENDING)], name="type_status"),
+            IndexModel([("status", ASCENDING), ("_id", ASCENDING)], name="status_id"),
+            IndexModel([("alarm", ASCENDING), ("_id", ASCENDING)], name="alarm_id"),
+            IndexModel([("criticality_matrix", ASCENDING), ("_id", ASCENDING)], name="criticality_matrix_id"),
+            IndexModel([("project", ASCENDING), ("criticality_matrix", ASCENDING), ("_id", ASCENDING)], name="project_criticality"),
+            IndexModel(
+                [("owner_group", ASCENDING), ("criticality_matrix", ASCENDING), ("_id", ASCENDING)], name="owner_group_criticality"
+            ),
+            IndexModel(
+                [("type", ASCENDING), ("status", ASCENDING), ("criticality_matrix", ASCENDING), ("_id", ASCENDING)],
+                name="type_status_criticality",
+            ),
+            IndexModel([("status", ASCENDING), ("criticality_matrix", ASCENDING), ("_id", ASCENDING)], name="status_criticality"),
+            IndexModel([("alarm", ASCENDING), ("criticality_matrix", ASCENDING), ("_id", ASCENDING)], name="alarm_criticality"),
+            IndexModel([("element_ids", ASCENDING), ("criticality_matrix", DESCENDING)], name="element_ids"),
+            IndexModel([("designation", ASCENDING)], name="designation"),
+            IndexModel([("device_pair", ASCENDING), ("criticality_matrix", DESCENDING), ("_id", ASCENDING)], name="device_pair"),
+            IndexModel(
+                [("name", TEXT), ("alias", TEXT), ("designation", TEXT), ("description", TEXT)],
+                name="search",
+                weights={"name": 10, "designation": 8, "alias": 5, "description": 1},
+                default_language="none",
+            ),
+        ]
@@ -5,8 +5,9 @@ Module responsible for devices Schema
 from datetime import datetime
 from typing import Annotated, Optional, Literal, List
 
-from beanie import Document, Indexed, Link, BackLink
+from beanie import Document, Indexed, Link, BackLink, Insert, Replace, Save, before_event
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 
 from src.app.core.ipam.devices.models import ( DevicesAccessBase,
                                                 DevicesMonitoringBase,
@@ -16,6 +17,7 @@ from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
 from src.app.core.facilities.locations.schema import LocationsSchema
 from src.app.core.facilities.vendors.schema import VendorSchema
 from src.app.core.ipam.paths.schema import PathsSchema
+from src.app.shared.network import ip_range, normalize_ipaddr
 
 
 class DevicesSchema(Document):
@@ -25,6 +27,10 @@ class DevicesSchema(Document):
     name: Annotated[Optional[str], Indexed(unique=True)] = Field(default=None)
     description: Optional[str] = Field(default=None)
     ipaddr: Optional[str] = Field(default=None)
+    mgmt_ipaddr: Optional[str] = Field(default=None)
+    ip_version: Optional[int] = Field(default=None)
+    ip_start: Optional[str] = Field(default=None)
+    ip_end: Optional[str] = Field(default=None)
     group: Optional[Literal["mpls", "metro ethernet", "fabric"]] = Field(default="mpls")
     model: Optional[str] = Field(default=None)
     status: Optional[Literal["enable", "disable"]] = Field(default="disable")
@@ -42,5 +48,22 @@ class DevicesSchema(Document):
     alarm: Optional[bool] = Field(default=False)
     created_at: Optional[datetime] = Field(default=None)
 
+    @before_event(Insert, Replace, Save)
+    def sync_addresses(self):
+        """
+        Keep the normalized management address and the address range in sync with ipaddr
+        """
+        self.mgmt_ipaddr = normalize_ipaddr(self.ipaddr)
+        self.ip_version, self.ip_start, self.ip_end = ip_range(self.ipaddr)
+
     class Settings:
         name = "devices"
+        indexes = [
+            IndexModel(
+                [("mgmt_ipaddr", ASCENDING)],
+                name="mgmt_ipaddr_unique",
+                unique=True,
+                partialFilterExpression={"mgmt_ipaddr": {"$type": "string"}},
+            ),
+            IndexModel([("ip_version", ASCENDING), ("ip_start", ASCENDING), ("ip_end", ASCENDING)], name="ip_range"),
+        ]
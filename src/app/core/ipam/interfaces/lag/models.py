@@ -26,3 +26,10 @@ class InterfaceLagBase(BaseModel):
 
     alarm: Optional[bool] = Field(default=False)
     info: Optional[dict] = Field(default={})
+
+
+class InterfaceLagMembersBase(BaseModel):
+    """
+    Base for a batch of lag member interfaces
+    """
+    interfaces: list[str] = Field(min_length=1)
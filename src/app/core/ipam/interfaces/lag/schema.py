@@ -3,12 +3,13 @@ Module responsible for interface lag Schema
 """
 
 from typing import Annotated, Optional,Literal, List
-from pydantic import Field
+from pydantic import Field, field_validator
+from pymongo import ASCENDING, IndexModel
 
-from beanie import Document, Indexed, BackLink
+from beanie import Document, Indexed, BackLink, Insert, PydanticObjectId, Replace, Save, before_event
 from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
-from src.app.core.ipam.vrf.schema import VrfSchema
-from src.app.core.ipam.vlans.schema import VlanSchema
+from src.app.shared.network import ip_range
+from src.app.shared.references import embedded_id, embedded_ids
 
 
 class InterfaceLagSchema(Document):
@@ -23,14 +24,48 @@ class InterfaceLagSchema(Document):
     speed: Optional[Literal[10,20,40,80, 100, 200,300,400, 800]] = Field(default=20)
     mtu: Optional[int] = Field(default=1500)
     ipaddr : Optional[str] = Field(default=None)
+    ip_version: Optional[int] = Field(default=None)
+    ip_start: Optional[str] = Field(default=None)
+    ip_end: Optional[str] = Field(default=None)
     operation_type: Optional[Literal["p2p-ce", "p2p-p", "p2p-pe"]] = Field(default="p2p-pe")
 
-    vrf: Optional[VrfSchema] = Field(default=None)
-    vlan: Optional[list[VlanSchema]] = Field(default=[])
+    bandwidth_reserved: Optional[int] = Field(default=0)
+
+    vrf: Optional[PydanticObjectId] = Field(default=None)
+    vlan: Optional[list[PydanticObjectId]] = Field(default=[])
     interface: Optional[List[BackLink[InterfaceSingleSchema]]] = Field(default_factory=list, original_field="lag")
+    device_id: Annotated[Optional[PydanticObjectId], Indexed()] = Field(default=None)
 
     alarm: Optional[bool] = Field(default=False)
     info: Optional[dict] = Field(default={})
 
+    @field_validator("vrf", mode="before")
+    @classmethod
+    def vrf_reference(cls, value):
+        """
+        Read a vrf still stored as an embedded document as its id
+        """
+        return embedded_id(value)
+
+    @field_validator("vlan", mode="before")
+    @classmethod
+    def vlan_references(cls, value):
+        """
+        Read vlans still stored as embedded documents as their ids
+        """
+        return embedded_ids(value)
+
+    @before_event(Insert, Replace, Save)
+    def sync_addresses(self):
+        """
+        Keep the address range in sync with ipaddr
+        """
+        self.ip_version, self.ip_start, self.ip_end = ip_range(self.ipaddr)
+
     class Settings:
         name = "interfaces_lag"
+        indexes = [
+            IndexModel([("ip_version", ASCENDING), ("ip_start", ASCENDING), ("ip_end", ASCENDING)], name="ip_range"),
+            IndexModel([("vlan", ASCENDING)], name="vlan"),
+            IndexModel([("vrf", ASCENDING)], name="vrf"),
+        ]
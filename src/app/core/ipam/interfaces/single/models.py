@@ -3,7 +3,7 @@ Module responsible for interface single models Base
 """
 
 from typing import Optional, Literal
-from pydantic import Field, BaseModel
+from pydantic import AliasChoices, Field, BaseModel, model_validator
 
 
 class InterfaceSingleBase(BaseModel):
@@ -22,7 +22,7 @@ class InterfaceSingleBase(BaseModel):
     operation_type: Optional[Literal["p2p-ce", "p2p-p", "p2p-pe"]] = Field(default="p2p-ce")
 
     vrf: Optional[str] = Field(default=None)
-    vlans: Optional[list[str]] = Field(default=[])
+    vlan: Optional[list[str]] = Field(default=[], validation_alias=AliasChoices("vlan", "vlans"))
 
     ipaddr : Optional[str] = Field(default=None)
 
@@ -31,3 +31,32 @@ class InterfaceSingleBase(BaseModel):
 
     alarm: Optional[bool] = Field(default=False)
     info: Optional[dict] = Field(default={})
+
+
+class InterfaceSingleTemplateBase(BaseModel):
+    """
+    Base for interface single template provisioning
+    """
+    pattern: str = Field(examples=["GigabitEthernet0/0/[0-47]"])
+    interface: Optional[InterfaceSingleBase] = Field(default_factory=InterfaceSingleBase)
+
+
+class InterfaceSingleStatusBase(BaseModel):
+    """
+    Base for an operational status sample of one interface single, addressed by id or by device and name
+    """
+    id: Optional[str] = Field(default=None)
+    device: Optional[str] = Field(default=None)
+    name: Optional[str] = Field(default=None)
+    status_op: Optional[bool] = Field(default=None)
+    alarm: Optional[bool] = Field(default=None)
+
+    @model_validator(mode="after")
+    def check_target(self):
+        """
+        An interface is addressed by its id or by its device id and name
+        """
+        if self.id is None and (self.device is None or self.name is None):
+            raise ValueError("id or device and name are required")
+
+        return self
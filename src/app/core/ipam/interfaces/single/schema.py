@@ -4,11 +4,12 @@ Module responsible for vendor Schema
 
 from typing import Annotated, Literal, Optional, List
 
-from beanie import Document, Indexed, BackLink, Link
-from pydantic import Field
+from beanie import Document, Indexed, BackLink, Link, Insert, PydanticObjectId, Replace, Save, before_event
+from pydantic import Field, field_validator
+from pymongo import ASCENDING, IndexModel
 
-from src.app.core.ipam.vrf.schema import VrfSchema
-from src.app.core.ipam.vlans.schema import VlanSchema
+from src.app.shared.network import ip_range
+from src.app.shared.references import embedded_id, embedded_ids, link_id
 
 
 class InterfaceSingleSchema(Document):
@@ -27,15 +28,60 @@ class InterfaceSingleSchema(Document):
     operation_type: Optional[Literal["p2p-ce", "p2p-p", "p2p-pe"]] = Field(default="p2p-pe")
 
     ipaddr : Optional[str] = Field(default=None)
+    ip_version: Optional[int] = Field(default=None)
+    ip_start: Optional[str] = Field(default=None)
+    ip_end: Optional[str] = Field(default=None)
 
-    vrf: Optional[VrfSchema] = Field(default=None)
-    vlan: Optional[list[VlanSchema]] = Field(default=[])
+    bandwidth_reserved: Optional[int] = Field(default=0)
+
+    vrf: Optional[PydanticObjectId] = Field(default=None)
+    vlan: Optional[list[PydanticObjectId]] = Field(default=[])
 
     alarm: Optional[bool] = Field(default=False)
     info: Optional[dict] = Field(default={})
 
     lag: Optional[Link["InterfaceLagSchema"]] = Field(default=None)
     device: Optional[Link["DevicesSchema"]] = Field(default=None)
+    device_id: Annotated[Optional[PydanticObjectId], Indexed()] = Field(default=None)
+
+    @field_validator("vrf", mode="before")
+    @classmethod
+    def vrf_reference(cls, value):
+        """
+        Read a vrf still stored as an embedded document as its id
+        """
+        return embedded_id(value)
+
+    @field_validator("vlan", mode="before")
+    @classmethod
+    def vlan_references(cls, value):
+        """
+        Read vlans still stored as embedded documents as their ids
+        """
+        return embedded_ids(value)
+
+    @before_event(Insert, Replace, Save)
+    def sync_addresses(self):
+        """
+        Keep the address range in sync with ipaddr
+        """
+        self.ip_version, self.ip_start, self.ip_end = ip_range(self.ipaddr)
+
+    @before_event(Insert, Replace, Save)
+    def sync_device_id(self):
+        """
+        Keep the stored device id in sync with the device link
+        """
+        self.device_id = link_id(self.device)
 
     class Settings:
         name = "interfaces_single"
+        indexes = [
+            IndexModel([("ip_version", ASCENDING), ("ip_start", ASCENDING), ("ip_end", ASCENDING)], name="ip_range"),
+            IndexModel([("vlan", ASCENDING)], name="vlan"),
+            IndexModel([("vrf", ASCENDING)], name="vrf"),
+            IndexModel(
+                [("device_id", ASCENDING), ("name", ASCENDING)], name="device_name", unique=True,
+                partialFilterExpression={"device_id": {"$type": "objectId"}},
+            ),
+        ]
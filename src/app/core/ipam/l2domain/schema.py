@@ -5,8 +5,12 @@ Module responsible for l2 domain Schema
 from typing import Annotated, Optional
 
 from beanie import Document, Indexed, Link
+from pydantic import Field
 
 from src.app.core.facilities.locations.schema import LocationsSchema
+from src.app.shared.bitmap import empty_bitmap
+
+VLAN_BITMAP_SIZE: int = 4096
 
 
 class L2DomainSchema(Document):
@@ -16,6 +20,7 @@ class L2DomainSchema(Document):
     name: Annotated[str, Indexed(unique=True)]
     description: Optional[str]
     location : Optional[Link[LocationsSchema]]
+    vlan_bitmap: list[int] = Field(default_factory=lambda: empty_bitmap(VLAN_BITMAP_SIZE))
 
     class Settings:
         name = "l2domains"
@@ -7,9 +7,18 @@ Module responsible for paths schema
 from datetime import datetime
 from typing import Annotated, Optional, Literal, List
 
-from beanie import Document, Indexed, Link, BackLink
+from beanie import Document, Indexed, Insert, Link, BackLink, PydanticObjectId, Replace, Save, before_event
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 
+from src.app.shared.aggregation import ref_id
+from src.app.shared.references import link_id
+
+PATH_STEPS = tuple(f"step_{step}" for step in range(1, 21))
+# update pipeline expression computing device_ids from the stored steps
+PATH_DEVICE_IDS = {"$setUnion": [{"$filter": {
+    "input": [ref_id(f"${step}") for step in PATH_STEPS], "cond": {"$ne": ["$$this", None]},
+}}]}
 
 
 class PathsSchema(Document):
@@ -45,10 +54,21 @@ class PathsSchema(Document):
     info: Optional[dict] = Field(default={})
     options: Optional[dict] = Field(default={})
 
+    device_ids: list[PydanticObjectId] = Field(default_factory=list)
+
     created_at: Optional[datetime] = Field(default_factory=datetime.now)
     updated_at: Optional[datetime] = Field(default_factory=datetime.now)
 
-
+    @before_event(Insert, Replace, Save)
+    def sync_device_ids(self):
+        """
+        Keep the ids of every device the path steps through in device_ids
+        """
+        steps = [link_id(getattr(self, step)) for step in PATH_STEPS]
+        self.device_ids = list(dict.fromkeys(step for step in steps if step is not None))
 
     class Settings:
         name = "paths"
+        indexes = [
+            IndexModel([("device_ids", ASCENDING)], name="device_ids"),
+        ]
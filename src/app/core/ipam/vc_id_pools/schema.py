@@ -0,0 +1,21 @@
+"""
+Module responsible for vc_id pools schema
+"""
+
+from typing import Annotated, Optional
+
+from beanie import Document, Indexed
+from pydantic import Field
+
+
+class VcIdPoolSchema(Document):
+    """
+    Schema Document for vc_id pools, last holds the last vc_id handed out
+    """
+    name: Annotated[str, Indexed(unique=True)]
+    start: int
+    end: int
+    last: Optional[int] = Field(default=None)
+
+    class Settings:
+        name = "vc_id_pools"
@@ -6,6 +6,7 @@ from typing import Annotated, Optional
 
 from beanie import Document, Indexed, Link
 from pydantic import Field
+from pymongo import ASCENDING, IndexModel
 
 from src.app.core.ipam.l2domain.schema import L2DomainSchema
 
@@ -15,11 +16,18 @@ class VlanSchema(Document):
     Schema Document for vlan
     """
     name: Annotated[str, Indexed()]
-    alias: Optional[str]
-    description: Optional[str]
+    alias: Optional[str] = Field(default=None)
+    description: Optional[str] = Field(default=None)
     number: Annotated[int, Indexed()]
     l2domain : Optional[Link[L2DomainSchema]]
     unique: Optional[bool] = Field(default=False)
 
     class Settings:
         name = "vlans"
+        # both unique indexes fail to build (and init_beanie with them) while duplicated vlans exist
+        indexes = [
+            IndexModel([("l2domain.$id", ASCENDING), ("number", ASCENDING)], name="l2domain_number", unique=True),
+            IndexModel(
+                [("number", ASCENDING)], name="number_unique", unique=True, partialFilterExpression={"unique": True}
+            ),
+        ]
@@ -0,0 +1,105 @@
+"""
+Module responsible for the ipam addresses facade
+"""
+
+import asyncio
+import ipaddress
+
+from pymongo import UpdateOne
+
+from src.app.core.ipam.devices.schema import DevicesSchema
+from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
+from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
+from src.app.shared.messages import FOUND
+from src.app.shared.network import encode_address, ip_range
+from src.app.shared.response import CustomResponse
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+operation = "address"
+
+BACKFILL_BATCH_SIZE: int = 1000
+
+ADDRESS_COLLECTIONS = {
+    "devices": (DevicesSchema, {"_id": 0, "id": {"$toString": "$_id"}, "name": 1, "ipaddr": 1}),
+    "interfaces_single": (InterfaceSingleSchema, {
+        "_id": 0, "id": {"$toString": "$_id"}, "name": 1, "ipaddr": 1, "device": {"$toString": "$device_id"},
+    }),
+    "interfaces_lag": (InterfaceLagSchema, {
+        "_id": 0, "id": {"$toString": "$_id"}, "name": 1, "ipaddr": 1, "device": {"$toString": "$device_id"},
+    }),
+}
+
+
+class AddressFacade:
+    """
+    Class responsible for the facade of the ipam addresses
+    """
+
+    @staticmethod
+    async def search_prefix(prefix: str, limit: int) -> CustomResponse:
+        """
+        Method responsible for finding devices and interfaces whose address is inside a prefix
+        """
+        logger.info("Facade: Search addresses inside prefix: %s", prefix)
+        try:
+            network = ipaddress.ip_network(prefix.strip(), strict=False)
+
+        except ValueError:
+            logger.error("Invalid prefix %s (search_prefix)", prefix)
+            return CustomResponse.failure(message="Invalid prefix: %s" % prefix)
+
+        try:
+            query = {
+                "ip_version": network.version,
+                "ip_start": {"$gte": encode_address(network.network_address)},
+                "ip_end": {"$lte": encode_address(network.broadcast_address)},
+            }
+
+            async def search(schema, projection: dict) -> list:
+                pipeline = [{"$match": query}, {"$sort": {"ip_start": 1}}, {"$limit": limit}, {"$project": projection}]
+                return await schema.aggregate(pipeline).to_list()
+
+            names = list(ADDRESS_COLLECTIONS.keys())
+            results = await asyncio.gather(*[search(*ADDRESS_COLLECTIONS[name]) for name in names])
+
+            logger.info("Facade: Search addresses inside prefix success: %s", prefix)
+            return CustomResponse.success(message=FOUND.format(operation), data=dict(zip(names, results)))
+
+        except Exception as err:
+            logger.error("Error search addresses (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [AddressFacade.search_prefix]")
+
+    @staticmethod
+    async def backfill_ip_range() -> CustomResponse:
+        """
+        Method responsible for filling the address range of existing devices and interfaces
+        """
+        logger.info("Facade: Backfill address ranges...")
+        try:
+            result: dict = {}
+            for name, (schema, _) in ADDRESS_COLLECTIONS.items():
+                collection = schema.get_motor_collection()
+                operations: list = []
+                result[name] = 0
+
+                async for document in collection.find({"ip_version": {"$exists": False}}, projection={"ipaddr": 1}):
+                    version, start, end = ip_range(document.get("ipaddr"))
+                    operations.append(UpdateOne(
+                        {"_id": document["_id"]},
+                        {"$set": {"ip_version": version, "ip_start": start, "ip_end": end}}
+                    ))
+                    if len(operations) >= BACKFILL_BATCH_SIZE:
+                        result[name] += (await collection.bulk_write(operations, ordered=False)).modified_count
+                        operations = []
+
+                if len(operations) > 0:
+                    result[name] += (await collection.bulk_write(operations, ordered=False)).modified_count
+
+            logger.info("Facade: Backfill address ranges success: %s", result)
+            return CustomResponse.success(message="Backfill %s ranges finished" % operation, data=result)
+
+        except Exception as err:
+            logger.error("Error backfill address ranges (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [AddressFacade.backfill_ip_range]")
@@ -0,0 +1,50 @@
+"""
+Module responsible for ipam addresses routes
+"""
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import JSONResponse
+
+from src.app.ipam.addresses.facade import AddressFacade
+from src.app.shared.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from src.app.shared.serialize import SerializationFilter
+# from src.dependencies import authorization
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(
+    prefix="/ipam",
+    tags=["addresses"],
+    #dependencies=[Depends(authorization, use_cache=True)],
+    responses={status.HTTP_401_UNAUTHORIZED: {"description": "unauthorized"}},
+)
+
+@router.get("/address/search")
+async def get_address_search(prefix: str, limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT)):
+    """
+    Method responsible for listing devices and interfaces inside a prefix
+    """
+    logger.info("Resource: Starting address search: %s", prefix)
+
+    search_address = await AddressFacade.search_prefix(prefix=prefix, limit=limit)
+    if search_address["status"] == "success":
+        logger.info("Address search successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(search_address["data"]) )
+
+    logger.error("Address search error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=search_address["message"] )
+
+@router.post("/address/backfill")
+async def post_backfill_addresses():
+    """
+    Method responsible for backfilling the address ranges
+    """
+    logger.info("Resource: Starting address backfill")
+
+    backfill_address = await AddressFacade.backfill_ip_range()
+    if backfill_address["status"] == "success":
+        logger.info("Address backfill successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(backfill_address["data"]) )
+
+    logger.error("Address backfill error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=backfill_address["message"] )
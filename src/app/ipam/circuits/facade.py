@@ -2,20 +2,29 @@
 Module responsible for circuits Facade
 """
 
+import asyncio
+import re
 from datetime import datetime
-from typing import Type
+from typing import Optional, Type
 
+from beanie import Link
 from bson import ObjectId
 from pymongo.errors import DuplicateKeyError
 
 
 
 from src.app.core.ipam.circuits.models import CircuitsBase
-from src.app.core.ipam.circuits.schema import CircuitsSchema
-from src.app.ipam.circuits.service import CircuitsService
+from src.app.core.ipam.circuits.schema import CircuitsSchema, device_pair_key
+from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
+from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
+from src.app.core.ipam.tunnel_traffic_policies.schema import TunnelTrafficPoliciesSchema
+from src.app.ipam.circuits.service import REFERENCE_SCHEMAS, VC_ID_MAX_RETRIES, CircuitsService
 from src.app.shared.messages import (ALREADY_EXISTS, CREATE_SUCCESS,
                                      DELETE_SUCCESS, FOUND, NOT_FOUND,
                                      UPDATE_SUCCESS)
+from src.app.shared.loader import DocumentLoader
+from src.app.shared.pagination import DEFAULT_LIMIT, encode_cursor, sorted_keyset_filter, split_page
+from src.app.shared.references import link_id
 from src.app.shared.response import CustomResponse
 from src.logging import get_logger
 
@@ -24,6 +33,33 @@ logger = get_logger(__name__)
 operation_error = "circuit id or name"
 operation = "circuit"
 
+NO_BANDWIDTH: str = "Not enough bandwidth available on {}"
+NO_VC_ID: str = "No vc_id available in pool {}"
+VC_ID_COLLISIONS: str = "vc_id allocation from pool {} kept colliding with used vc_ids, retry later"
+CIRCUIT_FILTERS = ("project", "owner_group", "type", "status", "criticality_matrix", "alarm")
+CIRCUIT_SORTS = ("_id", "name", "vc_id", "criticality_matrix")
+# unique fields are ordered by their own index, without the _id tiebreaker
+CIRCUIT_UNIQUE_SORTS = ("name", "vc_id")
+# sorts backed by a (filter, sort, _id) index for every filter
+CIRCUIT_FILTERED_SORTS = ("_id", "criticality_matrix")
+IMPACT_PROJECTION = {
+    "_id": 0, "id": {"$toString": "$_id"}, "name": 1, "designation": 1, "project": 1, "owner_group": 1,
+    "type": 1, "status": 1, "alarm": 1, "criticality_matrix": 1, "vc_id": 1,
+    "device_src": {"$toString": "$device_src_id"}, "device_dst": {"$toString": "$device_dst_id"},
+}
+SEARCH_PROJECTION = {
+    "_id": 0, "id": {"$toString": "$_id"}, "name": 1, "alias": 1, "designation": 1, "description": 1,
+    "project": 1, "type": 1, "status": 1, "criticality_matrix": 1,
+}
+PREFIX_FIELDS = ("name", "designation")
+CIRCUIT_EXPANDABLE = {
+    "interface_src": InterfaceSingleSchema,
+    "interface_dst": InterfaceSingleSchema,
+    "lag_src": InterfaceLagSchema,
+    "lag_dst": InterfaceLagSchema,
+    "bind_policy": TunnelTrafficPoliciesSchema,
+}
+
 class CircuitsFacade:
     """
     Class responsible for the facade of the circuit
@@ -38,14 +74,28 @@ class CircuitsFacade:
         logger.info("Facade: Creating circuit...")
         try:
 
-            # validate_circuit = await CircuitsService.validate_interface_circuit(circuit=circuit)
-            # if validate_circuit["status"] == "failure":
-            #     return validate_circuit
+            validate_circuit = await CircuitsService.validate_interface_circuit(circuit=circuit)
+            if validate_circuit["status"] == "failure":
+                return validate_circuit
 
             circuit.created_at = datetime.now().isoformat()
-            create_circuit =  CircuitsSchema(**circuit.model_dump(exclude_unset=True))
-            logger.info("Facade: Creating circuit: %s", create_circuit)
-            await create_circuit.insert()
+            values = circuit.model_dump(exclude_unset=True, exclude={"vc_pool"})
+
+            endpoints = CircuitsService.circuit_endpoints(values)
+            insufficient = await CircuitsService.reserve_bandwidth(endpoints, values.get("bandwidth_reservation"))
+            if insufficient is not None:
+                return CustomResponse.failure(message=NO_BANDWIDTH.format(insufficient))
+
+            try:
+                create_circuit, error = await CircuitsFacade._insert_circuit(circuit, values)
+
+            except Exception:
+                await CircuitsService.release_bandwidth(endpoints, values.get("bandwidth_reservation"))
+                raise
+
+            if create_circuit is None:
+                await CircuitsService.release_bandwidth(endpoints, values.get("bandwidth_reservation"))
+                return CustomResponse.failure(message=error)
 
             logger.info("Facade: Creating circuit success: %s", create_circuit.dict())
 
@@ -59,6 +109,37 @@ class CircuitsFacade:
             logger.error("Error creating circuit (Exception): %s", err)
             return CustomResponse.failure(message="Interno error: [CircuitFacade.create_circuit]")
 
+    @staticmethod
+    async def _insert_circuit(circuit: CircuitsBase, values: dict) -> tuple[Optional[CircuitsSchema], Optional[str]]:
+        """
+        Method responsible for inserting a circuit, allocating its vc_id from the pool when not given
+
+        A vc_id collision moves the pool past the vc_ids in use right after it before retrying. Returns the
+        circuit, or None with the reason when no vc_id could be allocated
+        """
+        for _ in range(VC_ID_MAX_RETRIES):
+            if circuit.vc_id is None:
+                vc_id = await CircuitsService.allocate_vc_id(circuit.vc_pool)
+                if vc_id is None:
+                    return None, NO_VC_ID.format(circuit.vc_pool)
+                values["vc_id"] = vc_id
+
+            create_circuit =  CircuitsSchema(**values)
+            await CircuitsService.resolve_devices(create_circuit)
+            logger.info("Facade: Creating circuit: %s", create_circuit)
+            try:
+                await create_circuit.insert()
+                return create_circuit, None
+
+            except DuplicateKeyError as err:
+                if circuit.vc_id is not None or "vc_id" not in (err.details or {}).get("keyPattern", {}):
+                    raise
+                logger.info("Facade: vc_id %s already used, seeding pool %s", values["vc_id"], circuit.vc_pool)
+                await CircuitsService.seed_vc_id_pool(circuit.vc_pool)
+
+        logger.error("Facade: vc_id allocation from pool %s exhausted its retries", circuit.vc_pool)
+        return None, VC_ID_COLLISIONS.format(circuit.vc_pool)
+
     @staticmethod
     async def update_circuit(circuit_id: str, circuit: Type[CircuitsBase]) -> CustomResponse:
         """
@@ -67,16 +148,43 @@ class CircuitsFacade:
 
         logger.info("Facade: Update circuit...")
         try:
-            find_circuit = await CircuitsSchema.get(circuit_id, fetch_links=True)
+            find_circuit = await CircuitsSchema.get(circuit_id)
             if find_circuit is None:
                 logger.error("Facade: Update Circuit %s not found!", circuit_id)
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, circuit_id))
 
             logger.info("Facade: find circuit success [update]: %s", find_circuit.dict())
 
-            for field, value in find_circuit.model_dump(exclude_unset=True).items():
-                setattr(find_circuit, field, value)
-                update_circuit = await find_circuit.replace()
+            stored = {field: link_id(getattr(find_circuit, field)) for field in REFERENCE_SCHEMAS}
+            merged = circuit.model_copy(update={
+                field: str(value) if value is not None else None
+                for field, value in stored.items() if field not in circuit.model_fields_set
+            })
+            validate_circuit = await CircuitsService.validate_interface_circuit(circuit=merged)
+            if validate_circuit["status"] == "failure":
+                return validate_circuit
+
+            values = circuit.model_dump(exclude_unset=True, exclude={"vc_pool", "created_at"})
+            update_circuit = CircuitsSchema(**{**find_circuit.model_dump(), **values, "updated_at": datetime.now()})
+            await CircuitsService.resolve_devices(update_circuit)
+
+            old_endpoints = CircuitsService.circuit_endpoints(find_circuit.__dict__)
+            new_endpoints = CircuitsService.circuit_endpoints(update_circuit.__dict__)
+            old_amount, new_amount = find_circuit.bandwidth_reservation, update_circuit.bandwidth_reservation
+            moved = old_endpoints != new_endpoints or old_amount != new_amount
+
+            if moved:
+                insufficient = await CircuitsService.move_bandwidth(old_endpoints, old_amount, new_endpoints, new_amount)
+                if insufficient is not None:
+                    return CustomResponse.failure(message=NO_BANDWIDTH.format(insufficient))
+
+            try:
+                await update_circuit.replace()
+
+            except Exception:
+                if moved and await CircuitsService.move_bandwidth(new_endpoints, new_amount, old_endpoints, old_amount):
+                    logger.error("Facade: Could not restore the reservation of circuit %s, run the bandwidth rebuild", circuit_id)
+                raise
 
             return CustomResponse.success(message=UPDATE_SUCCESS.format(operation, circuit.name), data=update_circuit)
 
@@ -89,15 +197,72 @@ class CircuitsFacade:
             return CustomResponse.failure(message="Interno error: [CircuitFacade.update_circuit]")
 
     @staticmethod
-    async def get_circuits() -> CustomResponse:
+    async def _expand_circuits(circuits: list, expand: set, loader: DocumentLoader) -> None:
         """
-        Method responsible for get all circuits
+        Method responsible for resolving the requested links of a page of circuits, one query per link
         """
 
-        logger.info("Facade: Get all circuits...")
+        async def expand_link(field: str, schema) -> None:
+            ids = {getattr(circuit, field).ref.id for circuit in circuits if isinstance(getattr(circuit, field), Link)}
+            if len(ids) == 0:
+                return
+
+            await loader.load_many(schema, ids)
+            for circuit in circuits:
+                value = getattr(circuit, field)
+                if isinstance(value, Link):
+                    setattr(circuit, field, await loader.load(schema, value.ref.id))
+
+        await asyncio.gather(*[expand_link(field, CIRCUIT_EXPANDABLE[field]) for field in expand])
+
+    @staticmethod
+    async def get_circuits(
+        filters: Optional[dict] = None,
+        sort: str = "_id",
+        descending: bool = False,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        expand: Optional[list[str]] = None,
+        loader: Optional[DocumentLoader] = None,
+    ) -> CustomResponse:
+        """
+        Method responsible for getting a page of circuits matching the filters, ordered by sort and id
+        """
+
+        logger.info("Facade: Get circuits page: filters=%s sort=%s cursor=%s limit=%s", filters, sort, cursor, limit)
         try:
-            circuits = await CircuitsSchema.find(fetch_links=True).to_list()
-            return CustomResponse.success(message=FOUND.format(operation), data=circuits)
+            expand = set(expand or [])
+            invalid_expand = expand - set(CIRCUIT_EXPANDABLE)
+            if len(invalid_expand) > 0:
+                logger.error("Invalid expand fields: %s", invalid_expand)
+                return CustomResponse.failure(message="Invalid expand: %s" % ", ".join(sorted(invalid_expand)))
+
+            if sort not in CIRCUIT_SORTS:
+                logger.error("Invalid sort field: %s", sort)
+                return CustomResponse.failure(message="Invalid sort: %s" % sort)
+
+            query = {field: value for field, value in (filters or {}).items() if field in CIRCUIT_FILTERS and value is not None}
+            if len(query) > 0 and sort not in CIRCUIT_FILTERED_SORTS:
+                logger.error("Sort field %s used with filters %s", sort, query)
+                return CustomResponse.failure(message="Sort by %s is only available without filters" % sort)
+
+            direction = "-" if descending else "+"
+            if sort == "_id":
+                page_filter = {"_id": {"$lt" if descending else "$gt": ObjectId(cursor)}} if cursor else {}
+                order = [f"{direction}_id"]
+            else:
+                page_filter = sorted_keyset_filter(cursor, sort, descending)
+                order = [f"{direction}{sort}"] if sort in CIRCUIT_UNIQUE_SORTS else [f"{direction}{sort}", f"{direction}_id"]
+
+            circuits = await CircuitsSchema.find(query, page_filter).sort(*order).limit(limit + 1).to_list()
+            circuits, next_cursor = split_page(
+                circuits, limit, key=lambda circuit: circuit.id if sort == "_id" else encode_cursor(getattr(circuit, sort), circuit.id)
+            )
+
+            if len(expand) > 0 and len(circuits) > 0:
+                await CircuitsFacade._expand_circuits(circuits, expand, loader or DocumentLoader())
+
+            return CustomResponse.success(message=FOUND.format(operation), data={"items": circuits, "next_cursor": next_cursor})
 
         except Exception as err:
             logger.error("Error get all circuits (Exception): %s", err)
@@ -136,8 +301,187 @@ class CircuitsFacade:
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, circuit_id))
 
             await delete_circuit.delete()
+            await CircuitsService.release_bandwidth(
+                CircuitsService.circuit_endpoints(delete_circuit.__dict__), delete_circuit.bandwidth_reservation
+            )
             return CustomResponse.success(message=DELETE_SUCCESS.format(operation, delete_circuit.name), data=delete_circuit.name)
 
         except Exception as err:
             logger.error("Error delete circuit (Exception): %s", err)
             return CustomResponse.failure(message="Interno error: [CircuitFacade.delete_circuit]")
+
+    @staticmethod
+    async def get_bandwidth_headroom(limit: int) -> CustomResponse:
+        """
+        Method responsible for ranking interfaces and lags by remaining bandwidth
+        """
+
+        logger.info("Facade: Get bandwidth headroom...")
+        try:
+            headroom = await CircuitsService.get_headroom(limit=limit)
+            return CustomResponse.success(message=FOUND.format("bandwidth headroom"), data=headroom)
+
+        except Exception as err:
+            logger.error("Error get bandwidth headroom (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [CircuitFacade.get_bandwidth_headroom]")
+
+    @staticmethod
+    async def rebuild_bandwidth() -> CustomResponse:
+        """
+        Method responsible for recomputing the reserved bandwidth of interfaces and lags from the circuits
+        """
+
+        logger.info("Facade: Rebuild reserved bandwidth...")
+        try:
+            result = await CircuitsService.rebuild_bandwidth()
+            return CustomResponse.success(message="Rebuild reserved bandwidth finished", data=result)
+
+        except Exception as err:
+            logger.error("Error rebuild reserved bandwidth (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [CircuitFacade.rebuild_bandwidth]")
+
+    @staticmethod
+    async def get_impact(element_ids: list[str]) -> CustomResponse:
+        """
+        Method responsible for getting the circuits riding any of the given devices, interfaces or lags,
+        most critical first, with the elements each circuit is affected by
+        """
+
+        logger.info("Facade: Get circuits impact: %s", element_ids)
+        try:
+            elements = list({ObjectId(element_id) for element_id in element_ids})
+            impact = await CircuitsSchema.get_motor_collection().aggregate([
+                {"$match": {"element_ids": {"$in": elements}}},
+                {"$sort": {"criticality_matrix": -1, "_id": 1}},
+                {"$project": {
+                    **IMPACT_PROJECTION,
+                    "affected_by": {"$map": {
+                        "input": {"$setIntersection": ["$element_ids", elements]}, "in": {"$toString": "$$this"},
+                    }},
+                }},
+            ]).to_list(length=None)
+
+            logger.info("Facade: Get circuits impact success: %s", len(impact))
+            return CustomResponse.success(message=FOUND.format(operation), data=impact)
+
+        except Exception as err:
+            logger.error("Error get circuits impact (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [CircuitFacade.get_impact]")
+
+    @staticmethod
+    async def backfill_elements() -> CustomResponse:
+        """
+        Method responsible for filling the element ids of existing circuits
+        """
+
+        logger.info("Facade: Backfill circuit elements...")
+        try:
+            updated = await CircuitsService.backfill_elements()
+            return CustomResponse.success(message="Backfill %s elements finished" % operation, data={"updated": updated})
+
+        except Exception as err:
+            logger.error("Error backfill circuit elements (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [CircuitFacade.backfill_elements]")
+
+    @staticmethod
+    async def search_circuits(term: str, limit: int) -> CustomResponse:
+        """
+        Method responsible for searching circuits by name/designation prefix and by weighted text
+
+        Prefix matches come first, followed by text matches ranked by score
+        """
+
+        logger.info("Facade: Search circuits: %s", term)
+        try:
+            collection = CircuitsSchema.get_motor_collection()
+            prefix = "^" + re.escape(term)
+
+            async def prefix_search(field: str) -> list:
+                return await collection.aggregate([
+                    {"$match": {field: {"$regex": prefix}}},
+                    {"$sort": {field: 1}},
+                    {"$limit": limit},
+                    {"$project": {**SEARCH_PROJECTION, "score": {"$literal": None}, "match": {"$literal": field}}},
+                ]).to_list(length=None)
+
+            async def text_search() -> list:
+                return await collection.aggregate([
+                    {"$match": {"$text": {"$search": term}}},
+                    {"$sort": {"score": {"$meta": "textScore"}}},
+                    {"$limit": limit},
+                    {"$project": {**SEARCH_PROJECTION, "score": {"$meta": "textScore"}, "match": {"$literal": "text"}}},
+                ]).to_list(length=None)
+
+            found = await asyncio.gather(*[prefix_search(field) for field in PREFIX_FIELDS], text_search())
+            results: dict = {}
+            for circuits in found:
+                for circuit in circuits:
+                    results.setdefault(circuit["id"], circuit)
+
+            search = list(results.values())[:limit]
+            logger.info("Facade: Search circuits success: %s", len(search))
+            return CustomResponse.success(message=FOUND.format(operation), data=search)
+
+        except Exception as err:
+            logger.error("Error search circuits (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [CircuitFacade.search_circuits]")
+
+    @staticmethod
+    async def get_circuits_between(device_a: str, device_b: str) -> CustomResponse:
+        """
+        Method responsible for getting the circuits between two devices, in either direction, most critical first
+        """
+
+        logger.info("Facade: Get circuits between devices: %s %s", device_a, device_b)
+        try:
+            between = await CircuitsSchema.get_motor_collection().aggregate([
+                {"$match": {"device_pair": device_pair_key(ObjectId(device_a), ObjectId(device_b))}},
+                {"$sort": {"criticality_matrix": -1, "_id": 1}},
+                {"$project": IMPACT_PROJECTION},
+            ]).to_list(length=None)
+
+            logger.info("Facade: Get circuits between devices success: %s", len(between))
+            return CustomResponse.success(message=FOUND.format(operation), data=between)
+
+        except Exception as err:
+            logger.error("Error get circuits between devices (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [CircuitFacade.get_circuits_between]")
+
+    @staticmethod
+    async def get_device_pairs(limit: int) -> CustomResponse:
+        """
+        Method responsible for counting the circuits of every endpoint device pair, busiest pairs first
+        """
+
+        logger.info("Facade: Get circuit device pairs...")
+        try:
+            pairs = await CircuitsSchema.get_motor_collection().aggregate([
+                {"$match": {"device_pair": {"$ne": None}}},
+                {"$group": {"_id": "$device_pair", "circuits": {"$sum": 1}}},
+                {"$sort": {"circuits": -1, "_id": 1}},
+                {"$limit": limit},
+                {"$project": {"_id": 0, "devices": {"$split": ["$_id", ":"]}, "circuits": 1}},
+            ]).to_list(length=None)
+
+            logger.info("Facade: Get circuit device pairs success: %s", len(pairs))
+            return CustomResponse.success(message=FOUND.format(operation), data=pairs)
+
+        except Exception as err:
+            logger.error("Error get circuit device pairs (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [CircuitFacade.get_device_pairs]")
+
+    @staticmethod
+    async def seed_vc_id_pools() -> CustomResponse:
+        """
+        Method responsible for moving every vc_id pool counter past the vc_ids already in use
+        """
+
+        logger.info("Facade: Seed vc_id pools...")
+        try:
+            seeded = await CircuitsService.seed_vc_id_pools()
+            logger.info("Facade: Seed vc_id pools success: %s", seeded)
+            return CustomResponse.success(message="Seed vc_id pools finished", data=seeded)
+
+        except Exception as err:
+            logger.error("Error seed vc_id pools (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [CircuitFacade.seed_vc_id_pools]")
@@ -3,11 +3,15 @@ Module responsible for circuits Resource
 """
 
 
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
 from fastapi.responses import JSONResponse
 
 from src.app.core.ipam.circuits.models import CircuitsBase
 from src.app.ipam.circuits.facade import CircuitsFacade
+from src.app.shared.loader import DocumentLoader, get_document_loader
+from src.app.shared.pagination import DEFAULT_LIMIT, MAX_LIMIT, NEXT_CURSOR_HEADER
 from src.app.shared.serialize import SerializationFilter
 # from src.dependencies import authorization
 from src.logging import get_logger
@@ -57,21 +61,180 @@ async def put_circuit(circuit_id: str, circuit: CircuitsBase):
 
 
 @router.get("/circuits")
-async def get_circuits():
+async def get_circuits(
+    project: Optional[str] = None,
+    owner_group: Optional[str] = None,
+    type: Optional[str] = None, # pylint: disable=redefined-builtin
+    status_: Optional[bool] = Query(default=None, alias="status"),
+    criticality_matrix: Optional[int] = None,
+    alarm: Optional[bool] = None,
+    sort: str = "_id",
+    descending: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    expand: list[str] = Query(default=[]),
+    loader: DocumentLoader = Depends(get_document_loader),
+):
     """
-    Method responsible for listing all circuits
+    Method responsible for listing a page of circuits
+
+    Links are only resolved for the fields listed in expand; the next page cursor is
+    returned in the X-Next-Cursor header
     """
-    logger.info("Resource: Starting circuits get all")
+    logger.info("Resource: Starting circuits get page")
 
-    get_circuit = await CircuitsFacade.get_circuits()
+    filters = {
+        "project": project, "owner_group": owner_group, "type": type, "status": status_,
+        "criticality_matrix": criticality_matrix, "alarm": alarm,
+    }
+    get_circuit = await CircuitsFacade.get_circuits(
+        filters=filters, sort=sort, descending=descending, cursor=cursor, limit=limit, expand=expand, loader=loader
+    )
     if get_circuit["status"] == "success":
         logger.info("Circuits were listed successfully. FIM!")
-        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(get_circuit["data"]) )
+        response = JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content=SerializationFilter.response(get_circuit["data"]["items"], keep_refs=True)
+        )
+        if get_circuit["data"]["next_cursor"] is not None:
+            response.headers[NEXT_CURSOR_HEADER] = get_circuit["data"]["next_cursor"]
+        return response
 
     logger.error("Circuits were not listed. FIM!")
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_circuit["message"] )
 
 
+@router.get("/circuits/headroom")
+async def get_bandwidth_headroom(limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT)):
+    """
+    Method responsible for ranking interfaces and lags by remaining bandwidth, lowest first
+    """
+    logger.info("Resource: Starting bandwidth headroom get")
+
+    get_headroom = await CircuitsFacade.get_bandwidth_headroom(limit=limit)
+    if get_headroom["status"] == "success":
+        logger.info("Bandwidth headroom was listed successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=get_headroom["data"])
+
+    logger.error("Bandwidth headroom was not listed. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_headroom["message"] )
+
+
+@router.get("/circuits/search")
+async def get_search_circuits(
+    q: str = Query(min_length=1),
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+):
+    """
+    Method responsible for searching circuits by name/designation prefix or text in name, alias, designation and description
+    """
+    logger.info("Resource: Starting circuits search: %s", q)
+
+    search_circuits = await CircuitsFacade.search_circuits(term=q, limit=limit)
+    if search_circuits["status"] == "success":
+        logger.info("Circuits search successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=search_circuits["data"])
+
+    logger.error("Circuits search error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=search_circuits["message"] )
+
+
+@router.get("/circuits/between")
+async def get_circuits_between(device_a: str, device_b: str):
+    """
+    Method responsible for listing the circuits between two devices, in either direction
+    """
+    logger.info("Resource: Starting circuits between devices get: %s %s", device_a, device_b)
+
+    get_between = await CircuitsFacade.get_circuits_between(device_a=device_a, device_b=device_b)
+    if get_between["status"] == "success":
+        logger.info("Circuits between devices was listed successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=get_between["data"])
+
+    logger.error("Circuits between devices was not listed. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_between["message"] )
+
+
+@router.get("/circuits/device_pairs")
+async def get_circuit_device_pairs(limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT)):
+    """
+    Method responsible for listing the endpoint device pairs with their circuit count
+    """
+    logger.info("Resource: Starting circuit device pairs get")
+
+    get_pairs = await CircuitsFacade.get_device_pairs(limit=limit)
+    if get_pairs["status"] == "success":
+        logger.info("Circuit device pairs was listed successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=get_pairs["data"])
+
+    logger.error("Circuit device pairs was not listed. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_pairs["message"] )
+
+
+@router.get("/circuits/impact")
+async def get_circuits_impact(element: list[str] = Query(min_length=1)):
+    """
+    Method responsible for listing the circuits riding any of the given devices, interfaces or lags
+    """
+    logger.info("Resource: Starting circuits impact get: %s", element)
+
+    get_impact = await CircuitsFacade.get_impact(element_ids=element)
+    if get_impact["status"] == "success":
+        logger.info("Circuits impact was listed successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=get_impact["data"])
+
+    logger.error("Circuits impact was not listed. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_impact["message"] )
+
+
+@router.post("/circuits/impact/backfill")
+async def post_backfill_circuits_impact():
+    """
+    Method responsible for backfilling the element ids used by the impact analysis
+    """
+    logger.info("Resource: Starting circuits impact backfill")
+
+    backfill_elements = await CircuitsFacade.backfill_elements()
+    if backfill_elements["status"] == "success":
+        logger.info("Circuits impact backfill successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=backfill_elements["data"])
+
+    logger.error("Circuits impact backfill error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=backfill_elements["message"] )
+
+
+@router.post("/circuits/vc_id/seed")
+async def post_seed_vc_id_pools():
+    """
+    Method responsible for moving the vc_id pool counters past the vc_ids already in use
+    """
+    logger.info("Resource: Starting vc_id pools seed")
+
+    seed_pools = await CircuitsFacade.seed_vc_id_pools()
+    if seed_pools["status"] == "success":
+        logger.info("vc_id pools seed successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=seed_pools["data"])
+
+    logger.error("vc_id pools seed error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=seed_pools["message"] )
+
+
+@router.post("/circuits/bandwidth/rebuild")
+async def post_rebuild_bandwidth():
+    """
+    Method responsible for recomputing the reserved bandwidth of interfaces and lags
+    """
+    logger.info("Resource: Starting reserved bandwidth rebuild")
+
+    rebuild_bandwidth = await CircuitsFacade.rebuild_bandwidth()
+    if rebuild_bandwidth["status"] == "success":
+        logger.info("Reserved bandwidth rebuild successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=rebuild_bandwidth["data"])
+
+    logger.error("Reserved bandwidth rebuild error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=rebuild_bandwidth["message"] )
+
+
 @router.get("/circuits/{circuit_id}")
 async def get_circuit(circuit_id: str):
     """
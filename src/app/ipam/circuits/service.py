@@ -2,18 +2,24 @@
 module for circuits service
 """
 
+import asyncio
 from datetime import datetime
-from typing import Type
+from typing import Optional, Type
 
 from bson import ObjectId
+from dynaconf import settings
+from pymongo import ReturnDocument, UpdateOne
 from pymongo.errors import DuplicateKeyError
 
 
 
 from src.app.core.ipam.circuits.models import CircuitsBase
-from src.app.core.ipam.circuits.schema import CircuitsSchema
+from src.app.core.ipam.circuits.schema import CircuitsSchema, circuit_element_ids, device_pair_key
 from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
 from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
+from src.app.core.ipam.tunnel_traffic_policies.schema import TunnelTrafficPoliciesSchema
+from src.app.core.ipam.vc_id_pools.schema import VcIdPoolSchema
+from src.app.shared.references import link_id
 from src.app.shared.messages import (ALREADY_EXISTS, CREATE_SUCCESS,
                                      DELETE_SUCCESS, FOUND, NOT_FOUND,
                                      UPDATE_SUCCESS)
@@ -25,6 +31,20 @@ logger = get_logger(__name__)
 openation = "interface circuit"
 
 INTERFACE_LINKED: str = "To create a new circuit it is necessary to have interfaces or lag linked."
+SAME_EQUIPMENT: str = "It is not possible to create circuits on the same equipment."
+VC_ID_MAX_RETRIES: int = 5
+
+# interface and lag speed is expressed in Gbps while bandwidth_reservation is in Mbps
+SPEED_TO_RESERVATION: int = 1000
+ENDPOINT_SCHEMAS: dict = {
+    "interface_src": InterfaceSingleSchema,
+    "interface_dst": InterfaceSingleSchema,
+    "lag_src": InterfaceLagSchema,
+    "lag_dst": InterfaceLagSchema,
+}
+REFERENCE_SCHEMAS: dict = {**ENDPOINT_SCHEMAS, "bind_policy": TunnelTrafficPoliciesSchema}
+CAPACITY = {"$multiply": [{"$ifNull": ["$speed", 0]}, SPEED_TO_RESERVATION]}
+RESERVED = {"$ifNull": ["$bandwidth_reserved", 0]}
 
 class CircuitsService:
     """
@@ -32,56 +52,399 @@ class CircuitsService:
     """
 
     @staticmethod
-    async def validate_interface_circuit(circuit: CircuitsBase) -> CustomResponse:
+    async def allocate_vc_id(pool: str) -> Optional[int]:
         """
-        Method responsible for validating circuit
+        Method responsible for handing out the next vc_id of a configured pool
+
+        The pool counter is incremented with one atomic find_one_and_update, so concurrent workers
+        never receive the same value. Returns None when the pool is unknown or exhausted.
         """
-        logger.info("Service: Validating circuit...")
-        if (circuit.interface_dst is None and circuit.lag_dst is None) or (circuit.interface_src is None and circuit.lag_src is None):
-            return CustomResponse.failure(message=INTERFACE_LINKED)
+        bounds = settings.get("VC_ID_POOLS", {}).get(pool)
+        if bounds is None:
+            logger.error("Service: vc_id pool %s is not configured", pool)
+            return None
+
+        start, end = int(bounds[0]), int(bounds[1])
+        last = {"$max": [{"$ifNull": ["$last", start - 1]}, start - 1]}
+        for _ in range(VC_ID_MAX_RETRIES):
+            try:
+                allocate = await VcIdPoolSchema.get_motor_collection().find_one_and_update(
+                    {"name": pool},
+                    [{"$set": {"name": pool, "start": start, "end": end, "last": {"$add": [last, 1]}}}],
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                break
+
+            except DuplicateKeyError:
+                logger.info("Service: vc_id pool %s created concurrently, retrying", pool)
+        else:
+            return None
+
+        if allocate["last"] > end:
+            logger.error("Service: vc_id pool %s exhausted", pool)
+            return None
+
+        logger.info("Service: Allocated vc_id %s from pool %s", allocate["last"], pool)
+        return allocate["last"]
+
+    @staticmethod
+    async def seed_vc_id_pool(pool: str) -> Optional[int]:
+        """
+        Method responsible for moving a pool counter past the vc_ids already used right after it
+
+        vc_ids assigned by hand are otherwise handed out again by the counter. The vc_id index is
+        walked from the counter and only the contiguous run of used values is skipped, so a single
+        outlier far in the range does not exhaust the pool. Returns the new counter, or None when the
+        pool is unknown or the next value is free.
+        """
+        bounds = settings.get("VC_ID_POOLS", {}).get(pool)
+        if bounds is None:
+            logger.error("Service: vc_id pool %s is not configured", pool)
+            return None
+
+        start, end = int(bounds[0]), int(bounds[1])
+        find_pool = await VcIdPoolSchema.get_motor_collection().find_one({"name": pool}, projection={"last": 1})
+        last = max((find_pool or {}).get("last", start - 1), start - 1)
+
+        used = CircuitsSchema.get_motor_collection().find(
+            {"vc_id": {"$gt": last, "$lte": end}}, projection={"_id": 0, "vc_id": 1}, sort=[("vc_id", 1)]
+        )
+        seed = last
+        async for circuit in used:
+            if circuit["vc_id"] > seed + 1:
+                break
+            seed = circuit["vc_id"]
+
+        if seed == last:
+            return None
+
+        for _ in range(VC_ID_MAX_RETRIES):
+            try:
+                await VcIdPoolSchema.get_motor_collection().update_one(
+                    {"name": pool},
+                    {"$max": {"last": seed}, "$set": {"start": start, "end": end}},
+                    upsert=True,
+                )
+                break
+
+            except DuplicateKeyError:
+                logger.info("Service: vc_id pool %s created concurrently, retrying", pool)
+        else:
+            logger.error("Service: vc_id pool %s not seeded after %s retries", pool, VC_ID_MAX_RETRIES)
+            return None
+
+        logger.info("Service: Seeded vc_id pool %s to %s", pool, seed)
+        return seed
+
+    @staticmethod
+    async def seed_vc_id_pools() -> dict:
+        """
+        Method responsible for seeding every configured vc_id pool from the circuits in use
+        """
+        pools = list(settings.get("VC_ID_POOLS", {}))
+        seeded = await asyncio.gather(*[CircuitsService.seed_vc_id_pool(pool) for pool in pools])
+        return dict(zip(pools, seeded))
+
+    @staticmethod
+    def circuit_endpoints(values: dict) -> list[tuple]:
+        """
+        Method responsible for listing the (schema, id) of the interfaces and lags a circuit uses
+        """
+        return [
+            (schema, link_id(values.get(field))) for field, schema in ENDPOINT_SCHEMAS.items()
+            if values.get(field) is not None
+        ]
 
-        if (circuit.interface_dst is not None and circuit.lag_dst is not None) or (circuit.interface_src is not None and circuit.lag_src is not None):
-            return CustomResponse.failure(message=INTERFACE_LINKED)
+    @staticmethod
+    async def release_bandwidth(endpoints: list[tuple], amount: Optional[int]) -> None:
+        """
+        Method responsible for returning reserved bandwidth to the interfaces and lags of a circuit
+        """
+        if not amount:
+            return
 
-        logger.info("Service: Validating circuit, step 1: ok.")
+        for schema, endpoint_id in endpoints:
+            await schema.get_motor_collection().update_one({"_id": endpoint_id}, {"$inc": {"bandwidth_reserved": -amount}})
 
-        if circuit.interface_src:
-            logger.info("Service: Validating circuit, select interface from...")
-            find_interface_src = await InterfaceSingleSchema.get(circuit.interface_src, fetch_links=True)
-            if find_interface_src is None:
-                return CustomResponse.failure(message=NOT_FOUND.format(openation, circuit.interface_src))
+    @staticmethod
+    async def reserve_bandwidth(endpoints: list[tuple], amount: Optional[int]) -> Optional[str]:
+        """
+        Method responsible for reserving bandwidth on the interfaces and lags of a circuit
 
-            device_id_from = str(find_interface_src.device.id)
-        elif circuit.lag_src:
-            logger.info("Service: Validating circuit, select lag from...")
-            find_interface_src = await InterfaceLagSchema.get(circuit.lag_src, fetch_links=True)
-            if find_interface_src is None:
-                return CustomResponse.failure(message=NOT_FOUND.format(openation, circuit.lag_src))
+        Each endpoint is admitted and incremented by one conditional update, so the check costs one
+        document operation and concurrent reservations cannot overbook a link. Returns the id of the
+        first endpoint without enough capacity, after releasing what was already reserved.
+        """
+        return await CircuitsService.move_bandwidth([], 0, endpoints, amount)
 
-            device_id_from = str(find_interface_src.device.id)
+    @staticmethod
+    def _bandwidth_deltas(old_endpoints: list[tuple], old_amount: Optional[int], new_endpoints: list[tuple], new_amount: Optional[int]) -> dict:
+        """
+        Method responsible for the per endpoint change of reserved bandwidth when a circuit moves
+        """
+        deltas: dict = {}
+        for endpoint in old_endpoints:
+            deltas[endpoint] = deltas.get(endpoint, 0) - (old_amount or 0)
+        for endpoint in new_endpoints:
+            deltas[endpoint] = deltas.get(endpoint, 0) + (new_amount or 0)
 
-        logger.info("Service: Validating circuit, step 2: ok.")
+        return {endpoint: delta for endpoint, delta in deltas.items() if delta != 0}
 
-        if circuit.interface_dst:
-            logger.info("Service: Validating circuit, select interface to...")
-            find_interface_dst = await InterfaceSingleSchema.get(circuit.interface_dst, fetch_links=True)
-            if find_interface_dst is None:
-                return CustomResponse.failure(message=NOT_FOUND.format(openation, circuit.interface_dst))
+    @staticmethod
+    async def move_bandwidth(
+        old_endpoints: list[tuple], old_amount: Optional[int], new_endpoints: list[tuple], new_amount: Optional[int]
+    ) -> Optional[str]:
+        """
+        Method responsible for moving the reservation of a circuit to new endpoints or a new amount
+
+        Increases are admitted first by conditional updates and the freed bandwidth is only released
+        once all of them succeeded, so capacity is never handed out twice. Returns the id of the first
+        endpoint without enough capacity, after undoing the increases already made.
+        """
+        deltas = CircuitsService._bandwidth_deltas(old_endpoints, old_amount, new_endpoints, new_amount)
+
+        reserved: list = []
+        for (schema, endpoint_id), delta in deltas.items():
+            if delta < 0:
+                continue
+            reserve = await schema.get_motor_collection().update_one(
+                {"_id": endpoint_id, "$expr": {"$lte": [{"$add": [RESERVED, delta]}, CAPACITY]}},
+                {"$inc": {"bandwidth_reserved": delta}},
+            )
+            if reserve.modified_count == 0:
+                logger.error("Service: Not enough bandwidth on %s for %s", endpoint_id, delta)
+                for reserved_schema, reserved_id, reserved_delta in reserved:
+                    await reserved_schema.get_motor_collection().update_one(
+                        {"_id": reserved_id}, {"$inc": {"bandwidth_reserved": -reserved_delta}}
+                    )
+                return str(endpoint_id)
+
+            reserved.append((schema, endpoint_id, delta))
+
+        for (schema, endpoint_id), delta in deltas.items():
+            if delta < 0:
+                await schema.get_motor_collection().update_one({"_id": endpoint_id}, {"$inc": {"bandwidth_reserved": delta}})
 
-            device_id_to = str(find_interface_dst.device.id)
+        return None
 
-        elif circuit.lag_dst:
-            logger.info("Service: Validating circuit, select lag to...")
-            find_interface_dst = await InterfaceLagSchema.get(circuit.lag_dst, fetch_links=True)
-            if find_interface_dst is None:
-                return CustomResponse.failure(message=NOT_FOUND.format(openation, circuit.lag_dst))
+    @staticmethod
+    async def rebuild_bandwidth() -> dict:
+        """
+        Method responsible for recomputing the reserved bandwidth of every interface and lag from the circuits
+        """
+        logger.info("Service: Rebuilding reserved bandwidth...")
+        totals: dict = {}
+        async for circuit in CircuitsSchema.get_motor_collection().find(
+            {"bandwidth_reservation": {"$gt": 0}}, projection={"bandwidth_reservation": 1, **{field: 1 for field in ENDPOINT_SCHEMAS}}
+        ):
+            for schema, endpoint_id in CircuitsService.circuit_endpoints(circuit):
+                key = (schema, endpoint_id)
+                totals[key] = totals.get(key, 0) + circuit["bandwidth_reservation"]
 
-            device_id_to = str(find_interface_dst.device.id)
+        result: dict = {}
+        for schema in (InterfaceSingleSchema, InterfaceLagSchema):
+            collection = schema.get_motor_collection()
+            await collection.update_many({"bandwidth_reserved": {"$ne": 0}}, {"$set": {"bandwidth_reserved": 0}})
+            operations = [
+                UpdateOne({"_id": endpoint_id}, {"$set": {"bandwidth_reserved": total}})
+                for (endpoint_schema, endpoint_id), total in totals.items() if endpoint_schema is schema
+            ]
+            if len(operations) > 0:
+                await collection.bulk_write(operations, ordered=False)
+            result[schema.get_collection_name()] = len(operations)
 
-        logger.info("Service: Validating circuit, step 3: ok.")
+        logger.info("Service: Rebuilding reserved bandwidth success: %s", result)
+        return result
 
-        if device_id_from == device_id_to:
-            return CustomResponse.failure(message="It is not possible to create circuits on the same equipment.")
+    @staticmethod
+    async def get_headroom(limit: int) -> list[dict]:
+        """
+        Method responsible for ranking interfaces and lags by remaining capacity, lowest first
+        """
+        project = {
+            "_id": 0, "id": {"$toString": "$_id"}, "name": 1, "device": {"$toString": "$device_id"}, "speed": 1,
+            "capacity": CAPACITY, "reserved": RESERVED, "headroom": {"$subtract": [CAPACITY, RESERVED]},
+        }
+        return await InterfaceSingleSchema.get_motor_collection().aggregate([
+            {"$match": {"speed": {"$gt": 0}}},
+            {"$project": {**project, "kind": {"$literal": "interface"}}},
+            {"$unionWith": {
+                "coll": InterfaceLagSchema.get_collection_name(),
+                "pipeline": [{"$match": {"speed": {"$gt": 0}}}, {"$project": {**project, "kind": {"$literal": "lag"}}}],
+            }},
+            {"$sort": {"headroom": 1, "id": 1}},
+            {"$limit": limit},
+        ]).to_list(length=None)
 
+    @staticmethod
+    async def _endpoint_devices(endpoints: list[tuple], session=None) -> dict:
+        """
+        Method responsible for reading the stored device id of interfaces and lags, one $in query per collection
+        """
+        grouped: dict = {}
+        for schema, endpoint_id in endpoints:
+            grouped.setdefault(schema, set()).add(endpoint_id)
+
+        async def read(schema, ids: set) -> list:
+            return await schema.get_motor_collection().find(
+                {"_id": {"$in": list(ids)}}, projection={"device_id": 1}, session=session
+            ).to_list(length=None)
+
+        # sequential reads, a session cannot run concurrent operations
+        documents = [await read(schema, ids) for schema, ids in grouped.items()]
+        return {document["_id"]: document.get("device_id") for found in documents for document in found}
+
+    @staticmethod
+    def _side(values: dict, interface_field: str, lag_field: str) -> Optional[tuple]:
+        """
+        Method responsible for picking the interface or lag endpoint of one side of a circuit
+        """
+        if values.get(interface_field) is not None:
+            return InterfaceSingleSchema, link_id(values.get(interface_field))
+        if values.get(lag_field) is not None:
+            return InterfaceLagSchema, link_id(values.get(lag_field))
+        return None
+
+    @staticmethod
+    async def resolve_devices(circuit: CircuitsSchema) -> None:
+        """
+        Method responsible for setting the source and destination device ids of a circuit from its endpoints
+        """
+        src = CircuitsService._side(circuit.__dict__, "interface_src", "lag_src")
+        dst = CircuitsService._side(circuit.__dict__, "interface_dst", "lag_dst")
+        devices = await CircuitsService._endpoint_devices([side for side in (src, dst) if side is not None])
+        circuit.device_src_id = devices.get(src[1]) if src else None
+        circuit.device_dst_id = devices.get(dst[1]) if dst else None
+
+    @staticmethod
+    async def _refresh_elements(query: dict, session=None) -> int:
+        """
+        Method responsible for recomputing the device ids, element ids and device pair of the circuits matching query
+        """
+        collection = CircuitsSchema.get_motor_collection()
+        circuits = await collection.find(
+            query, projection={field: 1 for field in ENDPOINT_SCHEMAS}, session=session
+        ).to_list(length=None)
+
+        sides = [
+            (CircuitsService._side(circuit, "interface_src", "lag_src"), CircuitsService._side(circuit, "interface_dst", "lag_dst"))
+            for circuit in circuits
+        ]
+        devices = await CircuitsService._endpoint_devices(
+            [side for pair in sides for side in pair if side is not None], session=session
+        )
+
+        operations: list = []
+        for circuit, (src, dst) in zip(circuits, sides):
+            values = {
+                **circuit,
+                "device_src_id": devices.get(src[1]) if src else None,
+                "device_dst_id": devices.get(dst[1]) if dst else None,
+            }
+            operations.append(UpdateOne({"_id": circuit["_id"]}, {"$set": {
+                "device_src_id": values["device_src_id"],
+                "device_dst_id": values["device_dst_id"],
+                "element_ids": circuit_element_ids(values),
+                "device_pair": device_pair_key(values["device_src_id"], values["device_dst_id"]),
+            }}))
+
+        if len(operations) == 0:
+            return 0
+
+        return (await collection.bulk_write(operations, ordered=False, session=session)).modified_count
+
+    @staticmethod
+    async def backfill_elements() -> int:
+        """
+        Method responsible for filling the device ids, element ids and device pair of existing circuits
+        """
+        logger.info("Service: Backfill circuit elements...")
+        updated = await CircuitsService._refresh_elements(
+            {"$or": [{"element_ids": {"$exists": False}}, {"device_pair": {"$exists": False}}]}
+        )
+        logger.info("Service: Backfill circuit elements success: %s", updated)
+        return updated
+
+    @staticmethod
+    async def refresh_elements(element_ids: list, session=None) -> int:
+        """
+        Method responsible for refreshing the circuits riding any of the given elements after their device changed
+        """
+        if len(element_ids) == 0:
+            return 0
+
+        logger.info("Service: Refresh circuit elements: %s", element_ids)
+        updated = await CircuitsService._refresh_elements({"element_ids": {"$in": list(element_ids)}}, session=session)
+        logger.info("Service: Refresh circuit elements success: %s", updated)
+        return updated
+
+    @staticmethod
+    async def validate_circuits(circuits: list[CircuitsBase]) -> list[Optional[str]]:
+        """
+        Method responsible for validating a batch of circuits, returning one error message (or None) per circuit
+
+        Referenced interfaces, lags and policies of the whole batch are checked with one concurrent
+        $in lookup per collection
+        """
+        logger.info("Service: Validating %s circuits...", len(circuits))
+        errors: list = [None] * len(circuits)
+        references: dict = {schema: set() for schema in REFERENCE_SCHEMAS.values()}
+
+        for index, circuit in enumerate(circuits):
+            if (circuit.interface_dst is None) == (circuit.lag_dst is None) or (circuit.interface_src is None) == (circuit.lag_src is None):
+                errors[index] = INTERFACE_LINKED
+                continue
+
+            for field, schema in REFERENCE_SCHEMAS.items():
+                value = getattr(circuit, field)
+                if value is None:
+                    continue
+                if not ObjectId.is_valid(value):
+                    errors[index] = NOT_FOUND.format(openation, value)
+                    break
+                references[schema].add(ObjectId(value))
+
+        async def read(schema, ids: set) -> list:
+            return await schema.get_motor_collection().find(
+                {"_id": {"$in": list(ids)}}, projection={"device_id": 1}
+            ).to_list(length=None)
+
+        schemas = [schema for schema, ids in references.items() if len(ids) > 0]
+        found = await asyncio.gather(*[read(schema, references[schema]) for schema in schemas])
+        documents = {
+            schema: {document["_id"]: document.get("device_id") for document in documents}
+            for schema, documents in zip(schemas, found)
+        }
+
+        for index, circuit in enumerate(circuits):
+            if errors[index] is not None:
+                continue
+
+            for field, schema in REFERENCE_SCHEMAS.items():
+                value = getattr(circuit, field)
+                if value is not None and ObjectId(value) not in documents.get(schema, {}):
+                    errors[index] = NOT_FOUND.format(openation, value)
+                    break
+            else:
+                src = circuit.interface_src or circuit.lag_src
+                dst = circuit.interface_dst or circuit.lag_dst
+                device_from = documents[REFERENCE_SCHEMAS["interface_src" if circuit.interface_src else "lag_src"]][ObjectId(src)]
+                device_to = documents[REFERENCE_SCHEMAS["interface_dst" if circuit.interface_dst else "lag_dst"]][ObjectId(dst)]
+                if device_from is not None and device_from == device_to:
+                    errors[index] = SAME_EQUIPMENT
+
+        logger.info("Service: Validating circuits, invalid: %s", sum(error is not None for error in errors))
+        return errors
+
+    @staticmethod
+    async def validate_interface_circuit(circuit: CircuitsBase) -> CustomResponse:
+        """
+        Method responsible for validating circuit
+        """
+        logger.info("Service: Validating circuit...")
+        error = (await CircuitsService.validate_circuits([circuit]))[0]
+        if error is not None:
+            return CustomResponse.failure(message=error)
 
         return CustomResponse.success(message="Circuit validated successfully")
@@ -1,20 +1,30 @@
 """
 Module responsible for the ipam  chassis olt facade
 """
+import asyncio
 from datetime import datetime
-from typing import Type
+from typing import Optional, Type
 
 from bson import ObjectId
 from pymongo.errors import DuplicateKeyError
+from beanie import Link
 from beanie.operators import Set
-from beanie.odm.fields import  DeleteRules
 
 
 from src.app.core.ipam.devices.models import DevicesBase
 from src.app.core.ipam.devices.schema import DevicesSchema
 from src.app.core.facilities.locations.schema import LocationsSchema
 from src.app.core.facilities.vendors.schema import VendorSchema
+from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
+from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
+from src.app.core.ipam.paths.schema import PathsSchema
+from src.app.ipam.devices.service import DevicesService
+from src.app.shared.aggregation import count_by, ref_id
+from src.app.shared.loader import DocumentLoader
 from src.app.shared.messages import ALREADY_EXISTS, FOUND, NOT_FOUND, UPDATE_SUCCESS, CREATE_SUCCESS, DELETE_SUCCESS
+from src.app.shared.network import normalize_ipaddr
+from src.app.shared.references import link_id
+from src.app.shared.pagination import DEFAULT_LIMIT, keyset_filter, split_page
 from src.app.shared.response import CustomResponse
 from src.logging import get_logger
 
@@ -25,6 +35,13 @@ logger = get_logger(__name__)
 operation = "devices"
 operation = "Ip Address"
 
+DEVICE_EXPANDABLE = ("vendor", "location", "physical_interface", "path")
+DEVICE_REFERENCES = (("location", LocationsSchema), ("vendor", VendorSchema))
+DETAIL_INTERFACE_PROJECTION = {
+    "_id": 0, "id": {"$toString": "$_id"}, "name": 1, "alias": 1, "description": 1, "status": 1,
+    "mode": 1, "speed": 1, "mtu": 1, "ipaddr": 1, "operation_type": 1, "alarm": 1,
+}
+
 class DevicesFacade:
     """
     Class responsible for the facade of the devices
@@ -39,11 +56,11 @@ class DevicesFacade:
         logger.info("Facade: Creating device...")
         try:
             device.created_at = datetime.now().isoformat()
-            ipaddr = device.ipaddr.split("/")
-            check_ipaddr = await DevicesSchema.find().to_list()
-            for ip in check_ipaddr:
-                if ipaddr[0] == ip.ipaddr.split("/")[0]:
-                    return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, ip.ipaddr.split("/")[0]))
+            mgmt_ipaddr = normalize_ipaddr(device.ipaddr)
+            if mgmt_ipaddr is not None:
+                check_ipaddr = await DevicesSchema.find_one(DevicesSchema.mgmt_ipaddr == mgmt_ipaddr)
+                if check_ipaddr is not None:
+                    return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, mgmt_ipaddr))
 
             create_device = await DevicesSchema(**device.model_dump(exclude_unset=True)).insert()
 
@@ -60,41 +77,36 @@ class DevicesFacade:
             return CustomResponse.failure(message="Interno error: [DevicesFacade.create_device]")
 
     @staticmethod
-    async def update_device(device_id: str, device: Type[DevicesBase]) -> CustomResponse:
+    async def update_device(device_id: str, device: Type[DevicesBase], loader: Optional[DocumentLoader] = None) -> CustomResponse:
         """
         Method responsible for update a device
         """
 
         logger.info("Facade: Update device...")
         try:
-            find_device = await DevicesSchema.find_one(DevicesSchema.id == ObjectId(device_id), fetch_links=True)
+            loader = loader or DocumentLoader()
+            find_device = await DevicesSchema.get(ObjectId(device_id))
             if find_device is None:
                 logger.error("Device %s not found! [update]", device_id)
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, device_id))
 
-            logger.info("Facade: find device success [update]: %s", find_device.dict())
-            for field, value in device.model_dump(exclude_unset=True).items():
-
-                if field == "location":
-                    logger.info("select location update (update_device)....")
+            logger.info("Facade: find device success [update]: %s", find_device.id)
+            changes = device.model_dump(exclude_unset=True)
 
-                    find_location = await LocationsSchema.get(ObjectId(value))
-                    if find_location is None:
-                        return CustomResponse.failure(message=NOT_FOUND.format("location", value))
+            references = [(field, schema) for field, schema in DEVICE_REFERENCES if changes.get(field)]
+            logger.info("select references update (update_device): %s", [field for field, _ in references])
+            resolved = await asyncio.gather(*[loader.load(schema, changes[field]) for field, schema in references])
 
-                    setattr(find_device, field, find_location)
-                    logger.info("Location update success (update_device): %s", find_device)
-                    continue
+            for (field, _), document in zip(references, resolved):
+                if document is None:
+                    return CustomResponse.failure(message=NOT_FOUND.format(field, changes[field]))
 
-                if field == "vendor":
-                    logger.info("select vendor update (update_device)....")
+                setattr(find_device, field, document)
 
-                    find_vendor = await VendorSchema.get(ObjectId(value))
-                    if find_vendor is None:
-                        return CustomResponse.failure(message=NOT_FOUND.format("vendor", value))
-
-                    setattr(find_device, field, find_vendor)
-                    logger.info("Vendor update success (update_device): %s", find_device)
+            for field, value in changes.items():
+                if field in dict(DEVICE_REFERENCES):
+                    if not value:
+                        setattr(find_device, field, None)
                     continue
 
                 setattr(find_device, field, value)
@@ -113,19 +125,101 @@ class DevicesFacade:
         #     return CustomResponse.failure(message="Interno error: [DevicesFacade.update_device]")
 
     @staticmethod
-    async def get_devices() -> CustomResponse:
+    async def _expand_devices(devices: list, expand: set, loader: DocumentLoader) -> None:
         """
-        Method responsible for getting all devices
+        Method responsible for resolving the requested links of a page of devices, one query per link
         """
-        logger.info("Getting all devices...")
-        get_devices = await DevicesSchema.find(fetch_links=True, nesting_depth=2).to_list()
+        device_ids = [device.id for device in devices]
+
+        async def expand_link(field: str, schema) -> None:
+            ids = {getattr(device, field).ref.id for device in devices if isinstance(getattr(device, field), Link)}
+            if len(ids) == 0:
+                return
+
+            await loader.load_many(schema, ids)
+            for device in devices:
+                value = getattr(device, field)
+                if isinstance(value, Link):
+                    setattr(device, field, await loader.load(schema, value.ref.id))
+
+        async def expand_back_link(field: str, schema, original_field: str) -> None:
+            grouped: dict = {device_id: [] for device_id in device_ids}
+            documents = await schema.find({original_field: {"$in": device_ids}}).to_list()
+            for document in documents:
+                grouped[link_id(getattr(document, original_field.split(".")[0]))].append(document)
+
+            for device in devices:
+                setattr(device, field, grouped[device.id])
+
+        tasks = []
+        if "vendor" in expand:
+            tasks.append(expand_link("vendor", VendorSchema))
+        if "location" in expand:
+            tasks.append(expand_link("location", LocationsSchema))
+        if "physical_interface" in expand:
+            tasks.append(expand_back_link("physical_interface", InterfaceSingleSchema, "device_id"))
+        if "path" in expand:
+            tasks.append(expand_back_link("path", PathsSchema, "step_1.$id"))
+
+        await asyncio.gather(*tasks)
+
+    @staticmethod
+    async def get_devices(
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        expand: Optional[list[str]] = None,
+        loader: Optional[DocumentLoader] = None,
+    ) -> CustomResponse:
+        """
+        Method responsible for getting a page of devices ordered by id
+        """
+        logger.info("Getting devices page: cursor=%s limit=%s expand=%s", cursor, limit, expand)
+        try:
+            expand = set(expand or [])
+            invalid_expand = expand - set(DEVICE_EXPANDABLE)
+            if len(invalid_expand) > 0:
+                logger.error("Invalid expand fields: %s", invalid_expand)
+                return CustomResponse.failure(message="Invalid expand: %s" % ", ".join(sorted(invalid_expand)))
 
-        # if len(get_devices) == 0:
-        #     logger.error("Devices not found!")
-        #     return CustomResponse.failure(message=NOT_FOUND.format(operation, "devices"))
+            get_devices = await DevicesSchema.find(keyset_filter(cursor)).sort("+_id").limit(limit + 1).to_list()
+            get_devices, next_cursor = split_page(get_devices, limit)
+
+            if len(expand) > 0 and len(get_devices) > 0:
+                await DevicesFacade._expand_devices(get_devices, expand, loader or DocumentLoader())
+
+            logger.info("Devices found successfully . FIM! - %s", len(get_devices))
+            return CustomResponse.success(message=FOUND.format(operation), data={"items": get_devices, "next_cursor": next_cursor})
+
+        except Exception as err:
+            logger.error("Error getting devices (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [DevicesFacade.get_devices]")
+
+    @staticmethod
+    async def get_inventory() -> CustomResponse:
+        """
+        Method responsible for counting devices by vendor, location, group, status and os type
+        """
+        logger.info("Getting devices inventory...")
+        try:
+            pipeline = [
+                {"$facet": {
+                    "total": [{"$count": "count"}],
+                    "vendor": count_by(ref_id("$vendor"), lookup=VendorSchema.get_collection_name()),
+                    "location": count_by(ref_id("$location"), lookup=LocationsSchema.get_collection_name()),
+                    "group": count_by("$group"),
+                    "status": count_by("$status"),
+                    "os_type": count_by("$os.type"),
+                }},
+            ]
+            inventory = (await DevicesSchema.aggregate(pipeline).to_list())[0]
+            inventory["total"] = inventory["total"][0]["count"] if len(inventory["total"]) > 0 else 0
+
+            logger.info("Devices inventory found successfully . FIM! - %s", inventory["total"])
+            return CustomResponse.success(message=FOUND.format(operation), data=inventory)
 
-        logger.info("Devices found successfully . FIM! - %s", get_devices)
-        return CustomResponse.success(message=FOUND.format(operation), data=get_devices)
+        except Exception as err:
+            logger.error("Error getting devices inventory (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [DevicesFacade.get_inventory]")
 
     @staticmethod
     async def get_device_by_id(device_id: str) -> CustomResponse:
@@ -141,23 +235,92 @@ class DevicesFacade:
         logger.info("Device found successfully . FIM! - %s", get_device.dict())
         return CustomResponse.success(message=FOUND.format(operation), data=get_device)
 
+    @staticmethod
+    async def get_device_detail(device_id: str) -> CustomResponse:
+        """
+        Method responsible for getting a device with vendor, location, interfaces, lags and paths in one aggregation
+        """
+        logger.info("Getting device detail: %s", device_id)
+        try:
+            device_oid = ObjectId(device_id)
+            pipeline = [
+                {"$match": {"_id": device_oid}},
+                {"$addFields": {"vendor_id": ref_id("$vendor"), "location_id": ref_id("$location")}},
+                {"$lookup": {
+                    "from": VendorSchema.get_collection_name(),
+                    "localField": "vendor_id",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": {"_id": 0, "id": {"$toString": "$_id"}, "name": 1, "description": 1}}],
+                    "as": "vendor",
+                }},
+                {"$lookup": {
+                    "from": LocationsSchema.get_collection_name(),
+                    "localField": "location_id",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": {"_id": 0, "id": {"$toString": "$_id"}, "name": 1, "city": 1, "state": 1, "country": 1}}],
+                    "as": "location",
+                }},
+                {"$lookup": {
+                    "from": InterfaceSingleSchema.get_collection_name(),
+                    "pipeline": [
+                        {"$match": {"device_id": device_oid}},
+                        {"$project": {**DETAIL_INTERFACE_PROJECTION, "status_op": 1, "lag": {"$toString": ref_id("$lag")}}},
+                    ],
+                    "as": "interfaces",
+                }},
+                {"$lookup": {
+                    "from": InterfaceLagSchema.get_collection_name(),
+                    "pipeline": [{"$match": {"device_id": device_oid}}, {"$project": DETAIL_INTERFACE_PROJECTION}],
+                    "as": "lags",
+                }},
+                {"$lookup": {
+                    "from": PathsSchema.get_collection_name(),
+                    "pipeline": [
+                        {"$match": {"device_ids": device_oid}},
+                        {"$project": {"_id": 0, "id": {"$toString": "$_id"}, "name": 1, "alias": 1, "description": 1}},
+                    ],
+                    "as": "paths",
+                }},
+                {"$project": {
+                    "_id": 0,
+                    "id": {"$toString": "$_id"},
+                    "name": 1, "description": 1, "ipaddr": 1, "group": 1, "model": 1, "status": 1,
+                    "monitoring": 1, "access": 1, "os": 1, "info": 1, "alarm": 1, "created_at": 1,
+                    "vendor": {"$first": "$vendor"},
+                    "location": {"$first": "$location"},
+                    "interfaces": 1,
+                    "lags": 1,
+                    "paths": 1,
+                }},
+            ]
+            get_device = await DevicesSchema.aggregate(pipeline).to_list()
+            if len(get_device) == 0:
+                logger.error("Device not found! (get_device_detail)")
+                return CustomResponse.failure(message=NOT_FOUND.format(operation, device_id))
+
+            logger.info("Device detail found successfully . FIM! - %s", device_id)
+            return CustomResponse.success(message=FOUND.format(operation), data=get_device[0])
+
+        except Exception as err:
+            logger.error("Error getting device detail (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [DevicesFacade.get_device_detail]")
+
     @staticmethod
     async def delete_device(device_id: str) -> CustomResponse:
         """
         Method responsible for deleting a device
         """
         logger.info("Facade: Deleting device: %s", device_id)
+        try:
+            delete_device = await DevicesSchema.get(ObjectId(device_id))
+            if delete_device is None:
+                logger.error("Device %s not found! (delete_device)", device_id)
+                return CustomResponse.failure(message=NOT_FOUND.format(operation, device_id))
 
-        delete_device = await DevicesSchema.get(device_id, fetch_links=True)
-        if delete_device is None:
-            logger.error("Device %s not found! (delete_device)", device_id)
-            return CustomResponse.failure(message=NOT_FOUND.format(operation, device_id))
-
-        delete_device.location = None
-        delete_device.vendor = None
-
+            logger.info("Facade: Deleting device: %s", delete_device.id)
+            result = await DevicesService.cascade_delete(delete_device.id)
+            return CustomResponse.success(message=DELETE_SUCCESS.format(operation, delete_device.name), data=result)
 
-        await delete_device.save()
-        logger.info("Facade: Deleting device: %s", delete_device.id)
-        await delete_device.delete(link_rule=DeleteRules.DELETE_LINKS)
-        return CustomResponse.success(message=DELETE_SUCCESS.format(operation, delete_device.name), data=delete_device.id)
+        except Exception as err:
+            logger.error("Error deleting device (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [DevicesFacade.delete_device]")
@@ -1,13 +1,18 @@
 """
 Module responsible for devices olt  routes
 """
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from src.app.core.ipam.devices.models import DevicesBase
 
 from src.app.ipam.devices.facade import DevicesFacade
+from src.app.ipam.devices.service import DevicesService
 
+from src.app.shared.loader import DocumentLoader, get_document_loader
+from src.app.shared.pagination import DEFAULT_LIMIT, MAX_LIMIT, NEXT_CURSOR_HEADER
 from src.app.shared.serialize import SerializationFilter
 # from src.dependencies import authorization
 from src.logging import get_logger
@@ -37,14 +42,25 @@ async def post_create_device(device: DevicesBase):
     logger.error("Device was not created. FIM!")
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=create_device["message"] )
 
+@router.post("/device/import")
+async def post_import_devices(request: Request):
+    """
+    Method responsible for importing devices from an NDJSON request body
+
+    Each line is validated against DevicesBase; the response streams one NDJSON result per line
+    """
+    logger.info("Resource: Starting devices import")
+
+    return StreamingResponse(DevicesService.import_devices(request.stream()), media_type="application/x-ndjson")
+
 @router.put("/device/{device_id}")
-async def put_device(device_id: str, device: DevicesBase):
+async def put_device(device_id: str, device: DevicesBase, loader: DocumentLoader = Depends(get_document_loader)):
     """
     Method responsible for update a device
     """
     logger.info("Resource: Starting device update: %s", device.dict())
 
-    update_device = await DevicesFacade.update_device(device_id=device_id, device=device)
+    update_device = await DevicesFacade.update_device(device_id=device_id, device=device, loader=loader)
     if update_device["status"] == "success":
         logger.info("Device was update successfully. FIM!")
         return JSONResponse(status_code=status.HTTP_201_CREATED, content=SerializationFilter.response(update_device["data"]) )
@@ -53,20 +69,49 @@ async def put_device(device_id: str, device: DevicesBase):
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=update_device["message"] )
 
 @router.get("/device")
-async def get_devices():
+async def get_devices(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    expand: list[str] = Query(default=[]),
+    loader: DocumentLoader = Depends(get_document_loader),
+):
     """
-    Method responsible for listing all devices
+    Method responsible for listing a page of devices
+
+    Links are only resolved for the fields listed in expand; the next page cursor is
+    returned in the X-Next-Cursor header
     """
-    logger.info("Resource: Starting devices get all")
+    logger.info("Resource: Starting devices get page")
 
-    get_device = await DevicesFacade.get_devices()
+    get_device = await DevicesFacade.get_devices(cursor=cursor, limit=limit, expand=expand, loader=loader)
     if get_device["status"] == "success":
         logger.info("Device was get successfully. FIM!")
-        return JSONResponse(status_code=status.HTTP_201_CREATED, content=SerializationFilter.response(get_device["data"]) )
+        response = JSONResponse(
+            status_code=status.HTTP_201_CREATED,
+            content=SerializationFilter.response(get_device["data"]["items"], keep_refs=True)
+        )
+        if get_device["data"]["next_cursor"] is not None:
+            response.headers[NEXT_CURSOR_HEADER] = get_device["data"]["next_cursor"]
+        return response
 
     logger.error("Device was not get. FIM!")
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_device["message"] )
 
+@router.get("/device/inventory")
+async def get_devices_inventory():
+    """
+    Method responsible for the devices inventory summary
+    """
+    logger.info("Resource: Starting devices inventory")
+
+    get_inventory = await DevicesFacade.get_inventory()
+    if get_inventory["status"] == "success":
+        logger.info("Devices inventory was get successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(get_inventory["data"]) )
+
+    logger.error("Devices inventory was not get. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_inventory["message"] )
+
 @router.get("/device/{device_id}")
 async def get_device_by_id(device_id: str):
     """
@@ -82,7 +127,22 @@ async def get_device_by_id(device_id: str):
     logger.error("Device was not get. FIM!")
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_device["message"] )
 
-@router.delete("/device/{device_id}", response_model=str)
+@router.get("/device/{device_id}/detail")
+async def get_device_detail(device_id: str):
+    """
+    Method responsible for get a device with its vendor, location, interfaces, lags and paths
+    """
+    logger.info("Resource: Starting device detail get by id: %s", device_id)
+
+    get_device = await DevicesFacade.get_device_detail(device_id=device_id)
+    if get_device["status"] == "success":
+        logger.info("Device detail was get successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(get_device["data"]) )
+
+    logger.error("Device detail was not get. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_device["message"] )
+
+@router.delete("/device/{device_id}")
 async def delete_device(device_id: str):
     """
     Method responsible for delete a device
@@ -92,7 +152,22 @@ async def delete_device(device_id: str):
     remove_device = await DevicesFacade.delete_device(device_id=device_id)
     if remove_device["status"] == "success":
         logger.info("Device was deleted successfully. FIM!")
-        return JSONResponse(status_code=status.HTTP_200_OK, content=remove_device["message"] )
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(remove_device["data"]) )
 
     logger.error("Device was not deleted. FIM!")
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=remove_device["message"] )
+
+@router.post("/device/backfill")
+async def post_backfill_devices():
+    """
+    Method responsible for backfilling derived device fields
+    """
+    logger.info("Resource: Starting devices backfill")
+
+    backfill_device = await DevicesService.backfill_mgmt_ipaddr()
+    if backfill_device["status"] == "success":
+        logger.info("Devices backfill successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(backfill_device["data"]) )
+
+    logger.error("Devices backfill error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=backfill_device["message"] )
@@ -0,0 +1,243 @@
+"""
+Module responsible for devices service
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.app.core.facilities.locations.schema import LocationsSchema
+from src.app.core.facilities.vendors.schema import VendorSchema
+from src.app.core.ipam.devices.models import DevicesBase
+from src.app.core.ipam.circuits.schema import CircuitsSchema
+from src.app.core.ipam.devices.schema import DevicesSchema
+from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
+from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
+from src.app.core.ipam.paths.schema import PATH_DEVICE_IDS, PATH_STEPS, PathsSchema
+from src.app.ipam.circuits.service import CircuitsService
+from src.app.shared.aggregation import refs_filter, unset_refs
+from src.app.shared.messages import ALREADY_EXISTS, NOT_FOUND
+from src.app.shared.network import normalize_ipaddr
+from src.app.shared.response import CustomResponse
+from src.infrastructure.odm.database import start_transaction
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+operation = "devices"
+
+BACKFILL_BATCH_SIZE: int = 1000
+IMPORT_CHUNK_SIZE: int = 500
+IMPORT_EXCLUDE_FIELDS: set = {"vendor", "location", "physical_interface", "path"}
+CIRCUIT_ENDPOINTS = ("interface_src", "interface_dst", "lag_src", "lag_dst")
+
+
+class DevicesService:
+    """
+    Class responsible for the service of the devices
+    """
+
+    @staticmethod
+    async def _flush_backfill(operations: list, document_ids: list, result: dict) -> None:
+        """
+        Method responsible for writing a batch of backfill operations
+        """
+        if len(operations) == 0:
+            return
+
+        collection = DevicesSchema.get_motor_collection()
+        try:
+            write = await collection.bulk_write(operations, ordered=False)
+            result["updated"] += write.modified_count
+
+        except BulkWriteError as err:
+            result["updated"] += err.details.get("nModified", 0)
+            for error in err.details.get("writeErrors", []):
+                result["conflicts"].append(str(document_ids[error["index"]]))
+
+    @staticmethod
+    async def backfill_mgmt_ipaddr() -> CustomResponse:
+        """
+        Method responsible for filling the normalized management address of existing devices
+        """
+        logger.info("Service: Backfill devices mgmt_ipaddr...")
+        collection = DevicesSchema.get_motor_collection()
+        result: dict = {"updated": 0, "conflicts": []}
+        operations: list = []
+        document_ids: list = []
+
+        async for document in collection.find({"mgmt_ipaddr": {"$exists": False}}, projection={"ipaddr": 1}):
+            operations.append(UpdateOne(
+                {"_id": document["_id"]},
+                {"$set": {"mgmt_ipaddr": normalize_ipaddr(document.get("ipaddr"))}}
+            ))
+            document_ids.append(document["_id"])
+            if len(operations) >= BACKFILL_BATCH_SIZE:
+                await DevicesService._flush_backfill(operations, document_ids, result)
+                operations, document_ids = [], []
+
+        await DevicesService._flush_backfill(operations, document_ids, result)
+
+        if len(result["conflicts"]) > 0:
+            logger.error("Service: Devices with duplicated mgmt_ipaddr: %s", result["conflicts"])
+
+        logger.info("Service: Backfill devices mgmt_ipaddr success: %s", result["updated"])
+        return CustomResponse.success(message="Backfill %s mgmt_ipaddr finished" % operation, data=result)
+
+    @staticmethod
+    async def _iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+        """
+        Method responsible for splitting a byte stream into numbered NDJSON lines
+        """
+        buffer = b""
+        line_number = 0
+        async for chunk in stream:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield line_number, line
+
+        if buffer.strip():
+            yield line_number + 1, buffer
+
+    @staticmethod
+    async def _import_chunk(rows: list[tuple[int, bytes]]) -> list[dict]:
+        """
+        Method responsible for validating and inserting one chunk of imported devices
+        """
+        results: dict = {}
+        devices: list = []
+
+        for line_number, line in rows:
+            try:
+                devices.append((line_number, DevicesBase.model_validate(json.loads(line))))
+
+            except (ValueError, ValidationError) as err:
+                results[line_number] = {"line": line_number, "status": "failure", "message": str(err)}
+
+        vendor_names = list({device.vendor for _, device in devices if device.vendor})
+        location_names = list({device.location for _, device in devices if device.location})
+        find_vendors, find_locations = await asyncio.gather(
+            VendorSchema.find(In(VendorSchema.name, vendor_names)).to_list(),
+            LocationsSchema.find(In(LocationsSchema.name, location_names)).to_list(),
+        )
+        vendors = {vendor.name: vendor for vendor in find_vendors}
+        locations = {location.name: location for location in find_locations}
+
+        documents: list = []
+        lines: list = []
+        for line_number, device in devices:
+            if device.vendor and device.vendor not in vendors:
+                results[line_number] = {"line": line_number, "status": "failure", "message": NOT_FOUND.format("vendor", device.vendor)}
+                continue
+
+            if device.location and device.location not in locations:
+                results[line_number] = {"line": line_number, "status": "failure", "message": NOT_FOUND.format("location", device.location)}
+                continue
+
+            document = DevicesSchema(**device.model_dump(exclude_unset=True, exclude=IMPORT_EXCLUDE_FIELDS))
+            document.id = PydanticObjectId()
+            document.vendor = vendors.get(device.vendor)
+            document.location = locations.get(device.location)
+            document.sync_addresses()
+            document.created_at = document.created_at or datetime.now()
+            documents.append(document)
+            lines.append(line_number)
+
+        failed: dict = {}
+        if len(documents) > 0:
+            try:
+                await DevicesSchema.insert_many(documents, ordered=False)
+
+            except BulkWriteError as err:
+                for error in err.details.get("writeErrors", []):
+                    failed[error["index"]] = error.get("errmsg", "write error")
+
+        for index, (line_number, document) in enumerate(zip(lines, documents)):
+            if index in failed:
+                message = ALREADY_EXISTS.format(operation, document.name) if "E11000" in failed[index] else failed[index]
+                results[line_number] = {"line": line_number, "status": "failure", "message": message}
+            else:
+                results[line_number] = {"line": line_number, "status": "success", "id": str(document.id)}
+
+        return [results[line_number] for line_number, _ in rows]
+
+    @staticmethod
+    async def import_devices(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """
+        Method responsible for importing devices from an NDJSON stream, yielding one result line per row
+        """
+        logger.info("Service: Importing devices...")
+        rows: list = []
+        imported = 0
+
+        async for row in DevicesService._iter_ndjson(stream):
+            rows.append(row)
+            if len(rows) >= IMPORT_CHUNK_SIZE:
+                for result in await DevicesService._import_chunk(rows):
+                    imported += result["status"] == "success"
+                    yield json.dumps(result) + "\n"
+                rows = []
+
+        if len(rows) > 0:
+            for result in await DevicesService._import_chunk(rows):
+                imported += result["status"] == "success"
+                yield json.dumps(result) + "\n"
+
+        logger.info("Service: Importing devices success: %s", imported)
+
+    @staticmethod
+    async def cascade_delete(device_id) -> dict:
+        """
+        Method responsible for deleting a device with its interfaces and lags using set based writes
+
+        Only the lags of the device are deleted: their members on other devices are detached, while a
+        lag of another device just loses the local members. Path hops and circuit endpoints pointing
+        to the removed documents are cleared. Runs inside a transaction when the server supports it.
+        """
+        logger.info("Service: Cascade delete device: %s", device_id)
+        interfaces = InterfaceSingleSchema.get_motor_collection()
+        lags = InterfaceLagSchema.get_motor_collection()
+
+        async with start_transaction() as session:
+            interface_ids = await interfaces.distinct("_id", {"device_id": device_id}, session=session)
+            lag_ids = await lags.distinct("_id", {"device_id": device_id}, session=session)
+
+            detach_members = await interfaces.update_many(
+                {"lag.$id": {"$in": lag_ids}, "device_id": {"$ne": device_id}},
+                {"$set": {"lag": None, "type": "single"}},
+                session=session,
+            )
+            delete_lags = await lags.delete_many({"_id": {"$in": lag_ids}}, session=session)
+            delete_interfaces = await interfaces.delete_many({"device_id": device_id}, session=session)
+            clear_paths = await PathsSchema.get_motor_collection().update_many(
+                {"device_ids": device_id}, unset_refs(PATH_STEPS, [device_id]) + [{"$set": {"device_ids": PATH_DEVICE_IDS}}],
+                session=session,
+            )
+            endpoint_ids = interface_ids + lag_ids
+            clear_circuits = await CircuitsSchema.get_motor_collection().update_many(
+                refs_filter(CIRCUIT_ENDPOINTS, endpoint_ids), unset_refs(CIRCUIT_ENDPOINTS, endpoint_ids), session=session
+            )
+            delete_device = await DevicesSchema.get_motor_collection().delete_one({"_id": device_id}, session=session)
+            await CircuitsService.refresh_elements(endpoint_ids, session=session)
+
+        result = {
+            "device": str(device_id),
+            "devices_deleted": delete_device.deleted_count,
+            "interfaces_deleted": delete_interfaces.deleted_count,
+            "lags_deleted": delete_lags.deleted_count,
+            "lag_members_detached": detach_members.modified_count,
+            "paths_updated": clear_paths.modified_count,
+            "circuits_updated": clear_circuits.modified_count,
+        }
+        logger.info("Service: Cascade delete device success: %s", result)
+        return result
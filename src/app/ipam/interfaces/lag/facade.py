@@ -5,18 +5,23 @@ Module for lag interfaces lag
 from datetime import datetime
 from typing import Type
 
+from beanie.exceptions import RevisionIdWasChanged
 from beanie.operators import In
 from bson import ObjectId
 from pymongo.errors import DuplicateKeyError
 
-from src.app.core.ipam.interfaces.lag.models import InterfaceLagBase
+from src.app.core.ipam.interfaces.lag.models import InterfaceLagBase, InterfaceLagMembersBase
 from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
 from src.app.core.ipam.interfaces.single.schema import \
     InterfaceSingleSchema
+from src.app.ipam.circuits.service import CircuitsService
 from src.app.shared.messages import (ALREADY_EXISTS, CREATE_SUCCESS,
                                      DELETE_SUCCESS, FOUND, NOT_FOUND,
                                      UPDATE_SUCCESS)
+from src.app.shared.network import address_values
+from src.app.shared.references import link_id, link_ref, reference_values
 from src.app.shared.response import CustomResponse
+from src.infrastructure.odm.database import start_transaction
 from src.logging import get_logger
 
 logger = get_logger(__name__)
@@ -24,6 +29,12 @@ logger = get_logger(__name__)
 
 operation = "interface lag"
 
+LAG_MEMBER_RESET: dict = {
+    "type": "lag", "mode": "unknown", "ipaddr": None, "ip_version": None, "ip_start": None, "ip_end": None,
+    "vrf": None, "vlan": None,
+}
+LAG_UPDATE_EXCLUDE_FIELDS: set = {"interface"}
+
 
 class InterfaceLagFacade:
     """
@@ -44,16 +55,10 @@ class InterfaceLagFacade:
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, interface_id))
 
             create_interface_lag = InterfaceLagSchema(**interface.model_dump(exclude_unset=True))
+            create_interface_lag.device_id = link_id(find_interface.device)
             await create_interface_lag.insert()
 
-            find_interface.lag = create_interface_lag
-            find_interface.ipaddr = None
-            find_interface.type = "lag"
-            find_interface.mode = "unknown"
-            find_interface.vrf = None
-            find_interface.vlan = None
-
-            await find_interface.save()
+            await find_interface.set({**LAG_MEMBER_RESET, "lag": link_ref(InterfaceLagSchema, create_interface_lag.id)})
 
             logger.info("Facade: Creating interface lag success: %s", create_interface_lag.dict())
 
@@ -85,8 +90,7 @@ class InterfaceLagFacade:
                 return CustomResponse.failure(message="Interface not have lag")
 
             logger.info("Facade: find interface lag success: %s", find_interface.dict())
-            find_interface.lag = None
-            await find_interface.save()
+            await find_interface.set({"lag": None})
 
             logger.info("Facade: Deattach interface lag success: %s", find_interface.dict())
 
@@ -114,13 +118,15 @@ class InterfaceLagFacade:
                 return CustomResponse.failure(message=NOT_FOUND.format("Interface  ", interface_id))
 
             find_lag = await InterfaceLagSchema.get(ObjectId(lag_id), fetch_links=True)
-            find_interface.lag = find_lag
-            find_interface.ipaddr = None
-            find_interface.type = "lag"
-            find_interface.mode = "unknown"
-            find_interface.vrf = None
-            find_interface.vlan = None
-            await find_interface.save()
+            if find_lag is None:
+                logger.error("Interface lag %s not found!", lag_id)
+                return CustomResponse.failure(message=NOT_FOUND.format(operation, lag_id))
+
+            if find_lag.device_id is None:
+                await find_lag.set({"device_id": link_id(find_interface.device)})
+                await CircuitsService.refresh_elements([find_lag.id])
+
+            await find_interface.set({**LAG_MEMBER_RESET, "lag": link_ref(InterfaceLagSchema, find_lag.id)})
 
             logger.info("Facade: Attach interface lag success: %s", find_lag.dict())
 
@@ -134,6 +140,108 @@ class InterfaceLagFacade:
             logger.error("Error attach interface lag (Exception): %s", err)
             return CustomResponse.failure(message="Interno error: [InterfaceLagFacade.attach_interface_lag]")
 
+    @staticmethod
+    async def _find_members(members: InterfaceLagMembersBase) -> tuple[list, list]:
+        """
+        Method responsible for loading the member interfaces of a batch with one $in query
+        """
+        member_ids = list({ObjectId(interface_id) for interface_id in members.interfaces})
+        found = await InterfaceSingleSchema.get_motor_collection().find(
+            {"_id": {"$in": member_ids}}, projection={"lag": 1, "device_id": 1}
+        ).to_list(length=None)
+
+        found_ids = {document["_id"] for document in found}
+        missing = [str(interface_id) for interface_id in member_ids if interface_id not in found_ids]
+        return found, missing
+
+    @staticmethod
+    async def attach_interface_lag_batch(lag_id: str, members: InterfaceLagMembersBase) -> CustomResponse:
+        """
+        Method responsible for attach a batch of interfaces to a interface lag
+        """
+
+        logger.info("Facade: Attach interface lag batch...")
+        try:
+            find_lag = await InterfaceLagSchema.get(ObjectId(lag_id))
+            if find_lag is None:
+                logger.error("Interface lag %s not found!", lag_id)
+                return CustomResponse.failure(message=NOT_FOUND.format(operation, lag_id))
+
+            found, missing = await InterfaceLagFacade._find_members(members)
+            if len(missing) > 0:
+                logger.error("Interfaces %s not found!", missing)
+                return CustomResponse.failure(message=NOT_FOUND.format("Interface  ", ", ".join(missing)))
+
+            other_lag = [
+                str(document["_id"]) for document in found
+                if document.get("lag") is not None and document["lag"].id != find_lag.id
+            ]
+            if len(other_lag) > 0:
+                logger.error("Interfaces %s already in another lag!", other_lag)
+                return CustomResponse.failure(message="Interface already in another lag: %s" % ", ".join(other_lag))
+
+            device_id = find_lag.device_id or found[0].get("device_id")
+            other_device = [str(document["_id"]) for document in found if document.get("device_id") != device_id]
+            if len(other_device) > 0:
+                logger.error("Interfaces %s not on the lag device %s!", other_device, device_id)
+                return CustomResponse.failure(message="Interface not on the lag device: %s" % ", ".join(other_device))
+
+            member_ids = [document["_id"] for document in found]
+            async with start_transaction() as session:
+                attach = await InterfaceSingleSchema.get_motor_collection().update_many(
+                    {"_id": {"$in": member_ids}, "device_id": device_id, "$or": [{"lag": None}, {"lag.$id": find_lag.id}]},
+                    {"$set": {**LAG_MEMBER_RESET, "lag": link_ref(InterfaceLagSchema, find_lag.id)}},
+                    session=session,
+                )
+                if find_lag.device_id is None:
+                    await InterfaceLagSchema.get_motor_collection().update_one(
+                        {"_id": find_lag.id}, {"$set": {"device_id": device_id}}, session=session
+                    )
+
+            if find_lag.device_id is None:
+                await CircuitsService.refresh_elements([find_lag.id])
+
+            result = {"lag": str(find_lag.id), "interfaces": [str(member_id) for member_id in member_ids], "attached": attach.modified_count}
+            logger.info("Facade: Attach interface lag batch success: %s", result)
+            return CustomResponse.success(message=UPDATE_SUCCESS.format(operation, find_lag.name), data=result)
+
+        except Exception as err:
+            logger.error("Error attach interface lag batch (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [InterfaceLagFacade.attach_interface_lag_batch]")
+
+    @staticmethod
+    async def detach_interface_lag_batch(members: InterfaceLagMembersBase) -> CustomResponse:
+        """
+        Method responsible for deattach a batch of interfaces from their interface lag
+        """
+
+        logger.info("Facade: Deattach interface lag batch...")
+        try:
+            found, missing = await InterfaceLagFacade._find_members(members)
+            if len(missing) > 0:
+                logger.error("Interfaces %s not found!", missing)
+                return CustomResponse.failure(message=NOT_FOUND.format("Interface  ", ", ".join(missing)))
+
+            without_lag = [str(document["_id"]) for document in found if document.get("lag") is None]
+            if len(without_lag) > 0:
+                logger.error("Interfaces %s not have lag!", without_lag)
+                return CustomResponse.failure(message="Interface not have lag: %s" % ", ".join(without_lag))
+
+            member_ids = [document["_id"] for document in found]
+            async with start_transaction() as session:
+                detach = await InterfaceSingleSchema.get_motor_collection().update_many(
+                    {"_id": {"$in": member_ids}, "lag": {"$ne": None}}, {"$set": {"lag": None, "type": "single"}},
+                    session=session,
+                )
+
+            result = {"interfaces": [str(member_id) for member_id in member_ids], "detached": detach.modified_count}
+            logger.info("Facade: Deattach interface lag batch success: %s", result)
+            return CustomResponse.success(message=UPDATE_SUCCESS.format(operation, len(member_ids)), data=result)
+
+        except Exception as err:
+            logger.error("Error deattach interface lag batch (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [InterfaceLagFacade.detach_interface_lag_batch]")
+
     @staticmethod
     async def update_interface_lag(interface_id: str, interface: Type[InterfaceLagBase]) -> CustomResponse:
         """
@@ -148,13 +256,14 @@ class InterfaceLagFacade:
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, interface_id))
 
             logger.info("Facade: find interface lag success [update]: %s", find_interface_lag.dict())
-            for field, value in interface.model_dump(exclude_unset=True).items():
-                setattr(find_interface_lag, field, value)
+            values = reference_values(interface.model_dump(exclude_unset=True, exclude=LAG_UPDATE_EXCLUDE_FIELDS))
 
-            update_interface_lag = await find_interface_lag.replace()
+            # only the changed fields are written, bandwidth_reserved is kept by the circuits
+            update_interface_lag = await find_interface_lag.set(address_values(values))
             return CustomResponse.success(message=UPDATE_SUCCESS.format(operation, interface.name), data=update_interface_lag)
 
-        except DuplicateKeyError as err:
+        # beanie reports the duplicate key of a document update as RevisionIdWasChanged
+        except (DuplicateKeyError, RevisionIdWasChanged) as err:
             logger.error("Error update interface lag (DuplicateKeyError): %s", err)
             return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, interface.name))
 
@@ -186,7 +295,7 @@ class InterfaceLagFacade:
         logger.info("Facade: Get all interface lags device id...")
         try:
             interface_lags = await InterfaceLagSchema.find(
-                {"interface.device._id": ObjectId(device_id)  }, fetch_links=True, nesting_depth=2
+                InterfaceLagSchema.device_id == ObjectId(device_id)
             ).to_list()
 
             return CustomResponse.success(message=FOUND.format(operation), data=interface_lags)
@@ -195,6 +304,21 @@ class InterfaceLagFacade:
             logger.error("Error get all interface lags (Exception): %s", err)
             return CustomResponse.failure(message="Interno error: [InterfaceLagFacade.get_interface_lags]")
 
+    @staticmethod
+    async def get_interface_lags_by_reference(field: str, reference_id: str) -> CustomResponse:
+        """
+        Method responsible for get the interface lags carrying a vlan or vrf (field is vlan or vrf)
+        """
+
+        logger.info("Facade: Get interface lags by %s %s...", field, reference_id)
+        try:
+            interface_lags = await InterfaceLagSchema.find({field: ObjectId(reference_id)}).to_list()
+            return CustomResponse.success(message=FOUND.format(operation), data=interface_lags)
+
+        except Exception as err:
+            logger.error("Error get interface lags by %s (Exception): %s", field, err)
+            return CustomResponse.failure(message="Interno error: [InterfaceLagFacade.get_interface_lags_by_reference]")
+
     @staticmethod
     async def delete_interface_lag(interface_id: str) -> CustomResponse:
         """
@@ -209,6 +333,7 @@ class InterfaceLagFacade:
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, interface_id))
 
             await interface_lag.delete()
+            await CircuitsService.refresh_elements([interface_lag.id])
             return CustomResponse.success(message=DELETE_SUCCESS.format(operation, interface_lag.name))
 
         except Exception as err:
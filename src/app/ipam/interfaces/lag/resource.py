@@ -5,7 +5,7 @@ Module responsible for interface lag routes
 from fastapi import APIRouter, Depends, status
 from fastapi.responses import JSONResponse
 
-from src.app.core.ipam.interfaces.lag.models import InterfaceLagBase
+from src.app.core.ipam.interfaces.lag.models import InterfaceLagBase, InterfaceLagMembersBase
 from src.app.ipam.interfaces.lag.facade import InterfaceLagFacade
 
 from src.app.shared.serialize import SerializationFilter
@@ -85,6 +85,37 @@ async def put_interface_lag_detach(interface_id: str):
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=detach_interface_lag["message"])
 
 
+@router.put("/interface_lag/batch/attach/{lag_id}")
+async def put_interface_lag_attach_batch(lag_id: str, members: InterfaceLagMembersBase):
+    """
+    Method responsible for attach a batch of interfaces to a interface_lag
+    """
+    logger.info("Resource: Starting interface_lag batch attach: %s", lag_id)
+
+    attach_interface_lag = await InterfaceLagFacade.attach_interface_lag_batch(lag_id=lag_id, members=members)
+    if attach_interface_lag["status"] == "success":
+        logger.info("interface_lag batch was attach successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_201_CREATED, content=SerializationFilter.response(attach_interface_lag["data"]) )
+
+    logger.error("interface_lag batch was not attach. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=attach_interface_lag["message"] )
+
+
+@router.put("/interface_lag/batch/detach")
+async def put_interface_lag_detach_batch(members: InterfaceLagMembersBase):
+    """
+    Method responsible for detach a batch of interfaces from their interface_lag
+    """
+    logger.info("Resource: Starting interface_lag batch detach: %s", members.interfaces)
+
+    detach_interface_lag = await InterfaceLagFacade.detach_interface_lag_batch(members=members)
+    if detach_interface_lag["status"] == "success":
+        logger.info("interface_lag batch was detach successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_201_CREATED, content=SerializationFilter.response(detach_interface_lag["data"]) )
+
+    logger.error("interface_lag batch was not detach. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=detach_interface_lag["message"])
+
 @router.get("/interface_lag/device/{device_id}")
 async def get_interface_lag_by_device_id(device_id: str):
     """
@@ -101,6 +132,38 @@ async def get_interface_lag_by_device_id(device_id: str):
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_interface_lags["message"] )
 
 
+@router.get("/interface_lag/vlan/{vlan_id}")
+async def get_interface_lag_by_vlan(vlan_id: str):
+    """
+    Method responsible for listing the interface_lag carrying a vlan
+    """
+    logger.info("Resource: Starting interface_lag get by vlan: %s", vlan_id)
+
+    get_interface_lags = await InterfaceLagFacade.get_interface_lags_by_reference(field="vlan", reference_id=vlan_id)
+    if get_interface_lags["status"] == "success":
+        logger.info("interface_lag was get successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(get_interface_lags["data"]) )
+
+    logger.error("interface_lag was not get. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_interface_lags["message"] )
+
+
+@router.get("/interface_lag/vrf/{vrf_id}")
+async def get_interface_lag_by_vrf(vrf_id: str):
+    """
+    Method responsible for listing the interface_lag in a vrf
+    """
+    logger.info("Resource: Starting interface_lag get by vrf: %s", vrf_id)
+
+    get_interface_lags = await InterfaceLagFacade.get_interface_lags_by_reference(field="vrf", reference_id=vrf_id)
+    if get_interface_lags["status"] == "success":
+        logger.info("interface_lag was get successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(get_interface_lags["data"]) )
+
+    logger.error("interface_lag was not get. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_interface_lags["message"] )
+
+
 @router.get("/interface_lag")
 async def get_interface_lags():
     """
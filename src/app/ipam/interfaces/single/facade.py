@@ -6,17 +6,26 @@ from datetime import datetime
 from typing import Type
 
 from bson import ObjectId
-from pymongo.errors import DuplicateKeyError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from beanie import PydanticObjectId
+from beanie.exceptions import RevisionIdWasChanged
 from beanie.odm.fields import  DeleteRules
 
 from src.app.core.ipam.devices.schema import DevicesSchema
+from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
 from src.app.core.ipam.interfaces.single.models import \
-    InterfaceSingleBase
+    InterfaceSingleBase, InterfaceSingleStatusBase, InterfaceSingleTemplateBase
 from src.app.core.ipam.interfaces.single.schema import \
     InterfaceSingleSchema
+from src.app.ipam.circuits.service import CircuitsService
+from src.app.ipam.interfaces.single.service import InterfaceSingleService
+from src.app.shared.aggregation import ref_id
 from src.app.shared.messages import (ALREADY_EXISTS, CREATE_SUCCESS,
                                      DELETE_SUCCESS, FOUND, NOT_FOUND,
                                      UPDATE_SUCCESS)
+from src.app.shared.network import address_values
+from src.app.shared.references import link_id, link_ref, reference_values
 from src.app.shared.response import CustomResponse
 from src.logging import get_logger
 
@@ -25,6 +34,9 @@ logger = get_logger(__name__)
 
 operation = "interface single"
 
+TEMPLATE_EXCLUDE_FIELDS: set = {"name", "device", "lag", "ipaddr"}
+STATUS_FIELDS: tuple = ("status_op", "alarm")
+
 
 class InterfaceSingleFacade:
     """
@@ -39,15 +51,13 @@ class InterfaceSingleFacade:
 
         logger.info("Facade: Get interface single by device id...")
         try:
-            find_device = await DevicesSchema.get(ObjectId(device_id), fetch_links=True)
-            if find_device is None:
+            device_oid = ObjectId(device_id)
+            if await DevicesSchema.find(DevicesSchema.id == device_oid).count() == 0:
                 logger.error("Device %s not found!", device_id)
                 return CustomResponse.failure(message=NOT_FOUND.format("device", device_id))
 
-            logger.info("Facade: find device success: %s", find_device.dict())
-
             find_interface_single = await InterfaceSingleSchema.find(
-                InterfaceSingleSchema.device.id == find_device.id, fetch_links=True, nesting_depth=1
+                InterfaceSingleSchema.device_id == device_oid
             ).to_list()
 
             logger.info("Facade: Get interface single by device id success: %s", find_interface_single)
@@ -88,6 +98,105 @@ class InterfaceSingleFacade:
             logger.error("Error creating interface single (Exception): %s", err)
             return CustomResponse.failure(message="Interno error: [InterfaceSingleFacade.create_interface_single]")
 
+    @staticmethod
+    async def create_interface_single_range(template: InterfaceSingleTemplateBase, device_id: str) -> CustomResponse:
+        """
+        Method responsible for creating the interfaces of a name pattern with shared attributes
+        """
+
+        logger.info("Facade: Creating interface single range: %s", template.pattern)
+        try:
+            names = InterfaceSingleService.expand_name_pattern(template.pattern)
+
+        except ValueError as err:
+            logger.error("Invalid interface pattern %s: %s", template.pattern, err)
+            return CustomResponse.failure(message="Invalid interface pattern: %s" % err)
+
+        try:
+            find_device = await DevicesSchema.get(ObjectId(device_id))
+            if find_device is None:
+                logger.error("Device %s not found!", device_id)
+                return CustomResponse.failure(message=NOT_FOUND.format("device", device_id))
+
+            attributes = template.interface.model_dump(exclude_unset=True, exclude=TEMPLATE_EXCLUDE_FIELDS)
+            interfaces = [
+                InterfaceSingleSchema(**attributes, name=name, device=find_device, device_id=find_device.id) for name in names
+            ]
+            for interface in interfaces:
+                interface.id = PydanticObjectId()
+
+            failed: dict = {}
+            try:
+                await InterfaceSingleSchema.insert_many(interfaces, ordered=False)
+
+            except BulkWriteError as err:
+                failed = {error["index"]: error for error in err.details.get("writeErrors", [])}
+
+            conflicts = [interfaces[index].name for index, error in sorted(failed.items()) if error.get("code") == 11000]
+            errors = [interfaces[index].name for index, error in sorted(failed.items()) if error.get("code") != 11000]
+            if len(conflicts) > 0:
+                logger.error("Interfaces %s already exists on device %s", conflicts, device_id)
+            if len(errors) > 0:
+                logger.error("Interfaces %s not created on device %s: %s", errors, device_id, failed)
+
+            created = [str(interface.id) for index, interface in enumerate(interfaces) if index not in failed]
+            if len(created) == 0:
+                return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, ", ".join(conflicts + errors)))
+
+            logger.info("Facade: Creating interface single range success: %s", len(created))
+            return CustomResponse.success(
+                message=CREATE_SUCCESS.format(operation, template.pattern),
+                data={"created": created, "conflicts": conflicts, "errors": errors}
+            )
+
+        except Exception as err:
+            logger.error("Error creating interface single range (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [InterfaceSingleFacade.create_interface_single_range]")
+
+    @staticmethod
+    async def ingest_interface_single_status(samples: list[InterfaceSingleStatusBase]) -> CustomResponse:
+        """
+        Method responsible for applying operational status samples with one unordered bulk write
+
+        MongoDB does not write a $set that leaves the document unchanged, so matched interfaces
+        are reported as applied or unchanged, apart from the samples not found or invalid
+        """
+
+        logger.info("Facade: Ingest interface single status: %s", len(samples))
+        try:
+            operations: list = []
+            empty = 0
+            invalid: list = []
+            for sample in samples:
+                values = {field: getattr(sample, field) for field in STATUS_FIELDS if getattr(sample, field) is not None}
+                if len(values) == 0:
+                    empty += 1
+                    continue
+
+                reference = sample.id or sample.device
+                if not ObjectId.is_valid(reference):
+                    invalid.append(reference)
+                    continue
+
+                target = {"_id": ObjectId(sample.id)} if sample.id else {"device_id": ObjectId(sample.device), "name": sample.name}
+                operations.append(UpdateOne(target, {"$set": values}))
+
+            matched = applied = 0
+            if len(operations) > 0:
+                write = await InterfaceSingleSchema.get_motor_collection().bulk_write(operations, ordered=False)
+                matched, applied = write.matched_count, write.modified_count
+
+            result = {
+                "received": len(samples), "matched": matched, "applied": applied, "unchanged": matched - applied,
+                "not_found": len(operations) - matched, "empty": empty, "invalid": invalid,
+            }
+            logger.info("Facade: Ingest interface single status success: %s", result)
+            return CustomResponse.success(message=UPDATE_SUCCESS.format(operation, "status"), data=result)
+
+        except Exception as err:
+            logger.error("Error ingest interface single status (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [InterfaceSingleFacade.ingest_interface_single_status]")
+
     @staticmethod
     async def update_interface_single(interface_id: str, interface: Type[InterfaceSingleBase]) -> CustomResponse:
         """
@@ -102,13 +211,22 @@ class InterfaceSingleFacade:
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, interface_id))
 
             logger.info("Facade: find interface single success [update]: %s", find_interface_single.dict())
-            for field, value in interface.model_dump(exclude_unset=True).items():
-                setattr(find_interface_single, field, value)
-
-            update_interface_single = await find_interface_single.replace()
+            device_id = find_interface_single.device_id
+            values = address_values(reference_values(interface.model_dump(exclude_unset=True)))
+            if "device" in values:
+                values["device_id"] = link_id(values["device"])
+                values["device"] = link_ref(DevicesSchema, values["device_id"])
+            if "lag" in values:
+                values["lag"] = link_ref(InterfaceLagSchema, values["lag"])
+
+            # only the changed fields are written, bandwidth_reserved is kept by the circuits
+            update_interface_single = await find_interface_single.set(values)
+            if update_interface_single.device_id != device_id:
+                await CircuitsService.refresh_elements([update_interface_single.id])
             return CustomResponse.success(message=UPDATE_SUCCESS.format(operation, interface.name), data=update_interface_single)
 
-        except DuplicateKeyError as err:
+        # beanie reports the duplicate key of a document update as RevisionIdWasChanged
+        except (DuplicateKeyError, RevisionIdWasChanged) as err:
             logger.error("Error update interface single (DuplicateKeyError): %s", err)
             return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, interface.name))
 
@@ -168,9 +286,68 @@ class InterfaceSingleFacade:
             logger.info("Facade: find interface single success: %s", find_interface_single.dict())
 
             teste = await find_interface_single.delete(link_rule=DeleteRules.DELETE_LINKS)
+            await CircuitsService.refresh_elements([find_interface_single.id])
             logger.info("Facade: Delete interface single success: %s", teste)
             return CustomResponse.success(message=DELETE_SUCCESS.format(operation, interface_id), data=interface_id)
 
         except Exception as err:
             logger.error("Error delete interface single (Exception): %s", err)
             return CustomResponse.failure(message="Interno error: [InterfaceSingleFacade.delete_interface_single]")
+
+    @staticmethod
+    async def get_interface_singles_by_reference(field: str, reference_id: str) -> CustomResponse:
+        """
+        Method responsible for get the interface single carrying a vlan or vrf (field is vlan or vrf)
+        """
+
+        logger.info("Facade: Get interface single by %s %s...", field, reference_id)
+        try:
+            interfaces = await InterfaceSingleSchema.find({field: ObjectId(reference_id)}).to_list()
+            return CustomResponse.success(message=FOUND.format(operation), data=interfaces)
+
+        except Exception as err:
+            logger.error("Error get interface single by %s (Exception): %s", field, err)
+            return CustomResponse.failure(message="Interno error: [InterfaceSingleFacade.get_interface_singles_by_reference]")
+
+    @staticmethod
+    async def backfill_references() -> CustomResponse:
+        """
+        Method responsible for filling the stored device id of existing interfaces and lags and
+        converting embedded vrf and vlan documents to id references
+        """
+        logger.info("Facade: Backfill interface references...")
+        try:
+            interfaces = InterfaceSingleSchema.get_motor_collection()
+            lags = InterfaceLagSchema.get_motor_collection()
+
+            update_interfaces = await interfaces.update_many(
+                {"device_id": {"$exists": False}}, [{"$set": {"device_id": ref_id("$device")}}]
+            )
+
+            pending = [document["_id"] async for document in lags.find({"device_id": None}, projection={"_id": 1})]
+            members = await interfaces.aggregate([
+                {"$match": {"lag.$id": {"$in": pending}, "device_id": {"$ne": None}}},
+                {"$group": {"_id": ref_id("$lag"), "device_id": {"$first": "$device_id"}}},
+            ]).to_list(length=None)
+
+            operations = [UpdateOne({"_id": member["_id"]}, {"$set": {"device_id": member["device_id"]}}) for member in members]
+            updated_lags = (await lags.bulk_write(operations, ordered=False)).modified_count if len(operations) > 0 else 0
+
+            result = {"interfaces_single": update_interfaces.modified_count, "interfaces_lag": updated_lags}
+            for name, collection in (("interfaces_single", interfaces), ("interfaces_lag", lags)):
+                update_vrf = await collection.update_many(
+                    {"vrf._id": {"$exists": True}}, [{"$set": {"vrf": "$vrf._id"}}]
+                )
+                update_vlan = await collection.update_many(
+                    {"vlan._id": {"$exists": True}},
+                    [{"$set": {"vlan": {"$map": {"input": "$vlan", "in": {"$ifNull": ["$$this._id", "$$this"]}}}}}],
+                )
+                result[f"{name}_vrf"] = update_vrf.modified_count
+                result[f"{name}_vlan"] = update_vlan.modified_count
+
+            logger.info("Facade: Backfill interface references success: %s", result)
+            return CustomResponse.success(message="Backfill %s references finished" % operation, data=result)
+
+        except Exception as err:
+            logger.error("Error backfill interface references (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [InterfaceSingleFacade.backfill_references]")
@@ -5,7 +5,7 @@ Module for single resource interfaces
 from fastapi import APIRouter, Depends, status
 from fastapi.responses import JSONResponse
 
-from src.app.core.ipam.interfaces.single.models import InterfaceSingleBase
+from src.app.core.ipam.interfaces.single.models import InterfaceSingleBase, InterfaceSingleStatusBase, InterfaceSingleTemplateBase
 from src.app.ipam.interfaces.single.facade import InterfaceSingleFacade
 
 from src.app.shared.serialize import SerializationFilter
@@ -37,6 +37,48 @@ async def get_interface_single_by_device(device_id: str):
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_interface_single["message"] )
 
 
+@router.get("/interface_single/vlan/{vlan_id}")
+async def get_interface_single_by_vlan(vlan_id: str):
+    """
+    Method responsible for listing the interface_single carrying a vlan
+    """
+    logger.info("Resource: Starting interface_single get by vlan: %s", vlan_id)
+    get_interface_single = await InterfaceSingleFacade.get_interface_singles_by_reference(field="vlan", reference_id=vlan_id)
+    if get_interface_single["status"] == "success":
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(get_interface_single["data"], keep_refs=True) )
+
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_interface_single["message"] )
+
+
+@router.get("/interface_single/vrf/{vrf_id}")
+async def get_interface_single_by_vrf(vrf_id: str):
+    """
+    Method responsible for listing the interface_single in a vrf
+    """
+    logger.info("Resource: Starting interface_single get by vrf: %s", vrf_id)
+    get_interface_single = await InterfaceSingleFacade.get_interface_singles_by_reference(field="vrf", reference_id=vrf_id)
+    if get_interface_single["status"] == "success":
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(get_interface_single["data"], keep_refs=True) )
+
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_interface_single["message"] )
+
+
+@router.post("/interface_single/backfill")
+async def post_backfill_interface_single():
+    """
+    Method responsible for backfilling the stored device id and vlan/vrf references of interfaces and lags
+    """
+    logger.info("Resource: Starting interface_single backfill")
+
+    backfill_interface_single = await InterfaceSingleFacade.backfill_references()
+    if backfill_interface_single["status"] == "success":
+        logger.info("interface_single backfill successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(backfill_interface_single["data"]) )
+
+    logger.error("interface_single backfill error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=backfill_interface_single["message"] )
+
+
 @router.post("/interface_single/{device_id}")
 async def post_create_interface_single(interface: InterfaceSingleBase, device_id: str):
     """
@@ -53,6 +95,38 @@ async def post_create_interface_single(interface: InterfaceSingleBase, device_id
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=create_interface_single["message"] )
 
 
+@router.post("/interface_single/range/{device_id}")
+async def post_create_interface_single_range(template: InterfaceSingleTemplateBase, device_id: str):
+    """
+    Method responsible for creating interface_single from a name pattern like GigabitEthernet0/0/[0-47]
+    """
+    logger.info("Resource: Starting interface_single range creation: %s", template.pattern)
+
+    create_interface_single = await InterfaceSingleFacade.create_interface_single_range(template=template, device_id=device_id)
+    if create_interface_single["status"] == "success":
+        logger.info("interface_single range was created successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_201_CREATED, content=SerializationFilter.response(create_interface_single["data"]) )
+
+    logger.error("interface_single range was not created. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=create_interface_single["message"] )
+
+
+@router.put("/interface_single/status")
+async def put_interface_single_status(samples: list[InterfaceSingleStatusBase]):
+    """
+    Method responsible for ingesting the operational status of many interface_single
+    """
+    logger.info("Resource: Starting interface_single status ingest: %s", len(samples))
+
+    ingest_interface_single = await InterfaceSingleFacade.ingest_interface_single_status(samples=samples)
+    if ingest_interface_single["status"] == "success":
+        logger.info("interface_single status was ingested successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=SerializationFilter.response(ingest_interface_single["data"]) )
+
+    logger.error("interface_single status was not ingested. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=ingest_interface_single["message"] )
+
+
 @router.put("/interface_single/{interface_id}")
 async def put_interface_single(interface_id: str, interface: InterfaceSingleBase):
     """
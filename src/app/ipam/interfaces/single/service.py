@@ -0,0 +1,63 @@
+"""
+Module for single interface service
+"""
+
+import itertools
+import re
+
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+RANGE_PATTERN = re.compile(r"\[([^\[\]]+)\]")
+MAX_PATTERN_INTERFACES: int = 1024
+
+
+class InterfaceSingleService:
+    """
+    Class responsible for the service of the interface single
+    """
+
+    @staticmethod
+    def _expand_range(expression: str) -> list[str]:
+        """
+        Method responsible for expanding one bracket expression like 0-3,8,10-11
+        """
+        values: list = []
+        for item in expression.split(","):
+            start_token, _, end_token = item.strip().partition("-")
+            start = int(start_token)
+            end = int(end_token) if end_token else start
+            if start > end:
+                raise ValueError("Invalid range %s" % item.strip())
+            if len(values) + end - start + 1 > MAX_PATTERN_INTERFACES:
+                raise ValueError("Range %s expands to more than %s values" % (expression, MAX_PATTERN_INTERFACES))
+
+            width = len(start_token) if start_token.startswith("0") and len(start_token) > 1 else 0
+            values.extend(str(value).zfill(width) for value in range(start, end + 1))
+
+        return values
+
+    @staticmethod
+    def expand_name_pattern(pattern: str) -> list[str]:
+        """
+        Method responsible for expanding an interface name pattern like GigabitEthernet0/0/[0-47]
+        """
+        parts = RANGE_PATTERN.split(pattern)
+        literals = parts[0::2]
+        ranges = [InterfaceSingleService._expand_range(expression) for expression in parts[1::2]]
+
+        total = 1
+        for values in ranges:
+            total *= len(values)
+        if total > MAX_PATTERN_INTERFACES:
+            raise ValueError("Pattern %s expands to more than %s interfaces" % (pattern, MAX_PATTERN_INTERFACES))
+
+        names: list = []
+        for combination in itertools.product(*ranges):
+            name = literals[0]
+            for value, literal in zip(combination, literals[1:]):
+                name += value + literal
+            names.append(name)
+
+        return list(dict.fromkeys(names))
@@ -6,9 +6,10 @@ from pymongo.errors import DuplicateKeyError
 
 from src.app.core.ipam.l2domain.models import L2DomainBase
 from src.app.core.ipam.l2domain.schema import L2DomainSchema
-from src.app.ipam.vlans.facade import VlanFacade
+from src.app.ipam.vlans.service import VlanService
 from src.app.shared.messages import CREATE_SUCCESS, ALREADY_EXISTS, NOT_FOUND, UPDATE_SUCCESS, FOUND, DELETE_SUCCESS
 from src.app.shared.response import CustomResponse
+from src.infrastructure.odm.database import start_transaction
 from src.logging import get_logger
 
 logger = get_logger(__name__)
@@ -54,10 +55,7 @@ class L2DomainFacade:
                 logger.error("l2domain %s not found! (update l2domain)", l2domain_id)
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, l2domain_id))
 
-            for field, value in l2domain.model_dump(exclude_unset=True).items():
-                setattr(find_l2domain, field, value)
-
-            await find_l2domain.replace()
+            await find_l2domain.set(l2domain.model_dump(exclude_unset=True))
             return CustomResponse.success(message=UPDATE_SUCCESS.format(operation, find_l2domain.name), data=find_l2domain)
 
         except DuplicateKeyError as err:
@@ -119,15 +117,16 @@ class L2DomainFacade:
         """
         logger.info("Facade: Deleting l2domain_id...")
 
-        delete_l2domain = L2DomainSchema.find(L2DomainSchema.id  == ObjectId(l2domain_id), fetch_links=True)
-        if delete_l2domain is None:
+        l2domains = L2DomainSchema.get_motor_collection()
+        find_l2domain = await l2domains.find_one({"_id": ObjectId(l2domain_id)}, projection={"_id": 1})
+        if find_l2domain is None:
             logger.error("L2Domain %s not found! (delete_l2domain)", l2domain_id)
             return CustomResponse.failure(message=NOT_FOUND.format(operation, l2domain_id))
 
-        logger.info("Facade: Checking if L2Domain has associated Vlans: %s", l2domain_id)
-
-        await VlanFacade.delete_vlan_by_l2domain_id(l2domain_id=l2domain_id)
+        async with start_transaction() as session:
+            vlans_deleted = await VlanService.delete_by_l2domain(l2domain_id, session=session)
+            delete_l2domain = await l2domains.delete_one({"_id": find_l2domain["_id"]}, session=session)
 
-        await delete_l2domain.delete()
-        logger.info("Facade: Deleting L2Domain: %s", l2domain_id)
-        return CustomResponse.success(message=DELETE_SUCCESS.format(operation, l2domain_id), data=l2domain_id)
+        result = {"l2domain": l2domain_id, "l2domains_deleted": delete_l2domain.deleted_count, "vlans_deleted": vlans_deleted}
+        logger.info("Facade: Deleting L2Domain: %s", result)
+        return CustomResponse.success(message=DELETE_SUCCESS.format(operation, l2domain_id), data=result)
@@ -75,7 +75,7 @@ async def delete_l2domain(l2domain_id: str):
     remove_l2domain = await L2DomainFacade.delete_l2domain(l2domain_id=l2domain_id)
     if remove_l2domain["status"] == "success":
         logger.info("L2 Domain was deleted successfully. FIM!")
-        return JSONResponse(status_code=status.HTTP_200_OK, content=remove_l2domain["message"] )
+        return JSONResponse(status_code=status.HTTP_200_OK, content=remove_l2domain["data"] )
 
     logger.error("L2 Domain was not deleted. FIM!")
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=remove_l2domain["message"] )
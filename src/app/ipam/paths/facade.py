@@ -13,7 +13,7 @@ from beanie.odm.fields import  DeleteRules
 
 from src.app.core.ipam.devices.schema import DevicesSchema
 from src.app.core.ipam.paths.models import PathsBase
-from src.app.core.ipam.paths.schema import PathsSchema
+from src.app.core.ipam.paths.schema import PATH_DEVICE_IDS, PathsSchema
 from src.app.shared.messages import (ALREADY_EXISTS, CREATE_SUCCESS,
                                      DELETE_SUCCESS, FOUND, NOT_FOUND,
                                      UPDATE_SUCCESS)
@@ -139,3 +139,21 @@ class PathFacade:
         except Exception as err:
             logger.error("Error get all paths (Exception): %s", err)
             return CustomResponse.failure(message="Interno error: [PathFacade.get_paths]")
+
+    @staticmethod
+    async def backfill_device_ids() -> CustomResponse:
+        """
+        Method responsible for filling the device ids of existing paths
+        """
+
+        logger.info("Facade: Backfill paths device_ids...")
+        try:
+            backfill = await PathsSchema.get_motor_collection().update_many(
+                {"device_ids": {"$exists": False}}, [{"$set": {"device_ids": PATH_DEVICE_IDS}}]
+            )
+            logger.info("Facade: Backfill paths device_ids success: %s", backfill.modified_count)
+            return CustomResponse.success(message="Backfill %s device_ids finished" % operation, data={"updated": backfill.modified_count})
+
+        except Exception as err:
+            logger.error("Error backfill paths device_ids (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [PathFacade.backfill_device_ids]")
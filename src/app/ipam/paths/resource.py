@@ -67,6 +67,21 @@ async def get_paths():
 
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_path["message"] )
 
+@router.post("/path/backfill")
+async def post_backfill_paths():
+    """
+    Method responsible for backfilling the device ids of paths
+    """
+    logger.info("Resource: Starting paths backfill")
+
+    backfill_path = await PathFacade.backfill_device_ids()
+    if backfill_path["status"] == "success":
+        logger.info("Paths backfill successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=backfill_path["data"])
+
+    logger.error("Paths backfill error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=backfill_path["message"] )
+
 @router.get("/path/device/{device_id}")
 async def get_path_by_device(device_id: str):
     """
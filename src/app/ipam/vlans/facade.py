@@ -1,21 +1,29 @@
 """
 Module responsible for the vlans facade
 """
-from beanie.operators import In, Set
+from typing import Optional
+
 from bson import ObjectId
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from src.app.core.ipam.l2domain.schema import L2DomainSchema
 from src.app.core.ipam.vlans.models import VlanBase
 from src.app.core.ipam.vlans.schema import VlanSchema
+from src.app.ipam.vlans.service import VLAN_MAX, VLAN_MIN, VlanService
+from src.app.shared.bitmap import compress_ranges, free_block, free_numbers
 from src.app.shared.messages import ALREADY_EXISTS, CREATE_SUCCESS, NOT_FOUND, FOUND, DELETE_SUCCESS
+from src.app.shared.pagination import split_page
+from src.app.shared.references import link_id
 from src.app.shared.response import CustomResponse
+from src.infrastructure.odm.database import start_transaction
 from src.logging import get_logger
 
 logger = get_logger(__name__)
 
 operation = "vlan"
 
+LEAN_VLAN_PROJECTION: dict = {"_id": 0, "id": {"$toString": "$_id"}, "name": 1, "alias": 1, "description": 1, "number": 1, "unique": 1}
+
 class VlanFacade:
     """
     Class responsible for the facade of the vlans
@@ -35,29 +43,21 @@ class VlanFacade:
 
             logger.info("Facade: Success find l2domain: %s", l2domain)
 
-            if vlan.unique is False:
-                logger.info("Facade: Select not unique vlan...")
-                check_vlan = await VlanSchema.find(
-                    VlanSchema.l2domain.id == l2domain.id,
-                    VlanSchema.number == vlan.number
-                ).to_list()
-
-            else:
+            if vlan.unique is True:
                 logger.info("Facade: Checking if vlan is unique...")
-                check_vlan = await VlanSchema.find(
-                    {'number' :vlan.number},fetch_links=True
-                ).to_list()
-
-            if len(check_vlan) > 0:
-                logger.error("Vlan %s already exists! (create_vlan)", vlan.number)
-                return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, vlan.number))
-
-            create_vlan = await VlanSchema(**vlan.model_dump(exclude_unset=True)).insert()
+                check_vlan = await VlanSchema.get_motor_collection().find_one({"number": vlan.number}, projection={"_id": 1})
+                if check_vlan is not None:
+                    logger.error("Vlan %s already exists! (create_vlan)", vlan.number)
+                    return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, vlan.number))
+
+            async with start_transaction() as session:
+                create_vlan = await VlanSchema(**vlan.model_dump(exclude_unset=True)).insert(session=session)
+                await VlanService.mark_used(l2domain.id, [create_vlan.number], session=session)
             return CustomResponse.success(message=CREATE_SUCCESS.format(operation, create_vlan.name), data=create_vlan.name)
 
         except DuplicateKeyError as err:
             logger.error("Error creating vlan (DuplicateKeyError): %s", err)
-            return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, create_vlan.name))
+            return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, vlan.number))
 
         except Exception as err:
             logger.error("Error creating vlan (Exception): %s", err)
@@ -85,23 +85,45 @@ class VlanFacade:
 
             vlan_range = range(vlan_start, vlan_end)
 
-            find_vlans = await VlanSchema.find(
-                VlanSchema.l2domain.id == ObjectId(l2domain_id),
-                In(VlanSchema.number, list(vlan_range))
-            ).to_list()
-            if len(find_vlans) > 0:
-                logger.error("Vlan range already exists! (create_vlan_range)")
-                return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, f"{vlan_start}-{vlan_end}"))
-
             vlan_range_list = [
                 VlanSchema(
                     name=f"{find_l2domain.name}-VLAN{vlan}", number=vlan,  description="Criado automaticamente", l2domain=l2domain_id
                 ) for vlan in vlan_range
 
             ]
-            await VlanSchema.insert_many(vlan_range_list)
+            failed: dict = {}
+            try:
+                await VlanSchema.insert_many(vlan_range_list, ordered=False)
+
+            except BulkWriteError as err:
+                failed = {error["index"]: error for error in err.details.get("writeErrors", [])}
+
+            conflicts = [vlan_range_list[index].number for index, error in sorted(failed.items()) if error.get("code") == 11000]
+            errors = [vlan_range_list[index].number for index, error in sorted(failed.items()) if error.get("code") != 11000]
+            if len(conflicts) > 0:
+                logger.error("Vlans %s already exists! (create_vlan_range)", conflicts)
+            if len(errors) > 0:
+                logger.error("Vlans %s not created (create_vlan_range): %s", errors, failed)
+
+            failed_numbers = set(conflicts + errors)
+            created = [vlan for vlan in vlan_range if vlan not in failed_numbers]
+            # a failed insert would abort a transaction, so the range keeps its partial inserts and
+            # repairs the bitmap if setting the bits fails
+            try:
+                await VlanService.mark_used(find_l2domain.id, created)
+
+            except Exception as err:
+                logger.error("Vlan bitmap update failed, rebuilding (create_vlan_range): %s", err)
+                await VlanService.rebuild_bitmap(find_l2domain.id)
+            if len(created) == 0 and len(errors) > 0:
+                return CustomResponse.failure(message="Vlans %s não foram criadas." % ", ".join(str(vlan) for vlan in errors))
+            if len(created) == 0:
+                return CustomResponse.failure(message=ALREADY_EXISTS.format(operation, f"{vlan_start}-{vlan_end}"))
 
-            return CustomResponse.success(message="Range de Vlans %s foi criados com sucesso!" % f"{vlan_start}-{vlan_end}")
+            return CustomResponse.success(
+                message="Range de Vlans %s foi criados com sucesso!" % f"{vlan_start}-{vlan_end}",
+                data={"created": created, "conflicts": conflicts, "errors": errors}
+            )
 
         except DuplicateKeyError as err:
             logger.error("Error creating vlan range (DuplicateKeyError): %s", err)
@@ -124,12 +146,18 @@ class VlanFacade:
                 logger.error("Vlan %s not found! (update_vlan)", find_vlan)
                 return CustomResponse.failure(message=NOT_FOUND.format(operation, find_vlan))
 
+            previous_number = find_vlan.number
             for field, value in vlan.model_dump(exclude_unset=True).items():
                 if field == "l2domain":
                     continue
                 setattr(find_vlan, field, value)
 
-            await find_vlan.replace()
+            async with start_transaction() as session:
+                await find_vlan.replace(session=session)
+                if find_vlan.number != previous_number:
+                    l2domain_id = link_id(find_vlan.l2domain)
+                    await VlanService.mark_free(l2domain_id, [previous_number], session=session)
+                    await VlanService.mark_used(l2domain_id, [find_vlan.number], session=session)
             return CustomResponse.success(message="Vlan %s foi atualizado com sucesso!" % find_vlan.name, data=find_vlan.id)
 
         except DuplicateKeyError as err:
@@ -158,6 +186,53 @@ class VlanFacade:
         logger.info("Vlans by l2domain found successfully . FIM! - %s", len(get_vlans))
         return CustomResponse.success(message=FOUND.format(l2domain_id), data=get_vlans)
 
+    @staticmethod
+    async def get_vlans_lean(l2domain_id: str, cursor: Optional[int], limit: int) -> CustomResponse:
+        """
+        Method responsible for getting a page of vlans of a l2domain ordered by number, without link expansion
+
+        The l2domain is resolved once and returned next to the projected vlans
+        """
+        logger.info("Getting lean vlans by l2domain id...")
+        try:
+            l2domain_oid = ObjectId(l2domain_id)
+            l2domain = await L2DomainSchema.get_motor_collection().find_one(
+                {"_id": l2domain_oid}, projection={"name": 1, "description": 1, "location": 1}
+            )
+            if l2domain is None:
+                logger.error("L2Domain %s not found! (get_vlans_lean)", l2domain_id)
+                return CustomResponse.failure(message=NOT_FOUND.format("l2domain", l2domain_id))
+
+            query: dict = {"l2domain.$id": l2domain_oid}
+            if cursor is not None:
+                query["number"] = {"$gt": cursor}
+
+            vlans = await VlanSchema.get_motor_collection().aggregate([
+                {"$match": query},
+                {"$sort": {"number": 1}},
+                {"$limit": limit + 1},
+                {"$project": LEAN_VLAN_PROJECTION},
+            ]).to_list(length=None)
+            page, next_cursor = split_page(vlans, limit, key=lambda vlan: vlan["number"])
+
+            location = l2domain.get("location")
+            data = {
+                "l2domain": {
+                    "id": l2domain_id,
+                    "name": l2domain.get("name"),
+                    "description": l2domain.get("description"),
+                    "location": str(location.id) if location is not None else None,
+                },
+                "vlans": page,
+                "next_cursor": next_cursor,
+            }
+            logger.info("Lean vlans by l2domain found successfully . FIM! - %s", len(page))
+            return CustomResponse.success(message=FOUND.format(operation), data=data)
+
+        except Exception as err:
+            logger.error("Error getting lean vlans (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [VlanFacade.get_vlans_lean]")
+
     @staticmethod
     async def delete_vlan(vlan_id: str) -> CustomResponse:
         """
@@ -171,7 +246,9 @@ class VlanFacade:
             return CustomResponse.failure(message=NOT_FOUND.format(operation, vlan_id))
 
         logger.info("Facade: Deleting vlan: %s", delete_vlan.id)
-        await delete_vlan.delete()
+        async with start_transaction() as session:
+            await delete_vlan.delete(session=session)
+            await VlanService.mark_free(link_id(delete_vlan.l2domain), [delete_vlan.number], session=session)
         return CustomResponse.success(message=FOUND.format(operation, delete_vlan.name), data=delete_vlan.id)
 
     @staticmethod
@@ -184,18 +261,23 @@ class VlanFacade:
             logger.error("Vlan start %s is greater than vlan end %s (delete ranger)", vlan_start, vlan_end)
             return CustomResponse.failure(message="Range de vlan está configurado corretamente. Não foi possível deletar range de vlan.")
 
-        vlan_range = range(vlan_start, vlan_end)
+        async with start_transaction() as session:
+            delete_vlans = await VlanSchema.get_motor_collection().delete_many({
+                "l2domain.$id": ObjectId(l2domain_id),
+                "number": {"$gte": vlan_start, "$lt": vlan_end},
+            }, session=session)
+            if delete_vlans.deleted_count > 0:
+                await VlanService.mark_free(l2domain_id, range(vlan_start, vlan_end), session=session)
 
-        find_vlans = VlanSchema.find(
-            VlanSchema.l2domain.id == ObjectId(l2domain_id),
-            In(VlanSchema.number, list(vlan_range))
-        )
-        if find_vlans is None:
+        if delete_vlans.deleted_count == 0:
             logger.error("Vlan range not exists! (delete_vlan_range)")
             return CustomResponse.failure(message=NOT_FOUND.format(operation, f"{vlan_start}-{vlan_end}"))
 
-        await find_vlans.delete()
-        return CustomResponse.success(message=FOUND.format(f"{vlan_start}-{vlan_end}"), data=f"{vlan_start}-{vlan_end}")
+        logger.info("Facade: Deleting vlan range success: %s", delete_vlans.deleted_count)
+        return CustomResponse.success(
+            message=DELETE_SUCCESS.format(operation, f"{vlan_start}-{vlan_end}"),
+            data={"range": f"{vlan_start}-{vlan_end}", "vlans_deleted": delete_vlans.deleted_count}
+        )
 
     @staticmethod
     async def delete_vlan_by_l2domain_id(l2domain_id: str) -> CustomResponse:
@@ -204,17 +286,110 @@ class VlanFacade:
         """
         logger.info("Facade: Deleting vlan by l2domain: %s", l2domain_id)
 
-        find_vlans = await  VlanSchema.find(
-            VlanSchema.l2domain.id == ObjectId(l2domain_id)
-        ).to_list()
+        async with start_transaction() as session:
+            deleted = await VlanService.delete_by_l2domain(l2domain_id, session=session)
+            if deleted > 0:
+                await VlanService.rebuild_bitmap(l2domain_id, session=session)
 
-        if len(find_vlans) == 0:
-            logger.error("Vlan l2 domain not exists! (delete_vlan_range)")
+        if deleted == 0:
+            logger.error("Vlan l2 domain not exists! (delete_vlan_by_l2domain_id)")
             return CustomResponse.failure(message=NOT_FOUND.format(operation, l2domain_id))
 
-        for vlan in find_vlans:
-            logger.info("Facade: Deleting vlan: %s", vlan.id)
-            await vlan.delete()
+        logger.info("Facade: Deleting vlan by l2domain success: %s - %s", l2domain_id, deleted)
+        return CustomResponse.success(message=DELETE_SUCCESS.format(operation, l2domain_id), data={"vlans_deleted": deleted})
+
+    @staticmethod
+    async def get_free_vlans(l2domain_id: str, count: int) -> CustomResponse:
+        """
+        Method responsible for getting the next free vlans of a l2domain from its bitmap
+
+        The bitmap is advisory where transactions are not available: vlans created from these
+        numbers are still checked by the unique l2domain/number index on insert
+        """
+        logger.info("Facade: Getting %s free vlans of l2domain: %s", count, l2domain_id)
+        try:
+            bitmap = await VlanService.load_bitmap(l2domain_id)
+            if bitmap is None:
+                logger.error("L2Domain %s not found! (get_free_vlans)", l2domain_id)
+                return CustomResponse.failure(message=NOT_FOUND.format("l2domain", l2domain_id))
+
+            vlans = free_numbers(bitmap, count, VLAN_MIN, VLAN_MAX)
+            if len(vlans) < count:
+                logger.error("L2Domain %s has only %s free vlans", l2domain_id, len(vlans))
+                return CustomResponse.failure(message="L2Domain %s não possui %s vlans livres." % (l2domain_id, count))
 
-        logger.info("Facade: Deleting vlan by l2domain success: %s", l2domain_id)
-        return CustomResponse.success(message=DELETE_SUCCESS.format(operation, l2domain_id))
+            return CustomResponse.success(message=FOUND.format(operation), data=vlans)
+
+        except Exception as err:
+            logger.error("Error getting free vlans (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [VlanFacade.get_free_vlans]")
+
+    @staticmethod
+    async def get_free_vlan_block(l2domain_id: str, size: int) -> CustomResponse:
+        """
+        Method responsible for getting the first free contiguous vlan block of a l2domain from its bitmap
+
+        Advisory like get_free_vlans, the vlans of the block are checked again on insert
+        """
+        logger.info("Facade: Getting free vlan block of %s in l2domain: %s", size, l2domain_id)
+        try:
+            bitmap = await VlanService.load_bitmap(l2domain_id)
+            if bitmap is None:
+                logger.error("L2Domain %s not found! (get_free_vlan_block)", l2domain_id)
+                return CustomResponse.failure(message=NOT_FOUND.format("l2domain", l2domain_id))
+
+            start = free_block(bitmap, size, VLAN_MIN, VLAN_MAX)
+            if start is None:
+                logger.error("L2Domain %s has no free block of %s vlans", l2domain_id, size)
+                return CustomResponse.failure(message="L2Domain %s não possui bloco livre de %s vlans." % (l2domain_id, size))
+
+            return CustomResponse.success(message=FOUND.format(operation), data={"start": start, "end": start + size - 1})
+
+        except Exception as err:
+            logger.error("Error getting free vlan block (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [VlanFacade.get_free_vlan_block]")
+
+    @staticmethod
+    async def get_vlan_ranges(l2domain_ids: list[str]) -> CustomResponse:
+        """
+        Method responsible for reporting the used and free vlan ranges of l2domains from their bitmaps
+        """
+        logger.info("Facade: Getting vlan ranges of l2domains: %s", l2domain_ids)
+        try:
+            bitmaps = await VlanService.load_bitmaps(l2domain_ids)
+            missing = [l2domain_id for l2domain_id in l2domain_ids if l2domain_id not in bitmaps]
+            if len(missing) > 0:
+                logger.error("L2Domain %s not found! (get_vlan_ranges)", missing)
+                return CustomResponse.failure(message=NOT_FOUND.format("l2domain", ", ".join(missing)))
+
+            ranges = [
+                {
+                    "l2domain": l2domain_id,
+                    "name": bitmaps[l2domain_id][0],
+                    "used": compress_ranges(bitmaps[l2domain_id][1], VLAN_MIN, VLAN_MAX, used=True),
+                    "free": compress_ranges(bitmaps[l2domain_id][1], VLAN_MIN, VLAN_MAX, used=False),
+                } for l2domain_id in dict.fromkeys(l2domain_ids)
+            ]
+            return CustomResponse.success(message=FOUND.format(operation), data=ranges)
+
+        except Exception as err:
+            logger.error("Error getting vlan ranges (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [VlanFacade.get_vlan_ranges]")
+
+    @staticmethod
+    async def rebuild_vlan_bitmap(l2domain_id: str) -> CustomResponse:
+        """
+        Method responsible for rebuilding the vlan bitmap of a l2domain from its vlans
+        """
+        logger.info("Facade: Rebuilding vlan bitmap of l2domain: %s", l2domain_id)
+        try:
+            words = await VlanService.rebuild_bitmap(l2domain_id)
+            if words is None:
+                logger.error("L2Domain %s not found! (rebuild_vlan_bitmap)", l2domain_id)
+                return CustomResponse.failure(message=NOT_FOUND.format("l2domain", l2domain_id))
+
+            return CustomResponse.success(message=FOUND.format(operation), data=l2domain_id)
+
+        except Exception as err:
+            logger.error("Error rebuilding vlan bitmap (Exception): %s", err)
+            return CustomResponse.failure(message="Interno error: [VlanFacade.rebuild_vlan_bitmap]")
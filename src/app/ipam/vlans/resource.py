@@ -1,12 +1,16 @@
 """
 Module responsible for vlans routes
 """
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
 from fastapi.responses import JSONResponse
 
 
 from src.app.core.ipam.vlans.models import VlanBase
 from src.app.ipam.vlans.facade import VlanFacade
+from src.app.ipam.vlans.service import VLAN_MAX, VLAN_MIN
+from src.app.shared.pagination import MAX_LIMIT, NEXT_CURSOR_HEADER
 from src.app.shared.serialize import SerializationFilter
 # from src.dependencies import authorization
 from src.logging import get_logger
@@ -65,13 +69,51 @@ async def put_vlan(vlan_id: str, vlan: VlanBase):
     logger.error("Vlan was not update. FIM!")
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=update_vlan["message"] )
 
+@router.get("/vlan/ranges")
+async def get_vlan_ranges(l2domain: list[str] = Query(min_length=1)):
+    """
+    Method responsible for reporting used and free vlan ranges of one or many l2domain
+    """
+    logger.info("Resource: Starting vlan ranges get: %s", l2domain)
+
+    get_ranges = await VlanFacade.get_vlan_ranges(l2domain_ids=l2domain)
+    if get_ranges["status"] == "success":
+        logger.info("vlan ranges get successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=get_ranges["data"])
+
+    logger.error("vlan ranges get error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_ranges["message"])
+
 @router.get("/vlan/{l2domain_id}")
-async def get_vlans_by_l2domain(l2domain_id: str):
+async def get_vlans_by_l2domain(
+    l2domain_id: str,
+    lean: bool = False,
+    cursor: Optional[int] = None,
+    limit: int = Query(default=MAX_LIMIT, ge=1, le=VLAN_MAX),
+):
     """
     Method responsible for listing all vlan
+
+    In lean mode the vlans are projected and paged by number, the l2domain is returned once
+    and the next page cursor is returned in the X-Next-Cursor header
     """
     logger.info("Resource: Starting vlan get all")
 
+    if lean:
+        get_vlans = await VlanFacade.get_vlans_lean(l2domain_id=l2domain_id, cursor=cursor, limit=limit)
+        if get_vlans["status"] == "success":
+            logger.info("vlan get lean successfully. FIM!")
+            response = JSONResponse(
+                status_code=status.HTTP_200_OK,
+                content={"l2domain": get_vlans["data"]["l2domain"], "vlans": get_vlans["data"]["vlans"]}
+            )
+            if get_vlans["data"]["next_cursor"] is not None:
+                response.headers[NEXT_CURSOR_HEADER] = get_vlans["data"]["next_cursor"]
+            return response
+
+        logger.error("vlan get lean error. FIM!")
+        return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_vlans["message"])
+
     get_vlans = await VlanFacade.get_vlans_by_l2domain_id(l2domain_id=l2domain_id)
 
     if get_vlans["status"] == "success":
@@ -81,6 +123,51 @@ async def get_vlans_by_l2domain(l2domain_id: str):
     logger.error("vlan get all error. FIM!")
     return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=get_vlans["message"])
 
+@router.get("/vlan/free/{l2domain_id}")
+async def get_free_vlans(l2domain_id: str, count: int = Query(default=1, ge=1, le=VLAN_MAX - VLAN_MIN + 1)):
+    """
+    Method responsible for listing the next free vlans of a l2domain
+    """
+    logger.info("Resource: Starting free vlan get: %s", l2domain_id)
+
+    get_vlans = await VlanFacade.get_free_vlans(l2domain_id=l2domain_id, count=count)
+    if get_vlans["status"] == "success":
+        logger.info("free vlan get successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=get_vlans["data"])
+
+    logger.error("free vlan get error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_vlans["message"])
+
+@router.get("/vlan/free_block/{l2domain_id}")
+async def get_free_vlan_block(l2domain_id: str, size: int = Query(default=1, ge=1, le=VLAN_MAX - VLAN_MIN + 1)):
+    """
+    Method responsible for getting the first free contiguous vlan block of a l2domain
+    """
+    logger.info("Resource: Starting free vlan block get: %s", l2domain_id)
+
+    get_block = await VlanFacade.get_free_vlan_block(l2domain_id=l2domain_id, size=size)
+    if get_block["status"] == "success":
+        logger.info("free vlan block get successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=get_block["data"])
+
+    logger.error("free vlan block get error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=get_block["message"])
+
+@router.post("/vlan/bitmap/{l2domain_id}")
+async def post_rebuild_vlan_bitmap(l2domain_id: str):
+    """
+    Method responsible for rebuilding the vlan bitmap of a l2domain
+    """
+    logger.info("Resource: Starting vlan bitmap rebuild: %s", l2domain_id)
+
+    rebuild_bitmap = await VlanFacade.rebuild_vlan_bitmap(l2domain_id=l2domain_id)
+    if rebuild_bitmap["status"] == "success":
+        logger.info("vlan bitmap rebuild successfully. FIM!")
+        return JSONResponse(status_code=status.HTTP_200_OK, content=rebuild_bitmap["message"])
+
+    logger.error("vlan bitmap rebuild error. FIM!")
+    return JSONResponse(status_code=status.HTTP_302_FOUND, content=rebuild_bitmap["message"])
+
 @router.delete("/vlan/{vlan_id}")
 async def delete_vlan(vlan_id: str):
     """
@@ -106,7 +193,7 @@ async def delete_vlan_range(l2domain_id: str, vlan_start: int, vlan_end: int):
     remove_vlan = await VlanFacade.delete_vlan_range(l2domain_id=l2domain_id, vlan_start=vlan_start, vlan_end=vlan_end)
     if remove_vlan["status"] == "success":
         logger.info("vlan range was removed successfully. FIM!")
-        return JSONResponse(status_code=status.HTTP_200_OK, content=remove_vlan["message"] )
+        return JSONResponse(status_code=status.HTTP_200_OK, content=remove_vlan["data"] )
 
     logger.error("vlan range was not removed. FIM!")
     return JSONResponse(status_code=status.HTTP_302_FOUND, content=remove_vlan["message"] )
@@ -0,0 +1,113 @@
+"""
+Module responsible for vlans service
+"""
+
+from typing import Iterable, Optional
+
+from bson import ObjectId
+
+from src.app.core.ipam.l2domain.schema import VLAN_BITMAP_SIZE, L2DomainSchema
+from src.app.core.ipam.vlans.schema import VlanSchema
+from src.app.shared.bitmap import clear_bits, decode_bitmap, encode_bitmap, set_bits
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+VLAN_MIN: int = 2
+VLAN_MAX: int = 4094
+BITMAP_FIELD: str = "vlan_bitmap"
+
+
+class VlanService:
+    """
+    Class responsible for keeping the vlan occupancy bitmap of each l2domain
+    """
+
+    @staticmethod
+    async def rebuild_bitmap(l2domain_id, session=None) -> Optional[list]:
+        """
+        Method responsible for rebuilding the bitmap of a l2domain from its vlans
+        """
+        l2domain_oid = ObjectId(l2domain_id)
+        numbers = await VlanSchema.get_motor_collection().distinct("number", {"l2domain.$id": l2domain_oid}, session=session)
+        words = encode_bitmap([number for number in numbers if 0 <= number < VLAN_BITMAP_SIZE], VLAN_BITMAP_SIZE)
+
+        rebuild = await L2DomainSchema.get_motor_collection().update_one(
+            {"_id": l2domain_oid}, {"$set": {BITMAP_FIELD: words}}, session=session
+        )
+        logger.info("Service: Rebuild vlan bitmap of l2domain %s: %s vlans", l2domain_id, len(numbers))
+        return words if rebuild.matched_count > 0 else None
+
+    @staticmethod
+    async def _update_bitmap(l2domain_id, update: dict, session=None) -> None:
+        """
+        Method responsible for applying a $bit update, rebuilding bitmaps that were never initialized
+        """
+        if len(update["$bit"]) == 0:
+            return
+
+        change = await L2DomainSchema.get_motor_collection().update_one(
+            {"_id": ObjectId(l2domain_id), BITMAP_FIELD: {"$type": "array"}}, update, session=session
+        )
+        if change.matched_count == 0:
+            await VlanService.rebuild_bitmap(l2domain_id, session=session)
+
+    @staticmethod
+    async def mark_used(l2domain_id, numbers: Iterable[int], session=None) -> None:
+        """
+        Method responsible for setting the bits of created vlans
+        """
+        await VlanService._update_bitmap(l2domain_id, set_bits(BITMAP_FIELD, numbers), session=session)
+
+    @staticmethod
+    async def mark_free(l2domain_id, numbers: Iterable[int], session=None) -> None:
+        """
+        Method responsible for clearing the bits of deleted vlans
+        """
+        await VlanService._update_bitmap(l2domain_id, clear_bits(BITMAP_FIELD, numbers), session=session)
+
+    @staticmethod
+    async def load_bitmap(l2domain_id) -> Optional[int]:
+        """
+        Method responsible for reading the bitmap of a l2domain with one document read
+        """
+        document = await L2DomainSchema.get_motor_collection().find_one(
+            {"_id": ObjectId(l2domain_id)}, projection={BITMAP_FIELD: 1}
+        )
+        if document is None:
+            return None
+
+        words = document.get(BITMAP_FIELD)
+        if not isinstance(words, list):
+            words = await VlanService.rebuild_bitmap(l2domain_id)
+
+        return decode_bitmap(words)
+
+    @staticmethod
+    async def load_bitmaps(l2domain_ids: list) -> dict:
+        """
+        Method responsible for reading the bitmaps of many l2domains with one query, keyed by l2domain id
+        """
+        documents = await L2DomainSchema.get_motor_collection().find(
+            {"_id": {"$in": [ObjectId(l2domain_id) for l2domain_id in l2domain_ids]}},
+            projection={"name": 1, BITMAP_FIELD: 1},
+        ).to_list(length=None)
+
+        bitmaps: dict = {}
+        for document in documents:
+            words = document.get(BITMAP_FIELD)
+            if not isinstance(words, list):
+                words = await VlanService.rebuild_bitmap(document["_id"])
+            bitmaps[str(document["_id"])] = (document.get("name"), decode_bitmap(words))
+
+        return bitmaps
+
+    @staticmethod
+    async def delete_by_l2domain(l2domain_id, session=None) -> int:
+        """
+        Method responsible for deleting every vlan of a l2domain with one delete_many
+        """
+        delete_vlans = await VlanSchema.get_motor_collection().delete_many(
+            {"l2domain.$id": ObjectId(l2domain_id)}, session=session
+        )
+        return delete_vlans.deleted_count
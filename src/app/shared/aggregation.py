@@ -0,0 +1,45 @@
+"""
+Module responsible for shared aggregation pipeline helpers
+"""
+
+
+def ref_id(expression: str) -> dict:
+    """
+    Expression returning the id stored in a Link (DBRef) field
+
+    Field paths cannot address "$id" directly, so it is read with $getField
+    """
+    return {"$getField": {"field": {"$literal": "$id"}, "input": expression}}
+
+
+def count_by(expression, lookup: str = None) -> list:
+    """
+    Facet stages counting documents by an expression, optionally naming the ids from a collection
+    """
+    stages: list = [{"$group": {"_id": expression, "count": {"$sum": 1}}}]
+    if lookup is None:
+        stages.append({"$project": {"_id": 0, "name": "$_id", "count": 1}})
+    else:
+        stages.extend([
+            {"$lookup": {"from": lookup, "localField": "_id", "foreignField": "_id", "as": "ref"}},
+            {"$project": {"_id": 0, "id": {"$toString": "$_id"}, "name": {"$first": "$ref.name"}, "count": 1}},
+        ])
+
+    stages.append({"$sort": {"count": -1}})
+    return stages
+
+
+def refs_filter(fields, ids: list) -> dict:
+    """
+    Filter matching documents where any of the Link fields points to one of the ids
+    """
+    return {"$or": [{f"{field}.$id": {"$in": ids}} for field in fields]}
+
+
+def unset_refs(fields, ids: list) -> list:
+    """
+    Update pipeline clearing the Link fields that point to one of the ids
+    """
+    return [{"$set": {
+        field: {"$cond": [{"$in": [ref_id(f"${field}"), ids]}, None, f"${field}"]} for field in fields
+    }}]
@@ -0,0 +1,119 @@
+"""
+Module responsible for the occupancy bitmap helpers
+
+A bitmap is stored as a list of signed 64 bit words so single bits can be flipped
+atomically with the $bit update operator
+"""
+
+from typing import Iterable, Optional
+
+from bson.int64 import Int64
+
+WORD_BITS: int = 64
+WORD_MASK: int = (1 << WORD_BITS) - 1
+
+
+def empty_bitmap(size: int) -> list[int]:
+    """
+    Words of an empty bitmap holding size bits
+    """
+    return [0] * ((size + WORD_BITS - 1) // WORD_BITS)
+
+
+def _signed(word: int) -> Int64:
+    """
+    Convert an unsigned 64 bit word to the signed value stored by MongoDB
+    """
+    return Int64(word - (1 << WORD_BITS) if word >> (WORD_BITS - 1) else word)
+
+
+def _word_masks(numbers: Iterable[int]) -> dict[int, int]:
+    """
+    Group bit numbers by word, returning the unsigned mask of each word
+    """
+    masks: dict = {}
+    for number in numbers:
+        word, bit = divmod(number, WORD_BITS)
+        masks[word] = masks.get(word, 0) | (1 << bit)
+
+    return masks
+
+
+def set_bits(field: str, numbers: Iterable[int]) -> dict:
+    """
+    $bit update setting the bits of numbers
+    """
+    return {"$bit": {f"{field}.{word}": {"or": _signed(mask)} for word, mask in _word_masks(numbers).items()}}
+
+
+def clear_bits(field: str, numbers: Iterable[int]) -> dict:
+    """
+    $bit update clearing the bits of numbers
+    """
+    return {"$bit": {f"{field}.{word}": {"and": _signed(~mask & WORD_MASK)} for word, mask in _word_masks(numbers).items()}}
+
+
+def encode_bitmap(numbers: Iterable[int], size: int) -> list[Int64]:
+    """
+    Words of a bitmap with the bits of numbers set
+    """
+    words = empty_bitmap(size)
+    for word, mask in _word_masks(numbers).items():
+        words[word] |= mask
+
+    return [_signed(word) for word in words]
+
+
+def decode_bitmap(words: Iterable[int]) -> int:
+    """
+    Stored words as one integer where bit n is number n
+    """
+    bitmap = 0
+    for index, word in enumerate(words):
+        bitmap |= (int(word) & WORD_MASK) << (index * WORD_BITS)
+
+    return bitmap
+
+
+def free_numbers(bitmap: int, count: int, low: int, high: int) -> list[int]:
+    """
+    First count numbers between low and high (inclusive) whose bit is not set
+    """
+    numbers: list = []
+    for number in range(low, high + 1):
+        if not bitmap >> number & 1:
+            numbers.append(number)
+            if len(numbers) == count:
+                break
+
+    return numbers
+
+
+def free_block(bitmap: int, size: int, low: int, high: int) -> Optional[int]:
+    """
+    Start of the first run of size clear bits between low and high (inclusive)
+    """
+    run = 0
+    for number in range(low, high + 1):
+        run = 0 if bitmap >> number & 1 else run + 1
+        if run == size:
+            return number - size + 1
+
+    return None
+
+
+def compress_ranges(bitmap: int, low: int, high: int, used: bool = True) -> str:
+    """
+    Numbers between low and high (inclusive) whose bit matches used, as compressed ranges like 2-99,150
+    """
+    ranges: list = []
+    start = None
+    for number in range(low, high + 2):
+        match = number <= high and bool(bitmap >> number & 1) == used
+        if match and start is None:
+            start = number
+        elif not match and start is not None:
+            ranges.append(str(start) if start == number - 1 else f"{start}-{number - 1}")
+            start = None
+
+    return ",".join(ranges)
@@ -0,0 +1,58 @@
+"""
+Module responsible for the per request document loader
+"""
+
+import asyncio
+from typing import Iterable, Optional, Type
+
+from beanie import Document, PydanticObjectId
+from beanie.operators import In
+
+
+class DocumentLoader:
+    """
+    Class responsible for loading referenced documents by id
+
+    Documents are cached for the lifetime of the loader (one request), concurrent loads of
+    the same document share one query and every load_many call costs at most one $in query
+    """
+
+    def __init__(self):
+        self._cache: dict = {}
+
+    async def load_many(self, schema: Type[Document], document_ids: Iterable) -> list[Optional[Document]]:
+        """
+        Method responsible for loading documents of one schema, keeping the order of the ids
+        """
+        keys = [(schema, PydanticObjectId(document_id)) for document_id in document_ids]
+        missing = list({key[1] for key in keys if key not in self._cache})
+
+        if len(missing) > 0:
+            loop = asyncio.get_running_loop()
+            for document_id in missing:
+                self._cache[(schema, document_id)] = loop.create_future()
+
+            try:
+                found = {document.id: document for document in await schema.find(In(schema.id, missing)).to_list()}
+                for document_id in missing:
+                    self._cache[(schema, document_id)].set_result(found.get(document_id))
+
+            except Exception as err:
+                for document_id in missing:
+                    self._cache.pop((schema, document_id)).set_exception(err)
+                raise
+
+        return list(await asyncio.gather(*[self._cache[key] for key in keys]))
+
+    async def load(self, schema: Type[Document], document_id) -> Optional[Document]:
+        """
+        Method responsible for loading one document
+        """
+        return (await self.load_many(schema, [document_id]))[0]
+
+
+def get_document_loader() -> DocumentLoader:
+    """
+    Dependency providing a new loader for each request
+    """
+    return DocumentLoader()
@@ -0,0 +1,63 @@
+"""
+Module responsible for shared network address helpers
+"""
+
+import ipaddress
+from typing import Optional
+
+
+def normalize_ipaddr(ipaddr: Optional[str]) -> Optional[str]:
+    """
+    Normalize an address (with or without prefix length) to its canonical host form
+    """
+    if not ipaddr:
+        return None
+
+    address = ipaddr.strip().split("/")[0]
+    try:
+        return ipaddress.ip_address(address).compressed
+
+    except ValueError:
+        return address.lower()
+
+
+def ip_range(ipaddr: Optional[str]) -> tuple[Optional[int], Optional[str], Optional[str]]:
+    """
+    Numeric (ip version, start, end) representation of an address or prefix
+
+    A host address (e.g. 10.0.0.1/30) is stored as a single address; a prefix without
+    host bits (e.g. 10.0.0.0/24) is stored as its whole range. Start and end are fixed
+    width hex strings, so IPv4 and IPv6 values order correctly as strings.
+    """
+    if not ipaddr:
+        return None, None, None
+
+    try:
+        interface = ipaddress.ip_interface(ipaddr.strip())
+
+    except ValueError:
+        return None, None, None
+
+    network = interface.network
+    if interface.ip == network.network_address and network.num_addresses > 1:
+        return network.version, encode_address(network.network_address), encode_address(network.broadcast_address)
+
+    return interface.version, encode_address(interface.ip), encode_address(interface.ip)
+
+
+def address_values(values: dict) -> dict:
+    """
+    Return update values with the address range of their ipaddr, as the sync_addresses hooks do
+    """
+    if "ipaddr" not in values:
+        return values
+
+    ip_version, ip_start, ip_end = ip_range(values["ipaddr"])
+    return {**values, "ip_version": ip_version, "ip_start": ip_start, "ip_end": ip_end}
+
+
+def encode_address(address) -> str:
+    """
+    Encode an address as a fixed width hex string
+    """
+    return format(int(address), "032x")
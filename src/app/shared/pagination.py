@@ -0,0 +1,64 @@
+"""
+Module responsible for keyset pagination helpers
+"""
+
+import base64
+import json
+from typing import Any, Callable, Optional
+
+from bson import ObjectId
+
+DEFAULT_LIMIT: int = 100
+MAX_LIMIT: int = 1000
+NEXT_CURSOR_HEADER: str = "X-Next-Cursor"
+
+
+def keyset_filter(cursor: Optional[str]) -> dict:
+    """
+    Build the filter that resumes an _id ordered listing after the cursor
+    """
+    if not cursor:
+        return {}
+
+    return {"_id": {"$gt": ObjectId(cursor)}}
+
+
+def split_page(items: list, limit: int, key: Callable[[Any], Any] = lambda item: item.id) -> tuple[list, Optional[str]]:
+    """
+    Split a result fetched with limit + 1 into the page and the next cursor
+    """
+    if len(items) <= limit:
+        return items, None
+
+    page = items[:limit]
+    return page, str(key(page[-1]))
+
+
+def encode_cursor(value: Any, document_id: Any) -> str:
+    """
+    Encode the sort value and id of the last item of a page as an opaque cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps([value, str(document_id)]).encode()).decode()
+
+
+def sorted_keyset_filter(cursor: Optional[str], field: str, descending: bool = False) -> dict:
+    """
+    Build the filter that resumes a (field, _id) ordered listing after an encode_cursor cursor
+    """
+    if not cursor:
+        return {}
+
+    value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    document_id = ObjectId(document_id)
+    operator = "$lt" if descending else "$gt"
+
+    if value is None:
+        # null sorts before every other value
+        if descending:
+            return {field: None, "_id": {operator: document_id}}
+        return {"$or": [{field: None, "_id": {operator: document_id}}, {field: {"$ne": None}}]}
+
+    after = [{field: {operator: value}}, {field: value, "_id": {operator: document_id}}]
+    if descending:
+        after.append({field: None})
+    return {"$or": after}
@@ -0,0 +1,63 @@
+"""
+Module responsible for shared document reference helpers
+"""
+
+from typing import Any, Optional
+
+from beanie import Document, Link, PydanticObjectId
+from bson import DBRef
+
+
+def link_id(value: Any) -> Optional[PydanticObjectId]:
+    """
+    Return the id referenced by a Link field, whether it holds a Link, a fetched document or a raw id
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, Link):
+        return PydanticObjectId(value.ref.id)
+
+    if isinstance(value, DBRef):
+        return PydanticObjectId(value.id)
+
+    if isinstance(value, Document):
+        return value.id
+
+    return PydanticObjectId(value)
+
+
+def link_ref(schema: type[Document], value: Any) -> Optional[DBRef]:
+    """
+    Return the DBRef a Link field to the schema stores for a document, link or id
+    """
+    reference = link_id(value)
+    if reference is None:
+        return None
+
+    return DBRef(schema.get_collection_name(), reference)
+
+
+def embedded_id(value: Any) -> Optional[PydanticObjectId]:
+    """
+    Return the id of a reference that may still be stored as an embedded document
+    """
+    if isinstance(value, dict):
+        return link_id(value.get("_id", value.get("id")))
+
+    return link_id(value)
+
+
+def embedded_ids(values: Any) -> list[PydanticObjectId]:
+    """
+    Return the ids of a list of references that may still be stored as embedded documents
+    """
+    return [embedded_id(value) for value in values or [] if value is not None]
+
+
+def reference_values(values: dict) -> dict:
+    """
+    Return update values with their vrf and vlan references converted to ids, as the schema validators do
+    """
+    references = {"vrf": embedded_id, "vlan": embedded_ids}
+    return {field: references[field](value) if field in references else value for field, value in values.items()}
@@ -14,22 +14,24 @@ class SerializationFilter:
     """
 
     @staticmethod
-    def response(_object: Any) -> Any:
+    def response(_object: Any, keep_refs: bool = False) -> Any:
         """
         Method responsible for filtering the response
+
+        When keep_refs is set, unresolved links are rendered as their ids instead of None
         """
         if isinstance(_object, list):
             for value in _object:
-                SerializationFilter.response(value)
+                SerializationFilter.response(value, keep_refs)
         elif hasattr(_object, "__dict__"):
             for key, value in _object.__dict__.items():
                 if isinstance(value, Link):
-                    _object.__dict__[key] = None
+                    _object.__dict__[key] = str(value.ref.id) if keep_refs else None
 
                 elif isinstance(value, BackLink):
                     if isinstance(_object, list):
                         for item in _object:
-                            SerializationFilter.response(item)
+                            SerializationFilter.response(item, keep_refs)
                     else:
                         _object.__dict__[key] = None
 
@@ -38,8 +40,8 @@ class SerializationFilter:
                         if isinstance(item, BackLink):
                             _object.__dict__[key] = None
                         else:
-                            SerializationFilter.response(item)
+                            SerializationFilter.response(item, keep_refs)
                 else:
-                    SerializationFilter.response(value)
+                    SerializationFilter.response(value, keep_refs)
 
         return jsonable_encoder(_object)
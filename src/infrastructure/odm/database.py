@@ -1,34 +1,73 @@
 """
 Module for the database ODM (Object Document Mapper) connection
 """
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
 import motor.motor_asyncio
 from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClientSession
+
+_client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None
+_supports_transactions: Optional[bool] = None
+
+DOCUMENT_MODELS: list = [
+    "src.app.core.facilities.vendors.schema.VendorSchema",
+    "src.app.core.facilities.locations.schema.LocationsSchema",
+
+    "src.app.core.ipam.devices.schema.DevicesSchema",
+    "src.app.core.ipam.interfaces.single.schema.InterfaceSingleSchema",
+    "src.app.core.ipam.interfaces.lag.schema.InterfaceLagSchema",
+    "src.app.core.ipam.vrf.schema.VrfSchema",
+    "src.app.core.ipam.circuits.schema.CircuitsSchema",
+    "src.app.core.ipam.vc_id_pools.schema.VcIdPoolSchema",
+    "src.app.core.ipam.l2domain.schema.L2DomainSchema",
+    "src.app.core.ipam.vlans.schema.VlanSchema",
+    "src.app.core.ipam.tunnel.schema.TunnelSchema",
+    "src.app.core.ipam.tunnel_traffic_policies.schema.TunnelTrafficPoliciesSchema",
+    "src.app.core.ipam.paths.schema.PathsSchema",
+]
 
 
 async def init_db(db_host: str,  db_name):
     """
     Method responsible for initializing the database mongo
     """
+    global _client # pylint: disable=global-statement
+
     client = motor.motor_asyncio.AsyncIOMotorClient(
         f"mongodb://{db_host}/{db_name}"
     )
+    _client = client
 
     await init_beanie(
         database=client[db_name],
-        document_models=[
-            "src.app.core.facilities.vendors.schema.VendorSchema",
-            "src.app.core.facilities.locations.schema.LocationsSchema",
-
-            "src.app.core.ipam.devices.schema.DevicesSchema",
-            "src.app.core.ipam.interfaces.single.schema.InterfaceSingleSchema",
-            "src.app.core.ipam.interfaces.lag.schema.InterfaceLagSchema",
-            "src.app.core.ipam.vrf.schema.VrfSchema",
-            "src.app.core.ipam.circuits.schema.CircuitsSchema",
-            "src.app.core.ipam.l2domain.schema.L2DomainSchema",
-            "src.app.core.ipam.vlans.schema.VlanSchema",
-            "src.app.core.ipam.tunnel.schema.TunnelSchema",
-            "src.app.core.ipam.tunnel_traffic_policies.schema.TunnelTrafficPoliciesSchema",
-            "src.app.core.ipam.paths.schema.PathsSchema",
-
-        ]
+        document_models=DOCUMENT_MODELS
     )
+
+
+async def supports_transactions() -> bool:
+    """
+    Method responsible for checking if the server is a replica set or sharded cluster
+    """
+    global _supports_transactions # pylint: disable=global-statement
+
+    if _supports_transactions is None:
+        hello = await _client.admin.command("hello")
+        _supports_transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    return _supports_transactions
+
+
+@asynccontextmanager
+async def start_transaction() -> AsyncIterator[Optional[AsyncIOMotorClientSession]]:
+    """
+    Yield a session with an open transaction, or None when the server does not support transactions
+    """
+    if not await supports_transactions():
+        yield None
+        return
+
+    async with await _client.start_session() as session:
+        async with session.start_transaction():
+            yield session
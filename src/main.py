@@ -12,6 +12,7 @@ from dynaconf import settings
 from src.app.facilities.vendors import resource as vendors
 from src.app.facilities.locations import resource as locations
 from src.app.ipam.devices import resource as devices
+from src.app.ipam.addresses import resource as addresses
 from src.app.ipam.interfaces.single import resource as interfaces_single
 from src.app.ipam.interfaces.lag import resource as interfaces_lag
 from src.app.ipam.circuits import resource as circuits
@@ -77,6 +78,7 @@ async def startup_event():
     app.include_router(vendors.router)
     app.include_router(locations.router)
     app.include_router(devices.router)
+    app.include_router(addresses.router)
     app.include_router(interfaces_single.router)
     app.include_router(interfaces_lag.router)
     app.include_router(circuits.router)
@@ -0,0 +1,170 @@
+"""
+Shared fixtures of the test suite
+"""
+
+from importlib import import_module
+
+import pytest
+import pytest_asyncio
+from beanie import init_beanie
+from bson import DBRef, ObjectId
+from mongomock import aggregate as mongomock_aggregate
+from mongomock import collection as mongomock_collection
+from mongomock import filtering as mongomock_filtering
+from mongomock import helpers as mongomock_helpers
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import IndexModel
+
+from src.infrastructure.odm import database as odm_database
+
+_iter_key_candidates = mongomock_filtering.iter_key_candidates
+_get_value_by_dot = mongomock_helpers.get_value_by_dot
+_parse_expression = mongomock_aggregate._Parser.parse  # pylint: disable=protected-access
+
+
+def _iter_key_candidates_dbref(key, doc):
+    """
+    Resolve "field.$id" through stored links (DBRef), as MongoDB does
+    """
+    if isinstance(doc, DBRef):
+        doc = doc.as_doc()
+
+    return _iter_key_candidates(key, doc)
+
+
+def _get_value_by_dot_dbref(doc, key, can_generate_array=False):
+    """
+    Read "field.$id" through a stored link (DBRef), as the unique indexes on links do
+    """
+    if ".$id" not in key:
+        return _get_value_by_dot(doc, key, can_generate_array)
+
+    path, _, remainder = key.partition(".$id")
+    reference = _get_value_by_dot(doc, path, can_generate_array)
+    if not isinstance(reference, DBRef):
+        raise KeyError(path)
+
+    return _get_value_by_dot(reference.as_doc(), "$id" + remainder, can_generate_array)
+
+
+def _parse_get_field(self, expression):
+    """
+    Evaluate $getField, used to read the id of a link (DBRef) in aggregations
+    """
+    if not isinstance(expression, dict) or list(expression) != ["$getField"]:
+        return _parse_expression(self, expression)
+
+    field = _parse_expression(self, expression["$getField"]["field"])
+    try:
+        value = _parse_expression(self, expression["$getField"]["input"])
+    except KeyError:
+        return None
+    if isinstance(value, DBRef):
+        value = value.as_doc()
+
+    return value.get(field) if isinstance(value, dict) else None
+
+
+def _bit_updater(doc, field_name, value):
+    """
+    Apply a $bit update (and / or / xor) on a signed 64 bit integer
+    """
+    if isinstance(doc, list):
+        field_name = int(field_name)
+    current = int(doc[field_name])
+    for operator, mask in value.items():
+        if operator == "and":
+            current &= int(mask)
+        elif operator == "or":
+            current |= int(mask)
+        else:
+            current ^= int(mask)
+    doc[field_name] = current
+
+
+def _without_sort(add):
+    """
+    Drop the sort option pymongo>=4.11 passes to bulk updates, unknown to mongomock
+    """
+
+    def wrapper(self, *args, sort=None, **kwargs):  # pylint: disable=unused-argument
+        return add(self, *args, **kwargs)
+
+    return wrapper
+
+
+@pytest.fixture(autouse=True)
+def mongomock_support(monkeypatch):
+    """
+    Teach mongomock the operators used by the services that it does not implement
+    """
+    monkeypatch.setattr(mongomock_filtering, "iter_key_candidates", _iter_key_candidates_dbref)
+    monkeypatch.setattr(mongomock_helpers, "get_value_by_dot", _get_value_by_dot_dbref)
+    monkeypatch.setattr(mongomock_aggregate._Parser, "parse", _parse_get_field)  # pylint: disable=protected-access
+    for method in ("add_update", "add_replace"):
+        add = getattr(mongomock_collection.BulkOperationBuilder, method)
+        monkeypatch.setattr(mongomock_collection.BulkOperationBuilder, method, _without_sort(add))
+    monkeypatch.setitem(mongomock_collection._updaters, "$bit", _bit_updater)  # pylint: disable=protected-access
+    monkeypatch.setattr(odm_database, "_supports_transactions", False)
+
+
+@pytest.fixture
+def database():
+    """
+    Empty in-memory database for one test
+    """
+    return AsyncMongoMockClient()["mpls_manager_test"]
+
+
+@pytest_asyncio.fixture
+async def documents(database):
+    """
+    Initialize beanie with every document model on the test database
+    """
+    await init_beanie(database=database, document_models=odm_database.DOCUMENT_MODELS)
+    schemas = {}
+    for path in odm_database.DOCUMENT_MODELS:
+        module, name = path.rsplit(".", 1)
+        schemas[name] = getattr(import_module(module), name)
+
+    for schema in schemas.values():
+        # resolve the links declared by name to models of other modules (e.g. Link["InterfaceLagSchema"])
+        schema.model_rebuild(_types_namespace=schemas)
+
+        # mongomock-motor drops partialFilterExpression when beanie creates the indexes
+        for index in getattr(schema.Settings, "indexes", []):
+            if not isinstance(index, IndexModel) or "partialFilterExpression" not in index.document:
+                continue
+            options = dict(index.document)
+            keys = list(options.pop("key").items())
+            await database[schema.Settings.name].drop_index(options["name"])
+            await database[schema.Settings.name].create_index(keys, **options)
+
+    return database
+
+
+@pytest.fixture
+def bind_collections(database, monkeypatch):
+    """
+    Point the motor collection of the given schemas to the test database, without init_beanie
+    """
+
+    def bind(*schemas):
+        for schema in schemas:
+            collection = database[schema.Settings.name]
+            monkeypatch.setattr(schema, "get_motor_collection", lambda collection=collection: collection)
+
+    return bind
+
+
+@pytest.fixture
+def endpoint(database):
+    """
+    Insert an interface (or lag) with its speed, reserved bandwidth and device, returning its id
+    """
+
+    async def insert(speed: int, reserved: int = 0, device_id=None, collection: str = "interfaces_single"):
+        document = {"name": "endpoint-%s" % ObjectId(), "speed": speed, "bandwidth_reserved": reserved, "device_id": device_id}
+        return (await database[collection].insert_one(document)).inserted_id
+
+    return insert
@@ -0,0 +1,132 @@
+"""
+Tests of the conditional bandwidth reservation of circuit endpoints
+"""
+
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from src.app.core.ipam.interfaces.lag.models import InterfaceLagBase
+from src.app.core.ipam.interfaces.lag.schema import InterfaceLagSchema
+from src.app.core.ipam.interfaces.single.models import InterfaceSingleBase
+from src.app.core.ipam.interfaces.single.schema import InterfaceSingleSchema
+from src.app.ipam.circuits.service import CircuitsService
+from src.app.ipam.interfaces.lag.facade import InterfaceLagFacade
+from src.app.ipam.interfaces.single.facade import InterfaceSingleFacade
+
+
+def read_before(schema, document, monkeypatch) -> None:
+    """
+    Make the facade work on a document read before a reservation was taken
+    """
+
+    async def get(*_args, **_kwargs):
+        return document
+
+    monkeypatch.setattr(schema, "get", get)
+
+
+async def reserved(database, endpoint_id, collection: str = "interfaces_single") -> int:
+    """
+    Read the reserved bandwidth of an interface (or lag)
+    """
+    return (await database[collection].find_one({"_id": endpoint_id}))["bandwidth_reserved"]
+
+
+@pytest.mark.asyncio
+async def test_reserve_admits_until_capacity(documents, endpoint):
+    interface_id = await endpoint(speed=10)
+    endpoints = [(InterfaceSingleSchema, interface_id)]
+
+    assert await CircuitsService.reserve_bandwidth(endpoints, 6000) is None
+    assert await CircuitsService.reserve_bandwidth(endpoints, 6000) == str(interface_id)
+    assert await reserved(documents, interface_id) == 6000
+
+
+@pytest.mark.asyncio
+async def test_reserve_rolls_back_when_one_endpoint_is_full(documents, endpoint):
+    src = await endpoint(speed=10)
+    dst = await endpoint(speed=20, reserved=19000, collection="interfaces_lag")
+
+    insufficient = await CircuitsService.reserve_bandwidth([(InterfaceSingleSchema, src), (InterfaceLagSchema, dst)], 2000)
+
+    assert insufficient == str(dst)
+    assert await reserved(documents, src) == 0
+    assert await reserved(documents, dst, collection="interfaces_lag") == 19000
+
+
+@pytest.mark.asyncio
+async def test_reserve_concurrently_never_overbooks(documents, endpoint):
+    interface_id = await endpoint(speed=10)
+    endpoints = [(InterfaceSingleSchema, interface_id)]
+
+    results = await asyncio.gather(*[CircuitsService.reserve_bandwidth(endpoints, 3000) for _ in range(5)])
+
+    assert results.count(None) == 3
+    assert await reserved(documents, interface_id) == 9000
+
+
+@pytest.mark.asyncio
+async def test_move_reserves_only_the_increase_on_the_same_endpoint(documents, endpoint):
+    interface_id = await endpoint(speed=10, reserved=6000)
+    endpoints = [(InterfaceSingleSchema, interface_id)]
+
+    assert await CircuitsService.move_bandwidth(endpoints, 6000, endpoints, 9000) is None
+    assert await reserved(documents, interface_id) == 9000
+
+
+@pytest.mark.asyncio
+async def test_move_keeps_old_reservation_when_new_endpoint_is_full(documents, endpoint):
+    old = await endpoint(speed=10, reserved=6000)
+    new = await endpoint(speed=10, reserved=9500)
+
+    insufficient = await CircuitsService.move_bandwidth(
+        [(InterfaceSingleSchema, old)], 6000, [(InterfaceSingleSchema, new)], 1000
+    )
+
+    assert insufficient == str(new)
+    assert await reserved(documents, old) == 6000
+    assert await reserved(documents, new) == 9500
+
+
+@pytest.mark.asyncio
+async def test_move_releases_old_reservation_after_reserving(documents, endpoint):
+    old = await endpoint(speed=10, reserved=6000)
+    new = await endpoint(speed=10)
+
+    assert await CircuitsService.move_bandwidth([(InterfaceSingleSchema, old)], 6000, [(InterfaceSingleSchema, new)], 1000) is None
+    assert await reserved(documents, old) == 0
+    assert await reserved(documents, new) == 1000
+
+
+@pytest.mark.asyncio
+async def test_interface_update_keeps_reservation_taken_meanwhile(documents, endpoint, monkeypatch):
+    interface_id = await endpoint(speed=10, device_id=ObjectId())
+    read_before(InterfaceSingleSchema, await InterfaceSingleSchema.get(interface_id), monkeypatch)
+    await CircuitsService.reserve_bandwidth([(InterfaceSingleSchema, interface_id)], 4000)
+
+    response = await InterfaceSingleFacade.update_interface_single(
+        str(interface_id), InterfaceSingleBase(description="uplink", ipaddr="10.0.0.1/30")
+    )
+
+    assert response["status"] == "success"
+    stored = await documents["interfaces_single"].find_one({"_id": interface_id})
+    assert stored["bandwidth_reserved"] == 4000
+    assert stored["description"] == "uplink"
+    assert stored["ip_start"] == stored["ip_end"] is not None
+
+
+@pytest.mark.asyncio
+async def test_lag_update_keeps_reservation_taken_meanwhile(documents, endpoint, monkeypatch):
+    lag_id = await endpoint(speed=20, collection="interfaces_lag")
+    read_before(InterfaceLagSchema, await InterfaceLagSchema.get(lag_id), monkeypatch)
+    await CircuitsService.reserve_bandwidth([(InterfaceLagSchema, lag_id)], 5000)
+
+    response = await InterfaceLagFacade.update_interface_lag(str(lag_id), InterfaceLagBase(name="lag-1", mtu=9000))
+
+    assert response["status"] == "success"
+    lag = await documents["interfaces_lag"].find_one({"_id": lag_id})
+    assert lag["bandwidth_reserved"] == 5000
+    assert lag["mtu"] == 9000
+    assert "interface" not in lag
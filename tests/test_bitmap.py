@@ -0,0 +1,74 @@
+"""
+Tests of the occupancy bitmap helpers
+"""
+
+from src.app.shared.bitmap import (WORD_BITS, clear_bits, compress_ranges, decode_bitmap, empty_bitmap,
+                                   encode_bitmap, free_block, free_numbers, set_bits)
+
+SIZE = 4096
+
+
+def apply_bit(words: list, update: dict, field: str = "bitmap") -> list:
+    """
+    Apply a $bit update to stored words the way MongoDB does on signed 64 bit integers
+    """
+    words = list(words)
+    for path, operation in update["$bit"].items():
+        index = int(path[len(field) + 1:])
+        (operator, mask), = operation.items()
+        words[index] = int(words[index]) | int(mask) if operator == "or" else int(words[index]) & int(mask)
+
+    return words
+
+
+def test_encode_decode_roundtrip():
+    numbers = {0, 1, 63, 64, 127, 2048, SIZE - 1}
+
+    bitmap = decode_bitmap(encode_bitmap(numbers, SIZE))
+
+    assert {number for number in range(SIZE) if bitmap >> number & 1} == numbers
+
+
+def test_encoded_words_fit_signed_int64():
+    words = encode_bitmap(range(WORD_BITS), WORD_BITS)
+
+    assert len(words) == 1
+    assert int(words[0]) == -1
+
+
+def test_set_and_clear_bits_match_encoding():
+    words = empty_bitmap(SIZE)
+
+    words = apply_bit(words, set_bits("bitmap", [2, 63, 64, 4094]))
+    assert words == [int(word) for word in encode_bitmap([2, 63, 64, 4094], SIZE)]
+
+    words = apply_bit(words, clear_bits("bitmap", [63, 4094]))
+    assert words == [int(word) for word in encode_bitmap([2, 64], SIZE)]
+
+
+def test_set_bits_groups_numbers_by_word():
+    update = set_bits("bitmap", [1, 2, 65])
+
+    assert sorted(update["$bit"]) == ["bitmap.0", "bitmap.1"]
+
+
+def test_free_numbers_skips_used():
+    bitmap = decode_bitmap(encode_bitmap([2, 3, 5], SIZE))
+
+    assert free_numbers(bitmap, 3, 2, 4094) == [4, 6, 7]
+    assert free_numbers(bitmap, 3, 2, 3) == []
+
+
+def test_free_block_finds_first_run():
+    bitmap = decode_bitmap(encode_bitmap([2, 3, 5, 9], SIZE))
+
+    assert free_block(bitmap, 3, 2, 4094) == 6
+    assert free_block(bitmap, 1, 2, 4094) == 4
+    assert free_block(bitmap, 4, 2, 11) is None
+
+
+def test_compress_ranges():
+    bitmap = decode_bitmap(encode_bitmap([2, 3, 4, 7, 10, 11], SIZE))
+
+    assert compress_ranges(bitmap, 2, 11) == "2-4,7,10-11"
+    assert compress_ranges(bitmap, 2, 11, used=False) == "5-6,8-9"
@@ -0,0 +1,47 @@
+"""
+Tests of the endpoint device pair of circuits kept in sync with their interfaces and lags
+"""
+
+import pytest
+from bson import DBRef, ObjectId
+
+from src.app.core.ipam.circuits.schema import device_pair_key
+from src.app.ipam.interfaces.lag.facade import InterfaceLagFacade
+from src.app.ipam.interfaces.single.facade import InterfaceSingleFacade
+
+
+async def circuit(database, src: tuple, dst: tuple) -> ObjectId:
+    """
+    Insert a circuit between two (field, collection, id, device id) endpoints with its stored elements
+    """
+    (src_field, src_collection, src_id, device_src), (dst_field, dst_collection, dst_id, device_dst) = src, dst
+    document = {
+        "name": "circuit-%s" % ObjectId(), "vc_id": None,
+        src_field: DBRef(src_collection, src_id), dst_field: DBRef(dst_collection, dst_id),
+        "device_src_id": device_src, "device_dst_id": device_dst,
+        "element_ids": [src_id, dst_id, device_src, device_dst], "device_pair": device_pair_key(device_src, device_dst),
+    }
+    return (await database["circuits"].insert_one(document)).inserted_id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("collection", ["interfaces_single", "interfaces_lag"])
+async def test_deleting_an_endpoint_clears_the_device_pair(documents, endpoint, collection):
+    device_a, device_b = ObjectId(), ObjectId()
+    deleted = await endpoint(speed=10, device_id=device_a, collection=collection)
+    kept = await endpoint(speed=10, device_id=device_b)
+    field = "interface_src" if collection == "interfaces_single" else "lag_src"
+    circuit_id = await circuit(
+        documents, (field, collection, deleted, device_a), ("interface_dst", "interfaces_single", kept, device_b)
+    )
+
+    if collection == "interfaces_single":
+        response = await InterfaceSingleFacade.delete_interface_single(str(deleted))
+    else:
+        response = await InterfaceLagFacade.delete_interface_lag(str(deleted))
+
+    assert response["status"] == "success"
+    stored = await documents["circuits"].find_one({"_id": circuit_id})
+    assert stored["device_src_id"] is None
+    assert stored["device_dst_id"] == device_b
+    assert stored["device_pair"] is None
@@ -0,0 +1,46 @@
+"""
+Tests of the filtered and sorted circuits listing
+"""
+
+import pytest
+
+from src.app.ipam.circuits.facade import CircuitsFacade
+
+CIRCUITS = [(True, 3), (False, 5), (True, 5), (True, 0), (False, 1), (True, 3), (True, 5)]
+
+
+async def read_pages(filters: dict, sort: str, descending: bool, limit: int) -> list:
+    """
+    Walk the circuits listing page by page, as a client following X-Next-Cursor does
+    """
+    seen: list = []
+    cursor = None
+    while True:
+        page = await CircuitsFacade.get_circuits(filters=filters, sort=sort, descending=descending, cursor=cursor, limit=limit)
+        assert page["status"] == "success"
+        seen.extend(page["data"]["items"])
+        cursor = page["data"]["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit", [1, 2, 3])
+async def test_alarms_ordered_by_criticality(documents, limit):
+    await documents["circuits"].insert_many([
+        {"name": "circuit-%s" % index, "vc_id": index, "alarm": alarm, "criticality_matrix": criticality}
+        for index, (alarm, criticality) in enumerate(CIRCUITS)
+    ])
+
+    circuits = await read_pages({"alarm": True}, "criticality_matrix", True, limit)
+
+    assert [circuit.criticality_matrix for circuit in circuits] == [5, 5, 3, 3, 0]
+    assert all(circuit.alarm for circuit in circuits)
+    assert len({circuit.id for circuit in circuits}) == 5
+
+
+@pytest.mark.asyncio
+async def test_filters_reject_sorts_without_index(documents):
+    response = await CircuitsFacade.get_circuits(filters={"alarm": True}, sort="name")
+
+    assert response["status"] == "failure"
@@ -0,0 +1,37 @@
+"""
+Tests of the batched validation of circuit endpoints
+"""
+
+import pytest
+from bson import ObjectId
+
+from src.app.core.ipam.circuits.models import CircuitsBase
+from src.app.ipam.circuits.service import INTERFACE_LINKED, SAME_EQUIPMENT, CircuitsService
+
+
+@pytest.mark.asyncio
+async def test_validate_circuits_reports_each_circuit(documents, endpoint):
+    device_a, device_b = ObjectId(), ObjectId()
+    interface_a = await endpoint(speed=10, device_id=device_a)
+    interface_b = await endpoint(speed=10, device_id=device_b)
+    interface_a2 = await endpoint(speed=10, device_id=device_a)
+    lag_b = await endpoint(speed=20, device_id=device_b, collection="interfaces_lag")
+    missing = ObjectId()
+
+    errors = await CircuitsService.validate_circuits([
+        CircuitsBase(interface_src=str(interface_a), interface_dst=str(interface_b)),
+        CircuitsBase(interface_src=str(interface_a), lag_dst=str(lag_b)),
+        CircuitsBase(interface_src=str(interface_a), interface_dst=str(missing)),
+        CircuitsBase(interface_src=str(interface_a), lag_src=str(lag_b), interface_dst=str(interface_b)),
+        CircuitsBase(interface_src=str(interface_a), interface_dst=str(interface_a2)),
+        CircuitsBase(interface_src="not-an-id", interface_dst=str(interface_b)),
+        CircuitsBase(interface_src=str(interface_a), interface_dst=str(interface_b), bind_policy=str(missing)),
+    ])
+
+    assert errors[0] is None
+    assert errors[1] is None
+    assert str(missing) in errors[2]
+    assert errors[3] == INTERFACE_LINKED
+    assert errors[4] == SAME_EQUIPMENT
+    assert "not-an-id" in errors[5]
+    assert str(missing) in errors[6]
@@ -0,0 +1,51 @@
+"""
+Tests of the cascade delete of a device
+"""
+
+import pytest
+from bson import DBRef, ObjectId
+
+from src.app.ipam.devices.service import DevicesService
+
+
+def lag_ref(lag_id):
+    """
+    Link of an interface to its lag
+    """
+    return DBRef("interfaces_lag", lag_id)
+
+
+@pytest.mark.asyncio
+async def test_cascade_deletes_only_lags_of_the_device(documents):
+    device_a, device_b = ObjectId(), ObjectId()
+    lag_a, lag_b = ObjectId(), ObjectId()
+    await documents["devices"].insert_many([{"_id": device_a, "name": "pe-a"}, {"_id": device_b, "name": "pe-b"}])
+    await documents["interfaces_lag"].insert_many([
+        {"_id": lag_a, "name": "lag-a", "device_id": device_a},
+        {"_id": lag_b, "name": "lag-b", "device_id": device_b},
+    ])
+    interfaces = await documents["interfaces_single"].insert_many([
+        {"name": "a1", "device_id": device_a, "lag": lag_ref(lag_b), "type": "lag"},
+        {"name": "a2", "device_id": device_a, "lag": lag_ref(lag_a), "type": "lag"},
+        {"name": "b1", "device_id": device_b, "lag": lag_ref(lag_a), "type": "lag"},
+        {"name": "b2", "device_id": device_b, "lag": lag_ref(lag_b), "type": "lag"},
+    ])
+    a1, _, b1, b2 = interfaces.inserted_ids
+    circuit = await documents["circuits"].insert_one({
+        "name": "circuit", "interface_src": DBRef("interfaces_single", a1), "lag_dst": lag_ref(lag_b),
+        "element_ids": [a1, lag_b],
+    })
+
+    result = await DevicesService.cascade_delete(device_a)
+
+    assert result["devices_deleted"] == 1
+    assert result["interfaces_deleted"] == 2
+    assert result["lags_deleted"] == 1
+    assert result["lag_members_detached"] == 1
+    assert await documents["interfaces_lag"].distinct("_id") == [lag_b]
+    assert sorted(await documents["interfaces_single"].distinct("_id")) == sorted([b1, b2])
+    assert (await documents["interfaces_single"].find_one({"_id": b1}))["lag"] is None
+    assert (await documents["interfaces_single"].find_one({"_id": b2}))["lag"] == lag_ref(lag_b)
+    stored = await documents["circuits"].find_one({"_id": circuit.inserted_id})
+    assert stored["interface_src"] is None
+    assert stored["lag_dst"] == lag_ref(lag_b)
@@ -0,0 +1,68 @@
+"""
+Tests of the unique normalized management address of devices
+"""
+
+import pytest
+
+from src.app.core.ipam.devices.models import DevicesBase, DevicesMonitoringBase
+from src.app.core.ipam.devices.schema import DevicesSchema
+from src.app.ipam.devices.facade import DevicesFacade
+from src.app.ipam.devices.service import DevicesService
+
+
+@pytest.fixture
+def devices(documents):
+    """
+    Devices collection of the test database
+    """
+    return documents["devices"]
+
+
+def device(name: str, ipaddr: str) -> DevicesBase:
+    """
+    Device payload with a valid snmp version
+    """
+    return DevicesBase(name=name, ipaddr=ipaddr, monitoring=DevicesMonitoringBase(snmp_version="v2"))
+
+
+@pytest.mark.asyncio
+async def test_create_device_rejects_same_address_in_other_notation(devices):
+    created = await DevicesFacade.create_device(device("pe-01", "10.0.0.1/32"))
+    duplicated = await DevicesFacade.create_device(device("pe-02", "10.0.0.1"))
+
+    assert created["status"] == "success"
+    assert duplicated["status"] == "failure"
+    assert "10.0.0.1" in duplicated["message"]
+    assert await DevicesSchema.find_all().count() == 1
+
+
+@pytest.mark.asyncio
+async def test_create_device_keeps_unique_index_when_check_races(devices, monkeypatch):
+    await DevicesFacade.create_device(device("pe-01", "10.0.0.1"))
+
+    async def no_match(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr(DevicesSchema, "find_one", no_match)
+    duplicated = await DevicesFacade.create_device(device("pe-02", "10.0.0.1/32"))
+
+    assert duplicated["status"] == "failure"
+    assert await devices.count_documents({}) == 1
+
+
+@pytest.mark.asyncio
+async def test_backfill_fills_addresses_and_reports_conflicts(devices):
+    collection = devices
+    await collection.insert_one({"name": "pe-01", "ipaddr": "10.0.0.1", "mgmt_ipaddr": "10.0.0.1"})
+    legacy = await collection.insert_many([
+        {"name": "pe-02", "ipaddr": "10.0.0.2/32"},
+        {"name": "pe-03", "ipaddr": "10.0.0.1/32"},
+    ])
+
+    response = await DevicesService.backfill_mgmt_ipaddr()
+
+    assert response["status"] == "success"
+    assert response["data"]["updated"] == 1
+    assert response["data"]["conflicts"] == [str(legacy.inserted_ids[1])]
+    assert (await collection.find_one({"_id": legacy.inserted_ids[0]}))["mgmt_ipaddr"] == "10.0.0.2"
+    assert "mgmt_ipaddr" not in await collection.find_one({"_id": legacy.inserted_ids[1]})
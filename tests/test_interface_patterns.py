@@ -0,0 +1,43 @@
+"""
+Tests of the interface name pattern expansion
+"""
+
+import pytest
+
+from src.app.ipam.interfaces.single.service import MAX_PATTERN_INTERFACES, InterfaceSingleService
+
+
+def test_expands_ranges_and_lists():
+    names = InterfaceSingleService.expand_name_pattern("GigabitEthernet0/0/[0-2,5]")
+
+    assert names == ["GigabitEthernet0/0/0", "GigabitEthernet0/0/1", "GigabitEthernet0/0/2", "GigabitEthernet0/0/5"]
+
+
+def test_keeps_zero_padding():
+    assert InterfaceSingleService.expand_name_pattern("Gi0/[01-03]") == ["Gi0/01", "Gi0/02", "Gi0/03"]
+    assert InterfaceSingleService.expand_name_pattern("Gi0/[08-10]") == ["Gi0/08", "Gi0/09", "Gi0/10"]
+
+
+def test_expands_every_combination():
+    names = InterfaceSingleService.expand_name_pattern("Te[0-1]/0/[0-1]")
+
+    assert names == ["Te0/0/0", "Te0/0/1", "Te1/0/0", "Te1/0/1"]
+
+
+def test_pattern_without_range():
+    assert InterfaceSingleService.expand_name_pattern("Loopback0") == ["Loopback0"]
+
+
+def test_rejects_reversed_range():
+    with pytest.raises(ValueError):
+        InterfaceSingleService.expand_name_pattern("Gi0/[5-1]")
+
+
+def test_rejects_huge_range_before_building_it():
+    with pytest.raises(ValueError):
+        InterfaceSingleService.expand_name_pattern("Gi0/[0-999999999999]")
+
+
+def test_rejects_combinations_over_the_limit():
+    with pytest.raises(ValueError):
+        InterfaceSingleService.expand_name_pattern("Gi[0-%s]/[0-1]" % (MAX_PATTERN_INTERFACES - 1))
@@ -0,0 +1,34 @@
+"""
+Tests of the bulk operational status ingest of interfaces
+"""
+
+import pytest
+from bson import ObjectId
+
+from src.app.core.ipam.interfaces.single.models import InterfaceSingleStatusBase
+from src.app.ipam.interfaces.single.facade import InterfaceSingleFacade
+
+
+@pytest.mark.asyncio
+async def test_ingest_reports_each_outcome(documents):
+    device_id = ObjectId()
+    changed, unchanged, by_name = (await documents["interfaces_single"].insert_many([
+        {"name": "Gi0/0/0", "device_id": device_id, "status_op": False, "alarm": False},
+        {"name": "Gi0/0/1", "device_id": device_id, "status_op": True, "alarm": False},
+        {"name": "Gi0/0/2", "device_id": device_id, "status_op": False, "alarm": False},
+    ])).inserted_ids
+
+    response = await InterfaceSingleFacade.ingest_interface_single_status([
+        InterfaceSingleStatusBase(id=str(changed), status_op=True),
+        InterfaceSingleStatusBase(id=str(unchanged), status_op=True),
+        InterfaceSingleStatusBase(device=str(device_id), name="Gi0/0/2", alarm=True),
+        InterfaceSingleStatusBase(id=str(ObjectId()), status_op=True),
+        InterfaceSingleStatusBase(id="not-an-id", status_op=True),
+        InterfaceSingleStatusBase(id=str(changed)),
+    ])
+
+    assert response["data"] == {
+        "received": 6, "matched": 3, "applied": 2, "unchanged": 1, "not_found": 1, "empty": 1, "invalid": ["not-an-id"],
+    }
+    assert (await documents["interfaces_single"].find_one({"_id": changed}))["status_op"] is True
+    assert (await documents["interfaces_single"].find_one({"_id": by_name}))["alarm"] is True
@@ -0,0 +1,46 @@
+"""
+Tests of the batched attach and detach of lag members
+"""
+
+import pytest
+from bson import DBRef, ObjectId
+
+from src.app.core.ipam.interfaces.lag.models import InterfaceLagMembersBase
+from src.app.ipam.interfaces.lag.facade import InterfaceLagFacade
+
+
+@pytest.mark.asyncio
+async def test_attach_batch_rejects_members_of_another_lag(documents, endpoint):
+    device_id = ObjectId()
+    lag_id = await endpoint(speed=20, device_id=device_id, collection="interfaces_lag")
+    other_lag = await endpoint(speed=20, device_id=device_id, collection="interfaces_lag")
+    free = await endpoint(speed=10, device_id=device_id)
+    taken = await endpoint(speed=10, device_id=device_id)
+    await documents["interfaces_single"].update_one({"_id": taken}, {"$set": {"lag": DBRef("interfaces_lag", other_lag)}})
+
+    rejected = await InterfaceLagFacade.attach_interface_lag_batch(
+        str(lag_id), InterfaceLagMembersBase(interfaces=[str(free), str(taken)])
+    )
+    attached = await InterfaceLagFacade.attach_interface_lag_batch(str(lag_id), InterfaceLagMembersBase(interfaces=[str(free)]))
+
+    assert rejected["status"] == "failure"
+    assert str(taken) in rejected["message"]
+    assert attached["data"]["attached"] == 1
+    stored = await documents["interfaces_single"].find_one({"_id": free})
+    assert stored["lag"] == DBRef("interfaces_lag", lag_id)
+    assert stored["type"] == "lag"
+
+
+@pytest.mark.asyncio
+async def test_detach_batch_counts_members_still_in_a_lag(documents, endpoint):
+    device_id = ObjectId()
+    lag_id = await endpoint(speed=20, device_id=device_id, collection="interfaces_lag")
+    members = [await endpoint(speed=10, device_id=device_id) for _ in range(2)]
+    await InterfaceLagFacade.attach_interface_lag_batch(str(lag_id), InterfaceLagMembersBase(interfaces=[str(member) for member in members]))
+
+    detached = await InterfaceLagFacade.detach_interface_lag_batch(InterfaceLagMembersBase(interfaces=[str(member) for member in members]))
+    again = await InterfaceLagFacade.detach_interface_lag_batch(InterfaceLagMembersBase(interfaces=[str(members[0])]))
+
+    assert detached["data"]["detached"] == 2
+    assert again["status"] == "failure"
+    assert await documents["interfaces_single"].count_documents({"lag": None, "type": "single"}) == 2
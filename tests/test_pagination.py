@@ -0,0 +1,60 @@
+"""
+Tests of the keyset pagination helpers
+"""
+
+import pytest
+from bson import ObjectId
+
+from src.app.shared.pagination import encode_cursor, keyset_filter, sorted_keyset_filter, split_page
+
+NAMES = [None, "b", "a", None, "c", "b", None, "a"]
+
+
+async def read_pages(collection, descending: bool, limit: int) -> list:
+    """
+    Walk a (name, _id) ordered listing page by page, as the listing endpoints do
+    """
+    direction = -1 if descending else 1
+    seen: list = []
+    cursor = None
+    while True:
+        documents = await collection.find(sorted_keyset_filter(cursor, "name", descending)).sort(
+            [("name", direction), ("_id", direction)]
+        ).limit(limit + 1).to_list(length=None)
+        page, cursor = split_page(documents, limit, key=lambda document: encode_cursor(document.get("name"), document["_id"]))
+        seen.extend(document["_id"] for document in page)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+async def test_sorted_keyset_visits_every_document_once(database, descending, limit):
+    collection = database["items"]
+    await collection.insert_many([{"name": name} for name in NAMES])
+    direction = -1 if descending else 1
+    expected = [
+        document["_id"] for document in
+        await collection.find().sort([("name", direction), ("_id", direction)]).to_list(length=None)
+    ]
+
+    assert await read_pages(collection, descending, limit) == expected
+
+
+def test_sorted_keyset_filter_without_cursor():
+    assert sorted_keyset_filter(None, "name") == {}
+
+
+def test_split_page_returns_cursor_only_when_more():
+    items = [{"id": index} for index in range(3)]
+
+    assert split_page(items, 3, key=lambda item: item["id"]) == (items, None)
+    assert split_page(items, 2, key=lambda item: item["id"]) == (items[:2], "1")
+
+
+def test_keyset_filter_resumes_after_id():
+    document_id = ObjectId()
+
+    assert keyset_filter(str(document_id)) == {"_id": {"$gt": document_id}}
+    assert keyset_filter(None) == {}
@@ -0,0 +1,81 @@
+"""
+Tests of the vc_id pool allocation and seeding
+"""
+
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from src.app.core.ipam.circuits.schema import CircuitsSchema
+from src.app.core.ipam.vc_id_pools.schema import VcIdPoolSchema
+from src.app.ipam.circuits import service
+from src.app.ipam.circuits.service import CircuitsService
+
+
+@pytest.fixture(autouse=True)
+def collections(bind_collections, monkeypatch):
+    bind_collections(CircuitsSchema, VcIdPoolSchema)
+    monkeypatch.setattr(service, "settings", {"VC_ID_POOLS": {"default": [1000, 1004]}})
+
+
+@pytest.mark.asyncio
+async def test_allocate_vc_id_hands_out_each_value_once():
+    allocated = await asyncio.gather(*[CircuitsService.allocate_vc_id("default") for _ in range(5)])
+
+    assert sorted(allocated) == [1000, 1001, 1002, 1003, 1004]
+    assert await CircuitsService.allocate_vc_id("default") is None
+
+
+@pytest.mark.asyncio
+async def test_allocate_vc_id_unknown_pool():
+    assert await CircuitsService.allocate_vc_id("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_seed_skips_only_the_run_of_used_vc_ids(database):
+    await database["circuits"].insert_many([{"vc_id": vc_id} for vc_id in (1000, 1001, 1002, 1004)])
+
+    assert await CircuitsService.seed_vc_id_pool("default") == 1002
+    assert await CircuitsService.allocate_vc_id("default") == 1003
+
+
+@pytest.mark.asyncio
+async def test_seed_walks_from_the_pool_counter(database):
+    await CircuitsService.allocate_vc_id("default")
+    await database["circuits"].insert_many([{"vc_id": vc_id} for vc_id in (1001, 1002)])
+
+    assert await CircuitsService.seed_vc_id_pool("default") == 1002
+    assert await CircuitsService.allocate_vc_id("default") == 1003
+
+
+@pytest.mark.asyncio
+async def test_seed_leaves_pool_when_next_value_is_free(database):
+    await database["circuits"].insert_many([{"vc_id": vc_id} for vc_id in (1002, 1003)])
+
+    assert await CircuitsService.seed_vc_id_pool("default") is None
+    assert await CircuitsService.allocate_vc_id("default") == 1000
+
+
+@pytest.mark.asyncio
+async def test_seed_never_moves_pool_back(database):
+    for _ in range(3):
+        await CircuitsService.allocate_vc_id("default")
+    await database["circuits"].insert_one({"vc_id": 1000})
+
+    assert await CircuitsService.seed_vc_id_pool("default") is None
+    assert await CircuitsService.allocate_vc_id("default") == 1003
+
+
+@pytest.mark.asyncio
+async def test_seed_reports_failure_after_retries(database, monkeypatch):
+    await database["circuits"].insert_one({"vc_id": 1000})
+
+    async def duplicated(*_args, **_kwargs):
+        raise DuplicateKeyError("E11000 Duplicate Key Error", 11000)
+
+    pools = database["vc_id_pools"]
+    monkeypatch.setattr(pools, "update_one", duplicated)
+    monkeypatch.setattr(VcIdPoolSchema, "get_motor_collection", lambda: pools)
+
+    assert await CircuitsService.seed_vc_id_pool("default") is None
@@ -0,0 +1,117 @@
+"""
+Tests of the vlans of a l2domain and their occupancy bitmap
+"""
+
+import pytest
+from bson import DBRef, ObjectId
+
+from src.app.core.ipam.l2domain.schema import VLAN_BITMAP_SIZE
+from src.app.ipam.l2domains.facade import L2DomainFacade
+from src.app.ipam.vlans.facade import VlanFacade
+from src.app.ipam.vlans.service import BITMAP_FIELD, VlanService
+from src.app.shared.bitmap import encode_bitmap
+
+
+async def l2domain(database, used: list = None) -> ObjectId:
+    """
+    Insert a l2domain, with the bitmap of the used vlans when given
+    """
+    document = {"name": "l2domain-%s" % ObjectId(), "description": None, "location": None}
+    if used is not None:
+        document[BITMAP_FIELD] = encode_bitmap(used, VLAN_BITMAP_SIZE)
+
+    return (await database["l2domains"].insert_one(document)).inserted_id
+
+
+async def vlans(database, l2domain_id: ObjectId, numbers: list) -> None:
+    """
+    Insert vlans of a l2domain, without touching its bitmap
+    """
+    await database["vlans"].insert_many([
+        {"name": "VLAN%s" % number, "number": number, "l2domain": DBRef("l2domains", l2domain_id)} for number in numbers
+    ])
+
+
+@pytest.mark.asyncio
+async def test_free_vlans_skip_used(documents):
+    l2domain_id = await l2domain(documents, used=[2, 3, 5])
+
+    free = await VlanFacade.get_free_vlans(str(l2domain_id), 3)
+    block = await VlanFacade.get_free_vlan_block(str(l2domain_id), 3)
+
+    assert free["data"] == [4, 6, 7]
+    assert block["data"] == {"start": 6, "end": 8}
+
+
+@pytest.mark.asyncio
+async def test_free_vlans_rebuild_missing_bitmap(documents):
+    l2domain_id = await l2domain(documents)
+    await vlans(documents, l2domain_id, [2, 3, 4])
+
+    free = await VlanFacade.get_free_vlans(str(l2domain_id), 2)
+
+    assert free["data"] == [5, 6]
+    assert isinstance((await documents["l2domains"].find_one({"_id": l2domain_id}))[BITMAP_FIELD], list)
+
+
+@pytest.mark.asyncio
+async def test_free_vlans_report_malformed_l2domain(documents):
+    free = await VlanFacade.get_free_vlans("not-an-id", 1)
+    block = await VlanFacade.get_free_vlan_block("not-an-id", 1)
+
+    assert free == {"status": "failure", "message": "Interno error: [VlanFacade.get_free_vlans]", "data": None}
+    assert block["message"] == "Interno error: [VlanFacade.get_free_vlan_block]"
+
+
+@pytest.mark.asyncio
+async def test_create_range_reports_existing_vlans_as_conflicts(documents):
+    l2domain_id = await l2domain(documents, used=[])
+    await vlans(documents, l2domain_id, [5])
+
+    response = await VlanFacade.create_vlan_range(2, 8, str(l2domain_id))
+
+    assert response["status"] == "success"
+    assert response["data"] == {"created": [2, 3, 4, 6, 7], "conflicts": [5], "errors": []}
+    assert await documents["vlans"].count_documents({}) == 6
+    bitmap = await VlanService.load_bitmap(l2domain_id)
+    assert [number for number in range(VLAN_BITMAP_SIZE) if bitmap >> number & 1] == [2, 3, 4, 6, 7]
+
+
+@pytest.mark.asyncio
+async def test_create_range_fails_when_every_vlan_exists(documents):
+    l2domain_id = await l2domain(documents, used=[2, 3])
+    await vlans(documents, l2domain_id, [2, 3])
+
+    response = await VlanFacade.create_vlan_range(2, 4, str(l2domain_id))
+
+    assert response["status"] == "failure"
+    assert await documents["vlans"].count_documents({}) == 2
+
+
+@pytest.mark.asyncio
+async def test_delete_range_counts_and_frees_deleted_vlans(documents):
+    l2domain_id = await l2domain(documents, used=[2, 3, 4, 5, 6])
+    await vlans(documents, l2domain_id, [2, 3, 4, 5, 6])
+
+    response = await VlanFacade.delete_vlan_range(3, 5, str(l2domain_id))
+    missing = await VlanFacade.delete_vlan_range(3, 5, str(l2domain_id))
+
+    assert response["data"] == {"range": "3-5", "vlans_deleted": 2}
+    assert missing["status"] == "failure"
+    assert sorted(await documents["vlans"].distinct("number")) == [2, 5, 6]
+    bitmap = await VlanService.load_bitmap(l2domain_id)
+    assert [number for number in range(VLAN_BITMAP_SIZE) if bitmap >> number & 1] == [2, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_delete_l2domain_counts_its_vlans_only(documents):
+    l2domain_id = await l2domain(documents, used=[2, 3, 4])
+    other_id = await l2domain(documents, used=[10])
+    await vlans(documents, l2domain_id, [2, 3, 4])
+    await vlans(documents, other_id, [10])
+
+    response = await L2DomainFacade.delete_l2domain(str(l2domain_id))
+
+    assert response["data"] == {"l2domain": str(l2domain_id), "l2domains_deleted": 1, "vlans_deleted": 3}
+    assert await documents["vlans"].distinct("number") == [10]
+    assert await documents["l2domains"].distinct("_id") == [other_id]